@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ApiContentConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,86 @@
+"""
+Асинхронная обработка горячих маршрутов чтения.
+
+Django 3.0 не поддерживает асинхронные представления и ORM, поэтому
+асинхронной является работа с соединением: чтение запроса и отправка
+ответа выполняются в цикле событий, и медленный клиент занимает только
+сопрограмму, а не воркер. Обработка запроса (middleware, вьюсет,
+сериализаторы, кэш) выполняется в отдельном пуле из `ASGI_READ_THREADS`
+потоков, поэтому ответ совпадает с ответом WSGI-приложения, а число
+соединений с базой ограничено размером пула.
+
+Остальные запросы обрабатываются стандартным `ASGIHandler`. Он
+выполняет представления через `sync_to_async` в общем пуле потоков
+цикла событий, который делится со всеми синхронными вызовами и не
+настраивается отдельно; собственный пул даёт горячим маршрутам заданное
+число потоков и, значит, соединений с базой.
+
+Соединения с базой принадлежат потоку пула, а `request_finished`
+(и закрытие устаревших соединений) `ASGIHandler` отправляет из цикла
+событий, когда закрывает ответ. Поэтому поток пула сам закрывает
+устаревшие и сломанные соединения после обработки запроса.
+"""
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core import signals
+from django.core.handlers.asgi import ASGIHandler
+from django.core.exceptions import RequestAborted
+from django.db import close_old_connections
+from django.urls import set_script_prefix
+
+READ_METHODS = ('GET', 'HEAD')
+READ_PATH = re.compile(
+    r'^/api/v1/titles/(?:\d+/(?:reviews/(?:\d+/comments/)?)?)?$'
+)
+
+
+class ReadPathHandler(ASGIHandler):
+    """
+    ASGI-приложение с отдельным пулом потоков для списков и карточек
+    произведений, списков отзывов и комментариев.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.ASGI_READ_THREADS,
+            thread_name_prefix='asgi-read',
+        )
+
+    @staticmethod
+    def is_read_path(scope):
+        return (scope['type'] == 'http'
+                and scope['method'] in READ_METHODS
+                and READ_PATH.match(scope['path']) is not None)
+
+    async def __call__(self, scope, receive, send):
+        if not self.is_read_path(scope):
+            return await super().__call__(scope, receive, send)
+        try:
+            body_file = await self.read_body(receive)
+        except RequestAborted:
+            return
+        set_script_prefix(self.get_script_prefix(scope))
+        response = await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.respond, scope, body_file
+        )
+        await self.send_response(response, send)
+
+    def respond(self, scope, body_file):
+        """
+        Синхронная часть: выполняется в потоке пула, где у потока своё
+        постоянное соединение с базой.
+        """
+        signals.request_started.send(sender=self.__class__, scope=scope)
+        try:
+            request, error_response = self.create_request(scope, body_file)
+            if request is None:
+                return error_response
+            response = self.get_response(request)
+        finally:
+            close_old_connections()
+        response._handler_class = self.__class__
+        return response
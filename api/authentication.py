@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+USER_CACHE_KEY = 'api:auth-user:{pk}'
+USER_CACHE_FIELDS = ('id', 'username', 'role', 'is_staff', 'is_superuser',
+                     'is_active')
+
+User = get_user_model()
+
+
+def user_cache_key(pk):
+    return USER_CACHE_KEY.format(pk=pk)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация, которая берёт пользователя из кэша, а не из
+    таблицы пользователей.
+
+    В кэше хранятся только поля, нужные для проверки прав (роль, статус),
+    из них собирается экземпляр модели, остальные поля которого
+    отложены (deferred) и при обращении догружаются из базы. Запись в
+    кэше удаляется при изменении пользователя.
+
+    Удаление записи должны видеть все воркеры, иначе пониженный или
+    заблокированный пользователь сохранял бы прежние права до истечения
+    `AUTH_USER_CACHE_TIMEOUT`. Поэтому без общего кэша (CACHE_SHARED)
+    пользователь всегда читается из базы.
+    """
+
+    def get_user(self, validated_token):
+        if not settings.CACHE_SHARED:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        values = cache.get(key)
+        if values is None:
+            user = super().get_user(validated_token)
+            cache.set(key, {field: getattr(user, field)
+                            for field in USER_CACHE_FIELDS},
+                      settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+
+        # from_db ожидает значения в порядке полей модели
+        fields = [field.attname for field in User._meta.concrete_fields
+                  if field.attname in values]
+        user = User.from_db('default', fields,
+                            [values[field] for field in fields])
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive',
+                                       code='user_inactive')
+        return user
@@ -0,0 +1,114 @@
+"""
+Массовое создание произведений.
+
+Поля каждого элемента проверяются сериализатором без обращений к базе,
+затем slug всех категорий и жанров пачки разрешаются по таблицам в
+памяти (api.lookups).
+Корректные элементы сохраняются `bulk_create` для произведений и для
+промежуточной таблицы жанров в одной транзакции, ошибки остальных
+возвращаются по индексу элемента.
+
+`bulk_create` не вызывает сигналы, поэтому индекс поиска, строки
+статистики отзывов и версия кэша ответов обновляются здесь же.
+"""
+from django.db import connection, transaction
+from rest_framework import serializers
+
+from content import search
+from content.models import Category, Genre, Title, TitleStats
+from . import lookups
+from .cache import bump_version
+from .serializers import TitleBulkSerializer
+
+
+def _does_not_exist(slug):
+    message = serializers.SlugRelatedField.default_error_messages[
+        'does_not_exist'
+    ]
+    return str(message).format(slug_name='slug', value=slug)
+
+
+def _insert(titles):
+    """
+    Вставляет произведения и заполняет их первичные ключи.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return Title.objects.bulk_create(titles)
+    if connection.vendor == 'sqlite':
+        # SQLite не возвращает ключи из INSERT, но до конца транзакции
+        # других записей в таблицу нет, а ключи выдаются по порядку:
+        # вставленные строки — последние len(titles) строк таблицы.
+        Title.objects.bulk_create(titles)
+        ids = Title.objects.order_by('-id').values_list(
+            'id', flat=True
+        )[:len(titles)]
+        for title, pk in zip(titles, reversed(list(ids))):
+            title.pk = pk
+        return titles
+    for title in titles:
+        title.save()
+    return titles
+
+
+def create_titles(items):
+    """
+    Создаёт произведения из списка `items`. Возвращает список той же
+    длины: данные созданного произведения или `{'errors': {...}}`.
+    """
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        serializer = TitleBulkSerializer(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = {'errors': serializer.errors}
+
+    categories = lookups.resolve_many(
+        Category, {data['category'] for _, data in valid}
+    )
+    genres = lookups.resolve_many(
+        Genre, {slug for _, data in valid for slug in data['genre']}
+    )
+
+    accepted = []
+    for index, data in valid:
+        errors = {}
+        if data['category'] not in categories:
+            errors['category'] = [_does_not_exist(data['category'])]
+        missing = [slug for slug in data['genre'] if slug not in genres]
+        if missing:
+            errors['genre'] = [_does_not_exist(slug) for slug in missing]
+        if errors:
+            results[index] = {'errors': errors}
+        else:
+            accepted.append((index, data))
+    if not accepted:
+        return results
+
+    titles = [Title(name=data['name'], year=data['year'],
+                    description=data.get('description', ''),
+                    category_id=categories[data['category']])
+              for _, data in accepted]
+    with transaction.atomic():
+        _insert(titles)
+        Title.genre.through.objects.bulk_create([
+            Title.genre.through(title_id=title.pk, genre_id=genres[slug])
+            for title, (_, data) in zip(titles, accepted)
+            for slug in dict.fromkeys(data['genre'])
+        ])
+        TitleStats.objects.bulk_create([TitleStats(title_id=title.pk)
+                                        for title in titles])
+        search.index_titles(titles)
+    bump_version(Title)
+
+    for title, (index, data) in zip(titles, accepted):
+        results[index] = {
+            'id': title.pk,
+            'name': title.name,
+            'year': title.year,
+            'description': title.description,
+            'genre': list(dict.fromkeys(data['genre'])),
+            'category': data['category'],
+        }
+    return results
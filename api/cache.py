@@ -0,0 +1,117 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from .replicas import primary
+
+VERSION_KEY = 'api:version:{label}'
+STATS_KEY = 'api:cache:{resource}:{kind}'
+
+
+def _version_key(model):
+    return VERSION_KEY.format(label=model._meta.label_lower)
+
+
+def bump_version(model):
+    """
+    Увеличивает версию данных модели, делая недействительными все
+    закэшированные ответы, которые от неё зависят.
+    """
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def get_versions(models):
+    """
+    Текущие версии данных моделей одним обращением к кэшу. Отсутствующая
+    версия создаётся заново из текущего времени, чтобы не совпасть с
+    версией, вытесненной из кэша.
+    """
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _count(resource, kind):
+    key = STATS_KEY.format(resource=resource, kind=kind)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def get_cache_stats(resources):
+    """
+    Количество попаданий и промахов кэша ответов по ресурсам.
+    """
+    stats = {}
+    for resource in resources:
+        keys = {kind: STATS_KEY.format(resource=resource, kind=kind)
+                for kind in ('hits', 'misses')}
+        values = cache.get_many(keys.values())
+        stats[resource] = {kind: values.get(key, 0)
+                           for kind, key in keys.items()}
+    return stats
+
+
+class CachedResponseMixin:
+    """
+    Кэширование ответов `list()` и `retrieve()` вьюсета.
+
+    Ключ кэша строится из полного адреса запроса (фильтры, страница) и
+    версий данных моделей из `cache_models`. Любая запись в эти модели
+    (через API или админку) увеличивает версию, и старые ответы больше не
+    используются. Время жизни задаётся `API_CACHE_TIMEOUTS[cache_resource]`.
+
+    Без общего для воркеров кэша (CACHE_SHARED) ответы не кэшируются:
+    остальные воркеры не увидели бы новой версии и отдавали бы устаревшие
+    ответы до истечения времени жизни.
+    """
+    cache_resource = None
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request,
+                                    *args, **kwargs)
+
+    def get_cache_key(self, request):
+        versions = get_versions(self.cache_models)
+        raw = (f'{request.get_host()}{request.get_full_path()}'
+               f'{request.accepted_renderer.format}{versions}')
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f'api:response:{self.cache_resource}:{digest}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not (settings.API_CACHE_ENABLED and settings.CACHE_SHARED):
+            return handler(request, *args, **kwargs)
+
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            _count(self.cache_resource, 'hits')
+            response = Response(cached)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count(self.cache_resource, 'misses')
+        with primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = settings.API_CACHE_TIMEOUTS.get(self.cache_resource)
+            cache.set(key, response.data, timeout)
+        response['X-Cache'] = 'MISS'
+        return response
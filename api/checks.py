@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Предупреждает, что включённый кэш ответов не работает без общего для
+    воркеров кэша.
+    """
+    if not settings.API_CACHE_ENABLED or settings.CACHE_SHARED:
+        return []
+    return [Warning(
+        'Кэш ответов API (API_CACHE_ENABLED) отключён: '
+        f'{settings.CACHES["default"]["BACKEND"]} — кэш одного процесса, '
+        'и воркеры не видят сброса версий данных друг друга.',
+        hint='Задайте общий кэш: CACHE_BACKEND и CACHE_LOCATION '
+             '(memcached), либо CACHE_SHARED=1 для запуска в одном '
+             'процессе.',
+        id='api.W001',
+    )]
+
+
+@register()
+def check_replica_pinning(app_configs, **kwargs):
+    """
+    Предупреждает, что реплики не используются: отметки чтения из основной
+    базы после записи не видны другим воркерам без общего кэша.
+    """
+    if (not settings.DATABASE_REPLICAS or not settings.REPLICA_STICKY_SECONDS
+            or settings.CACHE_SHARED):
+        return []
+    return [Warning(
+        'Чтение из реплик (DATABASE_REPLICAS) отключено: без общего кэша '
+        'клиент после записи может прочитать устаревшие данные в другом '
+        'воркере.',
+        hint='Задайте общий кэш (CACHE_BACKEND и CACHE_LOCATION) либо '
+             'REPLICA_STICKY_SECONDS=0, если отставание реплик допустимо.',
+        id='api.W002',
+    )]
@@ -0,0 +1,55 @@
+import hashlib
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    Условные GET-запросы (`If-None-Match`, `If-Modified-Since`) для
+    `list()` и `retrieve()`.
+
+    Вьюсет обязан определить метод `get_condition(request)`, который
+    возвращает пару (метка версии, дата изменения или None) по дешёвым
+    меткам версий (ревизия произведения, версии данных в кэше) до
+    выборки и сериализации данных; если клиент уже имеет актуальную
+    версию, сразу возвращается `304 Not Modified`. ETag зависит и от
+    формата ответа (JSON, браузерный API), поэтому ответы отдаются с
+    `Vary: Accept`.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not callable(getattr(cls, 'get_condition', None)):
+            raise ImproperlyConfigured(
+                f'{cls.__name__} должен определить метод get_condition().'
+            )
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request,
+                                         *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request,
+                                         *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        stamp, last_modified = self.get_condition(request)
+        raw = (f'{request.get_full_path()}:'
+               f'{request.accepted_renderer.format}:{stamp}')
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        timestamp = last_modified.timestamp() if last_modified else None
+
+        response = get_conditional_response(
+            request, etag=etag,
+            last_modified=int(timestamp) if timestamp else None
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = etag
+                if timestamp:
+                    response['Last-Modified'] = http_date(timestamp)
+        patch_vary_headers(response, ('Accept',))
+        return response
@@ -0,0 +1,220 @@
+"""
+Выгрузка каталога, отзывов и комментариев в формате NDJSON (один
+JSON-объект в строке).
+
+Строки читаются курсором (`QuerySet.iterator()`, на PostgreSQL —
+серверный курсор) и сразу отправляются клиенту через
+`StreamingHttpResponse`, поэтому память не зависит от объёма выгрузки.
+Жанры произведений загружаются отдельным запросом на каждую пачку
+строк: `prefetch_related` с `iterator()` не работает.
+"""
+import zlib
+from datetime import datetime, time
+from itertools import islice
+
+from django.db import router
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from content.models import Comment, Review, Title, TitleStats
+
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+CONTENT_TYPE = 'application/x-ndjson'
+
+
+def parse_updated_since(value):
+    """
+    Дата или дата и время в формате ISO 8601; время без часового пояса
+    считается заданным в текущем поясе.
+    """
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValidationError({
+                'updated_since': ['Ожидается дата в формате ISO 8601.']
+            })
+        moment = datetime.combine(date, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _chunks(rows):
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+STATS_FIELDS = [f'stats__score_{score}' for score in TitleStats.SCORES] + [
+    'stats__review_count', 'stats__last_review_at'
+]
+
+
+def _stats(row):
+    if row['stats__review_count'] is None:
+        return None
+    return {
+        'scores': {str(score): row[f'stats__score_{score}']
+                   for score in TitleStats.SCORES},
+        'review_count': row['stats__review_count'],
+        'last_review_at': row['stats__last_review_at'],
+    }
+
+
+def title_rows(using, updated_since=None):
+    queryset = Title.objects.using(using).order_by('id').values(
+        'id', 'name', 'year', 'description', 'score_sum', 'score_count',
+        'updated_at', 'category__name', 'category__slug',
+        *STATS_FIELDS,
+    )
+    if updated_since:
+        queryset = queryset.filter(updated_at__gte=updated_since)
+    links = Title.genre.through.objects.using(using).order_by('id')
+    for chunk in _chunks(queryset.iterator(chunk_size=CHUNK_SIZE)):
+        genres = {}
+        for title_id, name, slug in links.filter(
+                title_id__in=[row['id'] for row in chunk]
+        ).values_list('title_id', 'genre__name', 'genre__slug'):
+            genres.setdefault(title_id, []).append({'name': name,
+                                                    'slug': slug})
+        for row in chunk:
+            category = None
+            if row['category__slug'] is not None:
+                category = {'name': row['category__name'],
+                            'slug': row['category__slug']}
+            yield {
+                'id': row['id'],
+                'name': row['name'],
+                'year': row['year'],
+                'description': row['description'],
+                'rating': (row['score_sum'] / row['score_count']
+                           if row['score_count'] else None),
+                'genre': genres.get(row['id'], []),
+                'category': category,
+                'stats': _stats(row),
+                'updated_at': row['updated_at'],
+            }
+
+
+def review_rows(using, updated_since=None):
+    queryset = Review.objects.using(using).order_by('id').values(
+        'id', 'title_id', 'text', 'author__username', 'score', 'pub_date',
+        'updated_at'
+    )
+    if updated_since:
+        queryset = queryset.filter(updated_at__gte=updated_since)
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        row['author'] = row.pop('author__username')
+        yield row
+
+
+def comment_rows(using, updated_since=None):
+    queryset = Comment.objects.using(using).order_by('id').values(
+        'id', 'review_id', 'review__title_id', 'text', 'author__username',
+        'pub_date', 'updated_at'
+    )
+    if updated_since:
+        queryset = queryset.filter(updated_at__gte=updated_since)
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        row['title_id'] = row.pop('review__title_id')
+        row['author'] = row.pop('author__username')
+        yield row
+
+
+def _ndjson(rows):
+    encoder = JSONEncoder(ensure_ascii=False)
+    buffer = []
+    size = 0
+    for row in rows:
+        line = encoder.encode(row) + '\n'
+        buffer.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            yield ''.join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def accepted_codings(header):
+    """
+    {кодировка: q} из заголовка `Accept-Encoding`.
+    """
+    codings = {}
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding.lower()] = quality
+    return codings
+
+
+def wants_gzip(request):
+    if request.query_params.get('gzip') is not None:
+        return request.query_params['gzip'] not in ('0', 'false')
+    codings = accepted_codings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    for coding in ('gzip', 'x-gzip', '*'):
+        if coding in codings:
+            return codings[coding] > 0
+    return False
+
+
+EXPORTS = {
+    'titles': (Title, title_rows),
+    'reviews': (Review, review_rows),
+    'comments': (Comment, comment_rows),
+}
+
+
+def stream(request, name):
+    """
+    Потоковый ответ NDJSON, сжатый gzip, если клиент его принимает
+    (`Accept-Encoding`) или запросил параметром `?gzip=1`.
+
+    База для чтения выбирается до отправки ответа: строки читаются уже
+    после выхода из middleware, выбравшего реплику.
+    """
+    model, rows = EXPORTS[name]
+    chunks = _ndjson(rows(
+        router.db_for_read(model),
+        parse_updated_since(request.query_params.get('updated_since'))
+    ))
+    compress = wants_gzip(request)
+    if compress:
+        chunks = _gzipped(chunks)
+    response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPE)
+    response['Content-Disposition'] = (f'attachment; '
+                                       f'filename="{name}.ndjson"')
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    # nginx отправляет строки по мере готовности, не буферизуя выгрузку.
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,17 +1,78 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
 
-from content.models import Title
+from content.models import Category, Genre, Title
+from content.search import search_titles
+from . import lookups
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+
+
+def _slugs(value):
+    return [slug for slug in (part.strip() for part in value.split(','))
+            if slug]
+
+
+def has_genre(genre_ids):
+    """
+    Коррелированный подзапрос `EXISTS` по связям произведения с жанрами:
+    использует уникальный индекс (title_id, genre_id) и, в отличие от
+    соединения, не размножает строки произведений.
+    """
+    return Exists(Title.genre.through.objects.filter(
+        title_id=OuterRef('pk'), genre_id__in=genre_ids
+    ))
 
 
 class TitleFilter(filters.FilterSet):
     """
-    Фильтрация произведений по названию, категории, жанру или году
+    Фильтрация произведений по названию, категории, жанру или году.
+    Поиск по названию использует индекс и упорядочивает результаты по
+    релевантности. Slug категории и жанра разрешаются в id по таблице в
+    памяти (api.lookups), без соединения с их таблицами.
+
+    Категорий и жанров можно указать несколько через запятую:
+    `?genre=drama,comedy` отбирает произведения с любым из жанров, а с
+    `?genre_match=all` — со всеми. `year_min`, `year_max` задают диапазон
+    годов.
     """
-    name = filters.CharFilter(field_name='name', lookup_expr='contains')
-    category = filters.CharFilter(field_name='category__slug',
-                                  lookup_expr='exact')
-    genre = filters.CharFilter(field_name='genre__slug', lookup_expr='exact')
+    name = filters.CharFilter(method='filter_name')
+    category = filters.CharFilter(method='filter_category')
+    genre = filters.CharFilter(method='filter_genre')
+    genre_match = filters.ChoiceFilter(
+        choices=((MATCH_ANY, MATCH_ANY), (MATCH_ALL, MATCH_ALL)),
+        method='filter_genre_match'
+    )
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
 
     class Meta:
         model = Title
         fields = ['name', 'category', 'genre', 'year', ]
+
+    def filter_name(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+    def filter_category(self, queryset, name, value):
+        ids = lookups.resolve_many(Category, _slugs(value)).values()
+        if not ids:
+            return queryset.none()
+        return queryset.filter(category_id__in=ids)
+
+    def filter_genre(self, queryset, name, value):
+        slugs = _slugs(value)
+        ids = lookups.resolve_many(Genre, slugs)
+        if self.form.cleaned_data.get('genre_match') == MATCH_ALL:
+            if len(ids) < len(set(slugs)):
+                return queryset.none()
+            for pk in ids.values():
+                queryset = queryset.filter(has_genre([pk]))
+            return queryset
+        if not ids:
+            return queryset.none()
+        return queryset.filter(has_genre(list(ids.values())))
+
+    def filter_genre_match(self, queryset, name, value):
+        # Учитывается в filter_genre().
+        return queryset
@@ -0,0 +1,91 @@
+"""
+Таблицы slug → id категорий и жанров в памяти процесса.
+
+Категорий и жанров мало, и меняются они редко, поэтому сериализаторы,
+фильтры и массовое создание произведений разрешают известные slug по
+таблице в памяти, без запросов к базе. Таблица перечитывается одним
+запросом, когда меняется версия данных модели в кэше (api.cache): версию
+увеличивают сигналы при изменении категорий и жанров в любом воркере.
+Поэтому таблицы используются только с общим для воркеров кэшем
+(CACHE_SHARED): с кэшем процесса воркер не узнал бы о переименовании или
+удалении в другом воркере и сослался бы на несуществующий объект, и каждый
+slug ищется запросом к базе.
+
+Slug, которого нет в таблице, тоже проверяется запросом: таблица могла
+быть загружена до фиксации транзакции, создавшей объект, а `bulk_create`
+и загрузка CSV не отправляют сигналов. Так что неизвестный slug стоит
+одного запроса.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+
+from content.models import Category, Genre
+from .cache import get_versions
+
+LOOKUP_MODELS = (Category, Genre)
+
+_tables = {}
+
+
+def slug_ids(model):
+    """
+    Таблица slug → id модели для текущей версии её данных.
+    """
+    [version] = get_versions([model])
+    table = _tables.get(model)
+    if table is None or table[0] != version:
+        table = (version, dict(
+            model.objects.using(DEFAULT_DB_ALIAS).values_list('slug', 'id')
+        ))
+        _tables[model] = table
+    return table[1]
+
+
+def resolve_many(model, slugs):
+    """
+    {slug: id} для существующих объектов из `slugs`.
+    """
+    if not settings.CACHE_SHARED:
+        return dict(model.objects.filter(
+            slug__in=set(slugs)
+        ).values_list('slug', 'id'))
+    ids = slug_ids(model)
+    found = {slug: ids[slug] for slug in slugs if slug in ids}
+    missing = set(slugs) - set(found)
+    if missing:
+        found.update(model.objects.filter(
+            slug__in=missing
+        ).values_list('slug', 'id'))
+    return found
+
+
+def resolve(model, slug):
+    """
+    id объекта по slug или None, если его нет.
+    """
+    return resolve_many(model, [slug]).get(slug)
+
+
+def reference(model, pk, slug):
+    """
+    Объект модели только с id и slug: достаточно, чтобы сослаться на
+    него из внешнего ключа или связи многие-ко-многим.
+    """
+    instance = model(pk=pk, slug=slug)
+    instance._state.adding = False
+    return instance
+
+
+def warm():
+    """
+    Загружает таблицы при запуске сервера. База может быть ещё не
+    готова (миграции не применены): тогда таблицы загрузятся при первом
+    обращении.
+    """
+    if not settings.CACHE_SHARED:
+        return
+    try:
+        for model in LOOKUP_MODELS:
+            slug_ids(model)
+    except DatabaseError:
+        _tables.clear()
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.cache import get_cache_stats
+
+
+class Command(BaseCommand):
+    """
+    Вывод счётчиков попаданий и промахов кэша ответов API.
+    """
+    help = 'Статистика кэша ответов API.'
+
+    def handle(self, *args, **options):
+        stats = get_cache_stats(settings.API_CACHE_TIMEOUTS)
+        for resource, counters in stats.items():
+            total = counters['hits'] + counters['misses']
+            ratio = counters['hits'] / total if total else 0
+            self.stdout.write(
+                f'{resource}: попаданий {counters["hits"]}, '
+                f'промахов {counters["misses"]} ({ratio:.1%})'
+            )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from api.slow_queries import ranking
+
+
+class Command(BaseCommand):
+    """
+    Самые затратные формы медленных SQL-запросов по суммарному времени.
+    """
+    help = 'Рейтинг медленных SQL-запросов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--plans', action='store_true',
+                            help='Показать планы выполнения.')
+
+    def handle(self, *args, **options):
+        for position, entry in enumerate(ranking(options['limit']), 1):
+            self.stdout.write(
+                f'{position}. всего {entry["total"] * 1000:.0f} мс, '
+                f'запросов {entry["count"]}, '
+                f'максимум {entry["max"] * 1000:.0f} мс, '
+                f'маршруты: {", ".join(entry["routes"])}'
+            )
+            self.stdout.write(f'   {entry["fingerprint"]}')
+            if options['plans'] and entry['plan']:
+                self.stdout.write(f'   {entry["plan"]}')
@@ -0,0 +1,339 @@
+"""
+Метрики обработки запросов по маршрутам API: количество запросов,
+гистограмма времени ответа, количество и время SQL-запросов.
+
+Каждый процесс накапливает метрики в памяти и, если задан
+`METRICS_DIR`, периодически сохраняет их в собственный файл этого
+каталога. Представление `metrics_view` суммирует файлы всех процессов
+(воркеров gunicorn) и отдаёт результат в текстовом формате Prometheus.
+Файлы завершившихся воркеров (max_requests) переносятся в общий архив
+каталога, чтобы счётчики не уменьшались, а файлы не копились.
+"""
+import fcntl
+import glob
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+ARCHIVE_FILE = 'archive.json'
+LOCK_FILE = '.lock'
+
+_lock = threading.Lock()
+_registry = {}
+_last_flush = 0.0
+_internal = threading.local()
+
+
+def process_file_name():
+    """
+    Имя файла процесса: хост, pid и случайный суффикс. По хосту и pid
+    определяется, что процесс завершился.
+    """
+    return f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.json'
+
+
+_process_file = process_file_name()
+
+
+def _after_fork():
+    """
+    Воркер, порождённый мастером gunicorn с `preload_app`, получает
+    собственный файл и пустые метрики.
+    """
+    global _process_file, _lock, _last_flush
+    _process_file = process_file_name()
+    _lock = threading.Lock()
+    _last_flush = 0.0
+    _registry.clear()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def _owner(path):
+    """
+    pid процесса этого хоста, записавшего файл, или None.
+    """
+    parts = os.path.basename(path)[:-len('.json')].rsplit('-', 2)
+    if len(parts) != 3 or parts[0] != socket.gethostname():
+        return None
+    try:
+        return int(parts[1])
+    except ValueError:
+        return None
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read(path):
+    try:
+        with open(path) as registry_file:
+            return json.load(registry_file)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def _locked(directory, exclusive):
+    """
+    Блокировка каталога: архив изменяется под исключительной
+    блокировкой, файлы читаются под разделяемой.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_FILE), 'a') as lock_file:
+        fcntl.flock(lock_file,
+                    fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def retire(directory, merge, pids=None):
+    """
+    Переносит файлы процессов `pids` (по умолчанию — всех завершившихся
+    процессов этого хоста) в архив каталога функцией `merge(total,
+    registry)` и удаляет их.
+    """
+    with _locked(directory, exclusive=True):
+        paths = []
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            pid = _owner(path)
+            if pid is not None and (pid in pids if pids is not None
+                                    else not _is_alive(pid)):
+                paths.append(path)
+        if not paths:
+            return
+        archive_path = os.path.join(directory, ARCHIVE_FILE)
+        archive = _read(archive_path) or {}
+        for path in paths:
+            registry = _read(path)
+            if registry:
+                merge(archive, registry)
+        with open(f'{archive_path}.tmp', 'w') as archive_file:
+            json.dump(archive, archive_file)
+        os.replace(f'{archive_path}.tmp', archive_path)
+        for path in paths:
+            os.remove(path)
+
+
+def load_registries(directory, merge):
+    """
+    Сводки всех процессов из каталога вместе с архивом. Файлы
+    завершившихся процессов предварительно переносятся в архив.
+    """
+    retire(directory, merge)
+    with _locked(directory, exclusive=False):
+        registries = [_read(path) for path in
+                      glob.glob(os.path.join(directory, '*.json'))]
+    return [registry for registry in registries if registry is not None]
+
+
+def _empty():
+    return {'count': 0, 'latency_sum': 0.0,
+            'buckets': [0] * (len(BUCKETS) + 1),
+            'queries': 0, 'db_time': 0.0}
+
+
+def observe(route, latency, queries, db_time):
+    """
+    Учитывает один обработанный запрос.
+    """
+    with _lock:
+        metric = _registry.get(route)
+        if metric is None:
+            metric = _registry[route] = _empty()
+        metric['count'] += 1
+        metric['latency_sum'] += latency
+        metric['buckets'][bisect_left(BUCKETS, latency)] += 1
+        metric['queries'] += queries
+        metric['db_time'] += db_time
+
+
+def flush(force=False):
+    """
+    Сохраняет метрики процесса в `METRICS_DIR` не чаще, чем раз в
+    `METRICS_FLUSH_INTERVAL` секунд.
+    """
+    global _last_flush
+    directory = settings.METRICS_DIR
+    now = time.monotonic()
+    if not directory or (
+            not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL):
+        return
+    _last_flush = now
+    with _lock:
+        data = json.dumps(_registry)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, _process_file)
+    with open(f'{path}.tmp', 'w') as metrics_file:
+        metrics_file.write(data)
+    os.replace(f'{path}.tmp', path)
+
+
+def collect():
+    """
+    Метрики всех процессов: содержимое файлов `METRICS_DIR` либо, если
+    каталог не задан, метрики текущего процесса.
+    """
+    if not settings.METRICS_DIR:
+        with _lock:
+            return json.loads(json.dumps(_registry))
+
+    flush(force=True)
+    merged = {}
+    for registry in load_registries(settings.METRICS_DIR, merge):
+        merge(merged, registry)
+    return merged
+
+
+def merge(merged, registry):
+    """
+    Прибавляет метрики `registry` к `merged`.
+    """
+    for route, metric in registry.items():
+        total = merged.setdefault(route, _empty())
+        for key in ('count', 'latency_sum', 'queries', 'db_time'):
+            total[key] += metric[key]
+        total['buckets'] = [a + b for a, b in zip(total['buckets'],
+                                                  metric['buckets'])]
+
+
+def render(registry):
+    """
+    Текстовый формат Prometheus.
+    """
+    lines = [
+        '# HELP api_requests_total Количество запросов.',
+        '# TYPE api_requests_total counter',
+    ]
+    routes = sorted(registry)
+    for route in routes:
+        lines.append(f'api_requests_total{{route="{route}"}} '
+                     f'{registry[route]["count"]}')
+
+    lines += [
+        '# HELP api_request_duration_seconds Время обработки запроса.',
+        '# TYPE api_request_duration_seconds histogram',
+    ]
+    for route in routes:
+        metric = registry[route]
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), metric['buckets']):
+            cumulative += count
+            lines.append(f'api_request_duration_seconds_bucket'
+                         f'{{route="{route}",le="{bound}"}} {cumulative}')
+        lines.append(f'api_request_duration_seconds_sum{{route="{route}"}} '
+                     f'{metric["latency_sum"]:.6f}')
+        lines.append(f'api_request_duration_seconds_count'
+                     f'{{route="{route}"}} {metric["count"]}')
+
+    lines += [
+        '# HELP api_db_queries_total Количество SQL-запросов.',
+        '# TYPE api_db_queries_total counter',
+    ]
+    for route in routes:
+        lines.append(f'api_db_queries_total{{route="{route}"}} '
+                     f'{registry[route]["queries"]}')
+
+    lines += [
+        '# HELP api_db_duration_seconds_total Время SQL-запросов.',
+        '# TYPE api_db_duration_seconds_total counter',
+    ]
+    for route in routes:
+        lines.append(f'api_db_duration_seconds_total{{route="{route}"}} '
+                     f'{registry[route]["db_time"]:.6f}')
+    return '\n'.join(lines) + '\n'
+
+
+@contextmanager
+def internal_queries():
+    """
+    SQL-запросы внутри блока служебные (например, EXPLAIN журнала
+    медленных запросов): они не учитываются ни в метриках, ни в
+    профилях, ни в журнале медленных запросов.
+    """
+    _internal.active = True
+    try:
+        yield
+    finally:
+        _internal.active = False
+
+
+def is_internal():
+    return getattr(_internal, 'active', False)
+
+
+class QueryCounter:
+    """
+    Обёртка `connection.execute_wrapper`, считающая SQL-запросы и их
+    суммарное время.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        if is_internal():
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """
+    Собирает метрики каждого запроса по имени маршрута (`titles-list`,
+    `comments-detail`). Запросы, не сопоставленные ни одному маршруту,
+    учитываются под именем `unresolved`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        latency = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.url_name if match and match.url_name else 'unresolved'
+        if route != 'metrics':
+            observe(route, latency, counter.count, counter.duration)
+            flush()
+        return response
+
+
+def metrics_view(request):
+    """
+    Метрики в формате Prometheus. Доступны только с адресов из
+    `METRICS_ALLOWED_IPS`.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
@@ -0,0 +1,172 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework import pagination
+
+CURSOR_QUERY_PARAM = 'pagination'
+CURSOR_QUERY_VALUE = 'cursor'
+
+
+def ordering_fields(paginator):
+    """
+    Поля модели, по которым пагинатор сортирует выборку: они нужны в
+    выборке, даже если не выводятся в ответе.
+    """
+    ordering = getattr(paginator, 'ordering', None) or ()
+    if isinstance(ordering, str):
+        ordering = (ordering, )
+    return [field.lstrip('-') for field in ordering]
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator, который не выполняет `COUNT(*)` на каждой странице:
+    количество объектов берётся из кэша, а для нефильтрованной таблицы
+    на PostgreSQL может оцениваться по статистике планировщика.
+    """
+    cache_prefix = 'api:count'
+    count_key = None
+
+    @cached_property
+    def count(self):
+        try:
+            sql, params = self.object_list.query.sql_with_params()
+        except Exception:
+            return super().count
+        key = hashlib.md5(f'{sql}{params}'.encode()).hexdigest()
+        self.count_key = f'{self.cache_prefix}:{key}'
+
+        count = cache.get(self.count_key)
+        if count is None:
+            count = self._estimate_count()
+            if count is None:
+                count = super().count
+            cache.set(self.count_key, count, settings.API_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def validate_number(self, number):
+        """
+        Страница за пределами количества из кэша (или оценки) проверяется
+        ещё раз по точному `COUNT(*)`: она могла появиться после недавней
+        записи. Точное количество заменяет значение в кэше.
+        """
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.count_key is None:
+                raise
+        count = Paginator.count.func(self)
+        cache.set(self.count_key, count, settings.API_COUNT_CACHE_TIMEOUT)
+        self.count_key = None
+        self.__dict__['count'] = count
+        self.__dict__.pop('num_pages', None)
+        return super().validate_number(number)
+
+    def page(self, number):
+        """
+        Страница не обрезается по количеству: значение из кэша может
+        отставать от таблицы, и новые объекты не должны пропадать.
+        """
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self
+        )
+
+    def _estimate_count(self):
+        """
+        Оценка количества строк по `pg_class.reltuples` для запросов без
+        условий. Для маленьких таблиц оценка неточна, поэтому она
+        используется только начиная с `API_APPROXIMATE_COUNT_THRESHOLD`.
+        """
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if (not settings.API_APPROXIMATE_COUNT
+                or connection.vendor != 'postgresql'
+                or queryset.query.where):
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        if not row or row[0] < settings.API_APPROXIMATE_COUNT_THRESHOLD:
+            return None
+        return row[0]
+
+
+class CachedCountPageNumberPagination(pagination.PageNumberPagination):
+    """
+    Постраничная пагинация с кэшированным количеством объектов.
+    """
+    django_paginator_class = CachedCountPaginator
+
+
+class OptionalCursorPagination(pagination.BasePagination):
+    """
+    Пагинация, которая по умолчанию работает постранично, а по запросу
+    клиента (`?pagination=cursor` или наличие `?cursor=`) переключается
+    на курсорную: без `COUNT(*)` и `OFFSET`, по индексируемому полю.
+
+    В постраничном режиме выборка без явной сортировки (например, по
+    релевантности поиска) сортируется по `ordering`, как и в курсорном:
+    иначе страницы могли бы пересекаться или пропускать объекты.
+    """
+    ordering = ('-pub_date', '-id')
+    page_number_class = pagination.PageNumberPagination
+
+    def __init__(self):
+        cursor_class = type('CursorPagination',
+                            (pagination.CursorPagination,),
+                            {'ordering': self.ordering})
+        self.cursor_paginator = cursor_class()
+        self.page_paginator = self.page_number_class()
+        self.paginator = self.page_paginator
+
+    def use_cursor(self, request):
+        params = request.query_params
+        return (params.get(CURSOR_QUERY_PARAM) == CURSOR_QUERY_VALUE
+                or self.cursor_paginator.cursor_query_param in params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.paginator = self.cursor_paginator
+        else:
+            self.paginator = self.page_paginator
+            if not queryset.ordered:
+                queryset = queryset.order_by(*self.ordering)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_paginator.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+    def get_schema_fields(self, view):
+        return (self.page_paginator.get_schema_fields(view)
+                + self.cursor_paginator.get_schema_fields(view))
+
+    @property
+    def display_page_controls(self):
+        return self.paginator.display_page_controls
+
+
+class TitlePagination(OptionalCursorPagination):
+    """
+    Пагинация произведений: курсор по `id`, количество объектов для
+    постраничного режима берётся из кэша.
+    """
+    ordering = ('id',)
+    page_number_class = CachedCountPageNumberPagination
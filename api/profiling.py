@@ -0,0 +1,132 @@
+"""
+Профилирование отдельного запроса по требованию администратора.
+
+Запрос с заголовком `X-Profile: 1` (или параметром `?_profile=1`) от
+пользователя с правами администратора выполняется под cProfile с
+записью всех SQL-запросов. В каталог `PROFILE_DIR` сохраняются файл
+`<id>.pstats` и сводка `<id>.json` (самые затратные функции и SQL с
+временем выполнения), а идентификатор возвращается в заголовке
+`X-Profile-Id`. Остальные запросы проверяют только наличие заголовка.
+"""
+import cProfile
+import json
+import os
+import pstats
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .authentication import CachedJWTAuthentication
+from .metrics import is_internal
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+TOP_FUNCTIONS = 30
+
+
+class SqlRecorder:
+    """
+    Обёртка `connection.execute_wrapper`, записывающая SQL и время.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if is_internal():
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'db': self.alias,
+                'sql': sql,
+                'params': repr(params),
+                'many': many,
+                'duration': time.perf_counter() - started,
+            })
+
+
+def _is_admin(request):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            authenticated = CachedJWTAuthentication().authenticate(request)
+        except Exception:
+            return False
+        user = authenticated[0] if authenticated else None
+    return bool(user and user.is_authenticated and user.is_admin)
+
+
+def _top_functions(profiler):
+    stats = pstats.Stats(profiler)
+    functions = []
+    for func, (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        filename, line, name = func
+        functions.append({'function': f'{filename}:{line}({name})',
+                          'calls': ncalls, 'tottime': tottime,
+                          'cumtime': cumtime})
+    functions.sort(key=lambda item: item['cumtime'], reverse=True)
+    return functions[:TOP_FUNCTIONS]
+
+
+class ProfilingMiddleware:
+    """
+    Включает профилирование для запроса, помеченного заголовком или
+    параметром, если его отправил администратор.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (PROFILE_HEADER not in request.META
+                and PROFILE_PARAM not in request.GET):
+            return self.get_response(request)
+        if not _is_admin(request):
+            return self.get_response(request)
+        return self.profile(request)
+
+    def profile(self, request):
+        profile_id = uuid.uuid4().hex
+        recorders = [SqlRecorder(connection.alias)
+                     for connection in connections.all()]
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection, recorder in zip(connections.all(), recorders):
+                stack.enter_context(connection.execute_wrapper(recorder))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - started
+
+        directory = settings.PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(directory, f'{profile_id}.pstats'))
+        queries = [query for recorder in recorders
+                   for query in recorder.queries]
+        summary = {
+            'id': profile_id,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'duration': duration,
+            'sql_count': len(queries),
+            'sql_duration': sum(query['duration'] for query in queries),
+            'sql': queries,
+            'functions': _top_functions(profiler),
+        }
+        with open(os.path.join(directory, f'{profile_id}.json'),
+                  'w') as summary_file:
+            json.dump(summary, summary_file, ensure_ascii=False, indent=2)
+
+        response['X-Profile-Id'] = profile_id
+        return response
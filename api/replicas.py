@@ -0,0 +1,162 @@
+"""
+Чтение из реплик базы данных.
+
+`ReplicaMiddleware` направляет безопасные запросы (GET, HEAD, OPTIONS) к
+вьюсетам `api` на одну из реплик `DATABASE_REPLICAS`, а `ReplicaRouter`
+отправляет чтение в выбранную для запроса реплику. Запись, а также любые
+запросы вне HTTP (сигналы, команды, воркеры) всегда идут в `default`.
+
+После изменяющего запроса клиент (по заголовку Authorization либо по
+адресу) в течение `REPLICA_STICKY_SECONDS` читает из основной базы и
+видит собственные изменения, даже если реплика отстаёт. Отметка хранится
+в кэше, поэтому без общего для воркеров кэша (`CACHE_SHARED`) чтение из
+реплик не включается.
+
+Данные, которые переживают запрос (кэш ответов, таблицы `api.lookups`),
+всегда читаются из основной базы: иначе отстающая реплика записала бы
+устаревшие данные под новой версией.
+
+Реплика, к которой не удалось подключиться, исключается на
+`REPLICA_RETRY_INTERVAL` секунд, а запрос обслуживается другой репликой
+или основной базой.
+"""
+import hashlib
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.viewsets import ViewSetMixin
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = Local()
+_unavailable = {}
+
+
+def get_read_alias():
+    """
+    Реплика, выбранная для текущего запроса, или None.
+    """
+    return getattr(_state, 'alias', None)
+
+
+def set_read_alias(alias):
+    _state.alias = alias
+
+
+@contextmanager
+def primary():
+    """
+    Чтение внутри блока идёт из основной базы.
+    """
+    alias = get_read_alias()
+    set_read_alias(None)
+    try:
+        yield
+    finally:
+        set_read_alias(alias)
+
+
+def client_key(request):
+    """
+    Ключ отметки клиента: токен, а для анонимных клиентов — адрес. За
+    nginx REMOTE_ADDR — адрес прокси, поэтому адрес берётся из заголовка
+    X-Real-IP, который nginx перезаписывает.
+    """
+    client = (request.META.get('HTTP_AUTHORIZATION')
+              or request.META.get('HTTP_X_REAL_IP')
+              or request.META.get('REMOTE_ADDR', ''))
+    return 'replica:primary:' + hashlib.md5(client.encode()).hexdigest()
+
+
+def is_pinned(request):
+    return bool(settings.REPLICA_STICKY_SECONDS) and bool(
+        cache.get(client_key(request))
+    )
+
+
+def pin(request):
+    """
+    Закрепляет чтение клиента за основной базой.
+    """
+    if settings.REPLICA_STICKY_SECONDS:
+        cache.set(client_key(request), True,
+                  settings.REPLICA_STICKY_SECONDS)
+
+
+def choose_replica():
+    """
+    Доступная реплика или None, если все реплики недоступны.
+    """
+    now = time.monotonic()
+    aliases = [alias for alias in settings.DATABASE_REPLICAS
+               if _unavailable.get(alias, 0) <= now]
+    random.shuffle(aliases)
+    for alias in aliases:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            _unavailable[alias] = now + settings.REPLICA_RETRY_INTERVAL
+            continue
+        _unavailable.pop(alias, None)
+        return alias
+    return None
+
+
+class ReplicaRouter:
+    """
+    Чтение — из реплики текущего запроса, запись — в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        return get_read_alias() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """
+        Схему реплик меняет репликация основной базы, а не `migrate`.
+        """
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Выбирает базу для чтения перед вызовом представления.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            set_read_alias(None)
+        if request.method not in SAFE_METHODS:
+            pin(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if (not settings.DATABASE_REPLICAS
+                or (settings.REPLICA_STICKY_SECONDS
+                    and not settings.CACHE_SHARED)
+                or request.method not in SAFE_METHODS
+                or view_class is None
+                or not issubclass(view_class, ViewSetMixin)
+                or not view_class.__module__.startswith('api.')
+                or is_pinned(request)):
+            return None
+        set_read_alias(choose_replica())
+        return None
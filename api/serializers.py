@@ -1,9 +1,12 @@
-from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueValidator
 
-from content.models import Category, Comment, Genre, Review, Title
+from content.models import (Category, Comment, Genre, LeaderboardEntry,
+                            Review, Title, TitleStats)
 from users.models import User
+from . import lookups
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -28,23 +31,68 @@ class GenreSerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
+class LookupSlugRelatedField(serializers.SlugRelatedField):
+    """
+    Ссылка на категорию или жанр по slug: известный slug разрешается по
+    таблице в памяти процесса (api.lookups) без запроса к базе.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('slug_field', 'slug')
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, (str, int)):
+            self.fail('invalid')
+        slug = str(data)
+        model = self.get_queryset().model
+        pk = lookups.resolve(model, slug)
+        if pk is None:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=slug)
+        return lookups.reference(model, pk, slug)
+
+
 class TitleCreateSerializer(serializers.ModelSerializer):
     """
     Сериализатор создания произведений
     """
-    category = serializers.SlugRelatedField(
-        slug_field='slug',
-        queryset=Category.objects.all())
-    genre = serializers.SlugRelatedField(
-        slug_field='slug',
-        many=True,
-        queryset=Genre.objects.all())
+    category = LookupSlugRelatedField(queryset=Category.objects.all())
+    genre = LookupSlugRelatedField(many=True, queryset=Genre.objects.all())
 
     class Meta:
         fields = ('id', 'name', 'year', 'description', 'genre', 'category')
         model = Title
 
 
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """
+    Элемент массового создания произведений: slug жанров и категории
+    проверяются одним запросом на всю пачку (`api.bulk`).
+    """
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField())
+
+    class Meta:
+        fields = ('name', 'year', 'description', 'genre', 'category')
+        model = Title
+
+
+class TitleStatsSerializer(serializers.ModelSerializer):
+    """
+    Распределение оценок произведения (оценка — количество отзывов),
+    количество отзывов и дата последнего отзыва.
+    """
+    scores = serializers.SerializerMethodField()
+
+    class Meta:
+        fields = ('scores', 'review_count', 'last_review_at')
+        model = TitleStats
+
+    def get_scores(self, obj):
+        return {str(score): count for score, count in obj.scores.items()}
+
+
 class TitleListSerializer(serializers.ModelSerializer):
     """
     Сериализатор вывода списка произведений. Жанр и категорий используют
@@ -53,12 +101,26 @@ class TitleListSerializer(serializers.ModelSerializer):
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
     rating = serializers.FloatField(read_only=True)
+    stats = TitleStatsSerializer(read_only=True)
 
     class Meta:
-        fields = "__all__"
+        exclude = ('score_sum', 'score_count', 'revision', 'updated_at')
         model = Title
 
 
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """
+    Место произведения в рейтинге лучших категории или жанра.
+    """
+    id = serializers.IntegerField(source='title_id')
+    name = serializers.CharField(source='title.name')
+    year = serializers.IntegerField(source='title.year')
+
+    class Meta:
+        fields = ('rank', 'id', 'name', 'year', 'rating', 'review_count')
+        model = LeaderboardEntry
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     """
     Сериализатор отзывов на произведения.
@@ -69,21 +131,28 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
 
-    def validate(self, data):
+    def create(self, validated_data):
         """
-        Проверка, что отзыв ещё не оставлялся.
+        Повторный отзыв отклоняет уникальное ограничение базы данных:
+        ошибка целостности превращается в ошибку валидации, если отзыв
+        автора на произведение действительно уже есть. Остальные ошибки
+        целостности (в том числе из обработчиков сигналов) не скрываются.
         """
-        request = self.context.get('request')
-        if request.method == 'POST':
-            if Review.objects.filter(
-                    title=self.context.get('view').kwargs.get('title_id'),
-                    author=request.user,
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                    title=validated_data.get('title_id',
+                                             validated_data.get('title')),
+                    author=validated_data.get('author')
             ).exists():
-                raise ValidationError(
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
                     'Вы уже оставили отзыв на это произведение.'
-                )
-
-        return data
+                ]
+            })
 
 
 class CommentSerializer(serializers.ModelSerializer):
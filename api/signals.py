@@ -0,0 +1,92 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.db import connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from content.models import Category, Genre, Review, Title
+from users.models import User
+from .authentication import user_cache_key
+from .cache import bump_version
+from .lookups import LOOKUP_MODELS
+
+CACHED_MODELS = (Category, Genre, Review, Title)
+
+
+def invalidate_cached_responses(sender, **kwargs):
+    """
+    Сбрасывает закэшированные ответы API при изменении каталога. После
+    фиксации транзакции версия увеличивается ещё раз: ответ, собранный
+    другим запросом до фиксации, иначе остался бы в кэше (и в ETag
+    списка) с новой версией.
+    """
+    bump_version(sender)
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+def invalidate_lookups(sender, **kwargs):
+    """
+    Ещё раз увеличивает версию категорий и жанров после фиксации
+    транзакции: иначе таблица slug → id (api.lookups), перечитанная
+    другим воркером до фиксации, осталась бы устаревшей.
+    """
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Удаляет пользователя из кэша аутентификации при изменении роли,
+    статуса или любых других данных. После фиксации транзакции запись
+    удаляется ещё раз: её мог заново закэшировать запрос, прочитавший
+    пользователя до фиксации.
+    """
+    key = user_cache_key(instance.pk)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def invalidate_title_genres(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_version(Title)
+
+
+def check_connections(**kwargs):
+    """
+    Закрывает постоянные соединения с базой, которые перестали работать
+    (перезапуск сервера, разрыв по таймауту), до начала обработки запроса,
+    чтобы он открыл новое соединение вместо ошибки.
+
+    Проверка (`SELECT 1`) выполняется не чаще раза в
+    `DB_CONN_HEALTH_CHECK_INTERVAL` секунд на соединение. Соединение,
+    сломавшееся между проверками, Django закрывает после первой ошибки
+    запроса (`close_if_unusable_or_obsolete`).
+    """
+    if not settings.DB_CONN_HEALTH_CHECKS:
+        return
+    now = time.monotonic()
+    for connection in connections.all():
+        if (connection.connection is None
+                or connection.settings_dict['CONN_MAX_AGE'] == 0
+                or connection.in_atomic_block):
+            continue
+        checked = getattr(connection, 'health_checked', None)
+        if (checked is not None
+                and now - checked < settings.DB_CONN_HEALTH_CHECK_INTERVAL):
+            continue
+        connection.health_checked = now
+        if not connection.is_usable():
+            connection.close()
+
+
+for model in CACHED_MODELS:
+    post_save.connect(invalidate_cached_responses, sender=model)
+    post_delete.connect(invalidate_cached_responses, sender=model)
+for model in LOOKUP_MODELS:
+    post_save.connect(invalidate_lookups, sender=model)
+    post_delete.connect(invalidate_lookups, sender=model)
+m2m_changed.connect(invalidate_title_genres, sender=Title.genre.through)
+post_save.connect(invalidate_cached_user, sender=User)
+post_delete.connect(invalidate_cached_user, sender=User)
+request_started.connect(check_connections)
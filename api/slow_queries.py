@@ -0,0 +1,230 @@
+"""
+Журнал медленных SQL-запросов.
+
+Запросы дольше `SLOW_QUERY_THRESHOLD` миллисекунд группируются по
+«отпечатку» — тексту запроса, из которого убраны значения параметров.
+Для каждого отпечатка хранятся количество, суммарное и максимальное
+время, маршруты, из которых выполнялся запрос, параметры самого
+медленного выполнения и план запроса (`EXPLAIN QUERY PLAN` на SQLite,
+`EXPLAIN` или `EXPLAIN ANALYZE` на PostgreSQL). План запрашивается и
+сообщение пишется в журнал только для нового отпечатка или нового
+максимума, поэтому журнал не засоряется повторами.
+
+Сводка процесса сохраняется в `SLOW_QUERY_DIR`, команда
+`manage.py slow_queries` выводит худшие отпечатки всех процессов.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .metrics import (internal_queries, is_internal, load_registries,
+                      process_file_name)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_registry = {}
+_last_flush = 0.0
+_process_file = process_file_name()
+
+
+def _after_fork():
+    """
+    Журнал дочернего процесса начинается с нуля и пишется в свой файл.
+    """
+    global _process_file, _lock, _last_flush
+    _process_file = process_file_name()
+    _lock = threading.Lock()
+    _last_flush = 0.0
+    _registry.clear()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def fingerprint(sql):
+    """
+    Текст запроса без значений: числа, строки и списки `IN (...)`
+    заменяются заполнителями.
+    """
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def explain(connection, sql, params):
+    """
+    План выполнения запроса или None, если его нельзя получить.
+    """
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    elif connection.vendor == 'postgresql':
+        prefix = ('EXPLAIN (ANALYZE, BUFFERS) '
+                  if settings.SLOW_QUERY_EXPLAIN_ANALYZE else 'EXPLAIN ')
+    else:
+        return None
+
+    # Ошибка EXPLAIN в точке сохранения не прерывает транзакцию запроса.
+    try:
+        with internal_queries(), transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                rows = cursor.fetchall()
+    except Exception as error:
+        return f'EXPLAIN недоступен: {error}'
+    return '\n'.join(' '.join(str(value) for value in row) for row in rows)
+
+
+def record(connection, sql, params, duration, route):
+    """
+    Учитывает медленный запрос.
+    """
+    shape = fingerprint(sql)
+    key = hashlib.md5(shape.encode()).hexdigest()
+    with _lock:
+        entry = _registry.get(key)
+        is_new = entry is None
+        if is_new:
+            entry = _registry[key] = {
+                'fingerprint': shape, 'count': 0, 'total': 0.0,
+                'max': 0.0, 'routes': [], 'params': None, 'plan': None,
+            }
+        entry['count'] += 1
+        entry['total'] += duration
+        if route not in entry['routes']:
+            entry['routes'].append(route)
+        is_worst = duration > entry['max']
+        if is_worst:
+            entry['max'] = duration
+            entry['params'] = repr(params)
+
+    if not (is_new or is_worst):
+        return
+    # EXPLAIN выполняется без блокировки; пока он идёт, более медленный
+    # запрос того же вида из другого потока может заменить параметры, и
+    # тогда план этого запроса к ним уже не относится.
+    plan = explain(connection, sql, params)
+    with _lock:
+        if entry['max'] == duration:
+            entry['plan'] = plan
+    logger.warning(
+        'Медленный запрос %.1f мс (%s): %s\nПараметры: %r\nПлан:\n%s',
+        duration * 1000, route, sql, params, plan
+    )
+
+
+def flush(force=False):
+    global _last_flush
+    directory = settings.SLOW_QUERY_DIR
+    now = time.monotonic()
+    if not directory or (
+            not force and now - _last_flush < settings.METRICS_FLUSH_INTERVAL):
+        return
+    _last_flush = now
+    with _lock:
+        data = json.dumps(_registry)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, _process_file)
+    with open(f'{path}.tmp', 'w') as registry_file:
+        registry_file.write(data)
+    os.replace(f'{path}.tmp', path)
+
+
+def ranking(limit=None):
+    """
+    Отпечатки медленных запросов всех процессов, упорядоченные по
+    суммарному времени.
+    """
+    merged = {}
+    if settings.SLOW_QUERY_DIR:
+        flush(force=True)
+        registries = load_registries(settings.SLOW_QUERY_DIR, merge)
+    else:
+        with _lock:
+            registries = [json.loads(json.dumps(_registry))]
+
+    for registry in registries:
+        merge(merged, registry)
+    result = sorted(merged.values(), key=lambda item: item['total'],
+                    reverse=True)
+    return result[:limit] if limit else result
+
+
+def merge(merged, registry):
+    """
+    Добавляет отпечатки `registry` к `merged`.
+    """
+    for key, entry in registry.items():
+        total = merged.get(key)
+        if total is None:
+            merged[key] = entry
+            continue
+        total['count'] += entry['count']
+        total['total'] += entry['total']
+        total['routes'] = sorted(set(total['routes'] + entry['routes']))
+        if entry['max'] > total['max']:
+            total.update(max=entry['max'], params=entry['params'],
+                         plan=entry['plan'])
+
+
+class SlowQueryLogger:
+    """
+    Обёртка `connection.execute_wrapper`, замеряющая время запросов.
+    """
+
+    def __init__(self, connection, request):
+        self.connection = connection
+        self.request = request
+        self.threshold = settings.SLOW_QUERY_THRESHOLD / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        if is_internal():
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - started
+        if duration >= self.threshold and not many:
+            match = getattr(self.request, 'resolver_match', None)
+            route = match.url_name if match else 'unresolved'
+            record(self.connection, sql, params, duration, route)
+        return result
+
+
+class SlowQueryMiddleware:
+    """
+    Подключает журнал медленных запросов ко всем соединениям на время
+    обработки запроса. Отключается настройкой `SLOW_QUERY_THRESHOLD = 0`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SLOW_QUERY_THRESHOLD:
+            return self.get_response(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(
+                    SlowQueryLogger(connection, request)
+                ))
+            response = self.get_response(request)
+        flush()
+        return response
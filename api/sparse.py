@@ -0,0 +1,151 @@
+"""
+Выборочные поля ответа: `?fields=id,name,rating` оставляет только
+перечисленные поля сериализатора, `?omit=description` исключает
+указанные.
+
+Набор полей сужает и запрос к базе: столбцы, которые не нужны
+оставшимся полям, откладываются (`.only()`), а связи, поля которых не
+выводятся, не загружаются (`select_related`, `prefetch_related`).
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+from .pagination import ordering_fields
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+SPARSE_ACTIONS = ('list', 'retrieve')
+
+
+def _names(value):
+    return [name for name in (part.strip() for part in value.split(','))
+            if name]
+
+
+def _related_paths(tree, prefix=''):
+    for name, subtree in tree.items():
+        path = f'{prefix}{name}'
+        nested = list(_related_paths(subtree, f'{path}__'))
+        yield from nested or [path]
+
+
+def _model_fields(opts, fields, sources):
+    """
+    Поля модели и связи, нужные полям сериализатора: (столбцы для
+    `.only()` или None, связи для `select_related`, для
+    `prefetch_related`).
+    """
+    only, select, prefetch = {opts.pk.name}, set(), set()
+    complete = True
+    for name, field in fields.items():
+        if name in sources:
+            only.update(sources[name])
+            continue
+        head = field.source.split('.')[0]
+        try:
+            model_field = opts.get_field(head)
+        except FieldDoesNotExist:
+            complete = False
+            continue
+        if model_field.many_to_many or model_field.one_to_many:
+            prefetch.add(head)
+        elif model_field.is_relation:
+            select.add(head)
+            if model_field.concrete:
+                only.add(head)
+        else:
+            only.add(head)
+    return (only if complete else None), select, prefetch
+
+
+def narrow_queryset(queryset, fields, sources=None, required=()):
+    """
+    Сужает выборку до данных, нужных полям сериализатора `fields`
+    ({имя: поле}). `sources` задаёт поля модели для полей, которые
+    вычисляются свойствами модели; `required` — поля модели, нужные
+    всегда (например, для сортировки). Если поле сериализатора нельзя
+    сопоставить с полями модели, столбцы не откладываются.
+    """
+    only, select, prefetch = _model_fields(queryset.model._meta, fields,
+                                           sources or {})
+    if isinstance(queryset.query.select_related, dict):
+        paths = [path for path in
+                 _related_paths(queryset.query.select_related)
+                 if path.split('__')[0] in select]
+        # select_related() без аргументов загрузила бы все связи.
+        queryset = queryset.select_related(None)
+        if paths:
+            queryset = queryset.select_related(*paths)
+    lookups = queryset._prefetch_related_lookups
+    if lookups:
+        queryset = queryset.prefetch_related(None).prefetch_related(*(
+            lookup for lookup in lookups
+            if getattr(lookup, 'prefetch_through', lookup).split('__')[0]
+            in prefetch
+        ))
+    if only is not None:
+        queryset = queryset.only(*only, *required)
+    return queryset
+
+
+class SparseFieldsMixin:
+    """
+    Выборочные поля (`?fields=`, `?omit=`) для `list()` и `retrieve()`
+    вьюсета. `sparse_sources` — поля модели для полей сериализатора,
+    которые вычисляются свойствами модели (например, рейтинг по
+    счётчикам).
+    """
+    sparse_sources = {}
+
+    def get_sparse_fields(self):
+        """
+        Имена полей сериализатора для ответа или None, если выводятся
+        все. Неизвестные имена — ошибка 400.
+        """
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = self.parse_sparse_fields()
+        return self._sparse_fields
+
+    def parse_sparse_fields(self):
+        if self.action not in SPARSE_ACTIONS:
+            return None
+        params = self.request.query_params
+        fields = _names(params.get(FIELDS_PARAM, ''))
+        omit = _names(params.get(OMIT_PARAM, ''))
+        if not fields and not omit:
+            return None
+
+        available = list(self.get_serializer_class()().fields)
+        errors = {}
+        for param, names in ((FIELDS_PARAM, fields), (OMIT_PARAM, omit)):
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                errors[param] = [f'Неизвестные поля: {", ".join(unknown)}.']
+        if errors:
+            raise ValidationError(errors)
+        return [name for name in available
+                if (not fields or name in fields) and name not in omit]
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        names = self.get_sparse_fields()
+        if names is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in list(target.fields):
+                if name not in names:
+                    target.fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        # Вьюсеты переопределяют get_queryset(), поэтому выборка
+        # сужается здесь: filter_queryset() вызывают и list(), и
+        # get_object().
+        queryset = super().filter_queryset(queryset)
+        names = self.get_sparse_fields()
+        if names is None:
+            return queryset
+        fields = self.get_serializer_class()().fields
+        return narrow_queryset(
+            queryset, {name: fields[name] for name in names},
+            self.sparse_sources, ordering_fields(self.paginator)
+        )
@@ -2,11 +2,13 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (CategoryViewSet, CommentViewSet, EmailAuthenticatedSet,
-                    GenreViewSet, ReviewViewSet, TitleViewSet, UsersViewSet)
+                    ExportViewSet, GenreViewSet, ReviewViewSet, TitleViewSet,
+                    UsersViewSet)
 
 router_v1 = DefaultRouter()
 router_v1.register('auth', EmailAuthenticatedSet, basename='auth_email')
 router_v1.register('users', UsersViewSet)
+router_v1.register('export', ExportViewSet, basename='export')
 router_v1.register('categories', CategoryViewSet)
 router_v1.register('genres', GenreViewSet)
 router_v1.register('titles', TitleViewSet)
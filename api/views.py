@@ -1,6 +1,7 @@
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db.models import Count, Max
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from rest_framework import filters, mixins, status, viewsets
 from rest_framework.decorators import action
@@ -9,18 +10,30 @@ from rest_framework.permissions import (IsAuthenticated,
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from api_yamdb import settings
-from content.models import Category, Genre, Review, Title
+from content.models import (Category, Genre, LeaderboardEntry, Review,
+                            Title, TitleStats)
 from users.models import User
+from users.outbox import enqueue_mail
+from . import lookups
+from .bulk import create_titles
+from .cache import CachedResponseMixin, get_versions
+from .conditional import ConditionalGetMixin
+from .export import stream
+from .fast import (CommentFastSerializer, FastListMixin, ReviewFastSerializer,
+                   TitleFastSerializer)
 from .filters import TitleFilter
+from .pagination import OptionalCursorPagination, TitlePagination
 from .permissions import (IsAdminModeratorOrAuthorOrReadOnly,
                           IsAdminOrReadOnly,
                           IsAdministrator)
 from .serializers import (CategorySerializer, CommentSerializer,
                           EmailCodeSerializer, EmailSerializer,
-                          GenreSerializer, ReviewSerializer,
+                          GenreSerializer, LeaderboardEntrySerializer,
+                          ReviewSerializer,
                           TitleCreateSerializer, TitleListSerializer,
-                          UsersSerializer, UsersSerializerRoleReadOnly)
+                          TitleStatsSerializer, UsersSerializer,
+                          UsersSerializerRoleReadOnly)
+from .sparse import SparseFieldsMixin
 
 
 class ListCreateDestroyViewSet(mixins.ListModelMixin,
@@ -33,11 +46,33 @@ class ListCreateDestroyViewSet(mixins.ListModelMixin,
     pass
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class LeaderboardMixin:
+    """
+    Рейтинг лучших произведений категории или жанра: `/{slug}/top/`.
+    Готовые места читаются одним запросом по индексу (content.leaderboards).
+    """
+    leaderboard_field = None
+
+    @action(detail=True, methods=['get'])
+    def top(self, request, slug=None):
+        pk = lookups.resolve(self.get_queryset().model, slug)
+        if pk is None:
+            raise Http404
+        entries = LeaderboardEntry.objects.filter(
+            **{f'{self.leaderboard_field}_id': pk}
+        ).select_related('title').order_by('rank')
+        return Response(LeaderboardEntrySerializer(entries, many=True).data)
+
+
+class GenreViewSet(LeaderboardMixin, SparseFieldsMixin,
+                   CachedResponseMixin, ListCreateDestroyViewSet):
     """
     Вьюсет жанров.
     """
-    queryset = Genre.objects.all()
+    cache_resource = 'genres'
+    cache_models = (Genre, )
+    leaderboard_field = 'genre'
+    queryset = Genre.objects.order_by('id')
     serializer_class = GenreSerializer
 
     permission_classes = [IsAdminOrReadOnly, ]
@@ -46,11 +81,15 @@ class GenreViewSet(ListCreateDestroyViewSet):
     lookup_field = 'slug'
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(LeaderboardMixin, SparseFieldsMixin,
+                      CachedResponseMixin, ListCreateDestroyViewSet):
     """
     Вьюсет категорий.
     """
-    queryset = Category.objects.all()
+    cache_resource = 'categories'
+    cache_models = (Category, )
+    leaderboard_field = 'category'
+    queryset = Category.objects.order_by('id')
     serializer_class = CategorySerializer
 
     permission_classes = [IsAdminOrReadOnly, ]
@@ -59,54 +98,165 @@ class CategoryViewSet(ListCreateDestroyViewSet):
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(SparseFieldsMixin, ConditionalGetMixin,
+                   CachedResponseMixin, FastListMixin, viewsets.ModelViewSet):
     """
-    Вьюсет произведений.
+    Вьюсет произведений. Рейтинг зависит от отзывов, поэтому кэш ответов
+    сбрасывается и при их изменении.
     """
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+    cache_resource = 'titles'
+    cache_models = (Title, Category, Genre, Review)
+    queryset = Title.objects.select_related(
+        'category', 'stats'
+    ).prefetch_related('genre')
 
     permission_classes = [IsAdminOrReadOnly, ]
+    pagination_class = TitlePagination
 
     filterset_class = TitleFilter
+    sparse_sources = {'rating': ('score_sum', 'score_count')}
+    fast_serializer_class = TitleFastSerializer
 
     def get_serializer_class(self):
         if self.action in ('create', 'update', 'partial_update'):
             return TitleCreateSerializer
         return TitleListSerializer
 
+    def get_condition(self, request):
+        """
+        Список зависит от всех произведений: используются версии данных
+        из общего кэша, а без него (CACHE_SHARED) — последняя дата
+        изменения и количество произведений. Для одного произведения — его
+        ревизия: её увеличивают и изменения категорий, жанров и отзывов.
+        """
+        if self.action == 'list':
+            if settings.CACHE_SHARED:
+                return get_versions(self.cache_models), None
+            stamp = Title.objects.aggregate(updated_at=Max('updated_at'),
+                                            count=Count('id'))
+            return (stamp['count'], stamp['updated_at']), stamp['updated_at']
+        title = get_title_revision(self.kwargs.get(self.lookup_field))
+        return title['revision'], title['updated_at']
+
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        """
+        Распределение оценок и количество отзывов произведения. Читается
+        одна строка `TitleStats`, отзывы не агрегируются.
+        """
+        return self.conditional_response(self.get_stats, request, pk=pk)
+
+    def get_stats(self, request, pk=None):
+        stats = TitleStats.objects.filter(pk=pk).first()
+        if stats is None:
+            # Строка статистики создаётся вместе с произведением; до
+            # восстановления командой recalculate_ratings у старых
+            # произведений её может не быть.
+            stats = TitleStats(title_id=get_title_revision(pk)['id'])
+        return Response(TitleStatsSerializer(stats).data)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Создание списка произведений. Ошибочные элементы не мешают
+        сохранить остальные: ответ содержит результат для каждого
+        элемента. Код ответа 201, если созданы все, 207 — если часть,
+        400 — если ни одного.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({'detail': 'Ожидается непустой список '
+                                       'произведений.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.API_BULK_MAX_ITEMS:
+            return Response({'detail': f'Не более '
+                                       f'{settings.API_BULK_MAX_ITEMS} '
+                                       f'произведений за запрос.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        results = create_titles(items)
+        created = sum('errors' not in result for result in results)
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'created': created, 'results': results},
+                        status=response_status)
+
+
+def get_title_revision(title_id):
+    """
+    Ревизия и дата изменения произведения (или 404, если его нет).
+    """
+    return get_object_or_404(
+        Title.objects.values('id', 'revision', 'updated_at'), pk=title_id
+    )
+
+
+class TitleRevisionConditionMixin(ConditionalGetMixin):
+    """
+    ETag и Last-Modified для отзывов и комментариев: любое их изменение
+    увеличивает ревизию произведения.
+    """
+    title_revision = None
+
+    def get_title_revision(self):
+        """
+        Ревизия произведения из адреса запроса; заодно проверяет, что
+        произведение существует. Запрос выполняется один раз.
+        """
+        if self.title_revision is None:
+            self.title_revision = get_title_revision(
+                self.kwargs.get('title_id')
+            )
+        return self.title_revision
+
+    def get_condition(self, request):
+        title = self.get_title_revision()
+        return title['revision'], title['updated_at']
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SparseFieldsMixin, TitleRevisionConditionMixin,
+                    FastListMixin, viewsets.ModelViewSet):
     """
     Вьюсет отзывов на произведения.
     """
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    fast_serializer_class = ReviewFastSerializer
 
     permission_classes = [IsAuthenticatedOrReadOnly,
                           IsAdminModeratorOrAuthorOrReadOnly]
+    pagination_class = OptionalCursorPagination
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        title = self.get_title_revision()
+        return Review.objects.filter(
+            title_id=title['id']
+        ).select_related('author')
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        serializer.save(title=title, author=self.request.user)
+        title = self.get_title_revision()
+        serializer.save(title_id=title['id'], author=self.request.user)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(SparseFieldsMixin, TitleRevisionConditionMixin,
+                     FastListMixin, viewsets.ModelViewSet):
     """
     Вьюсет комментариев к отзывам.
     """
     serializer_class = CommentSerializer
+    fast_serializer_class = CommentFastSerializer
 
     permission_classes = [IsAuthenticatedOrReadOnly,
                           IsAdminModeratorOrAuthorOrReadOnly]
+    pagination_class = OptionalCursorPagination
 
     def get_queryset(self):
         review = get_object_or_404(Review, pk=self.kwargs.get('review_id'),
                                    title_id=self.kwargs.get('title_id'))
-        return review.comments.all()
+        return review.comments.select_related('author')
 
     def perform_create(self, serializer):
         review = get_object_or_404(Review, pk=self.kwargs.get('review_id'),
@@ -114,10 +264,31 @@ class CommentViewSet(viewsets.ModelViewSet):
         serializer.save(review=review, author=self.request.user)
 
 
+class ExportViewSet(viewsets.ViewSet):
+    """
+    Полная или инкрементальная (`?updated_since=`) выгрузка произведений,
+    отзывов и комментариев в формате NDJSON для администраторов.
+    """
+    permission_classes = [IsAuthenticated, IsAdministrator, ]
+
+    @action(detail=False, methods=['get'])
+    def titles(self, request):
+        return stream(request, 'titles')
+
+    @action(detail=False, methods=['get'])
+    def reviews(self, request):
+        return stream(request, 'reviews')
+
+    @action(detail=False, methods=['get'])
+    def comments(self, request):
+        return stream(request, 'comments')
+
+
 def send_service_mail(mail_to: str, message: str,
                       subject: str = None):
     """
-    Обеспечивает отправку электронного сообщения.
+    Ставит электронное сообщение в очередь на отправку. Само письмо
+    отправляет обработчик очереди (`manage.py run_mail_worker`).
     Заголовок (subject) предустановлен.
     :param mail_to: Электронный адрес.
     :param message: Текст сообщения.
@@ -126,12 +297,8 @@ def send_service_mail(mail_to: str, message: str,
 
     subject = subject or settings.DEFAULT_EMAIL_SUBJECT
 
-    send_mail(subject=subject,
-              message=message,
-              from_email=settings.DEFAULT_FROM_EMAIL,
-              recipient_list=[mail_to],
-              fail_silently=True
-              )
+    enqueue_mail(mail_to=mail_to, subject=subject, message=message,
+                 from_email=settings.DEFAULT_FROM_EMAIL)
 
 
 class EmailAuthenticatedSet(viewsets.ViewSet):
@@ -182,7 +349,7 @@ class EmailAuthenticatedSet(viewsets.ViewSet):
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
 
-class UsersViewSet(viewsets.ModelViewSet):
+class UsersViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     """
     Работа с пользователями (User): создание, редактирование, удаление.
     """
@@ -196,16 +363,26 @@ class UsersViewSet(viewsets.ModelViewSet):
 
     lookup_field = 'username'
 
+    def get_request_user(self):
+        """
+        Пользователь из кэша аутентификации содержит только часть полей;
+        для вывода и изменения профиля он загружается целиком.
+        """
+        user = self.request.user
+        if user.get_deferred_fields():
+            user = User.objects.get(pk=user.pk)
+        return user
+
     @action(methods=['get'], detail=False,
             permission_classes=[IsAuthenticated, ],
             url_path='me')
     def my_user_object(self, request):
-        serializers = UsersSerializer(self.request.user)
+        serializers = UsersSerializer(self.get_request_user())
         return Response(serializers.data, status=status.HTTP_200_OK)
 
     @my_user_object.mapping.patch
     def upd_me(self, request):
-        serializers = UsersSerializerRoleReadOnly(self.request.user,
+        serializers = UsersSerializerRoleReadOnly(self.get_request_user(),
                                                   data=self.request.data,
                                                   partial=True)
 
@@ -25,6 +25,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.profiling.ProfilingMiddleware',
+    'api.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -33,6 +36,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.replicas.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -65,8 +69,55 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
+        # Секунды жизни соединения воркера; 0 — соединение на каждый запрос.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE') or 60),
     }
 }
+DB_CONN_HEALTH_CHECKS = os.environ.get(
+    'DB_CONN_HEALTH_CHECKS', 'true'
+).lower() in ('1', 'true', 'yes')
+DB_CONN_HEALTH_CHECK_INTERVAL = int(
+    os.environ.get('DB_CONN_HEALTH_CHECK_INTERVAL', 10)
+)
+
+# Реплики для чтения: DB_REPLICA_HOSTS=replica1:5432,replica2
+DATABASE_REPLICAS = []
+for number, address in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+REPLICA_RETRY_INTERVAL = int(os.environ.get('REPLICA_RETRY_INTERVAL', 30))
+
+# Потоки (и соединения с базой) для горячих маршрутов чтения под ASGI.
+ASGI_READ_THREADS = int(os.environ.get('ASGI_READ_THREADS') or 16)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+# Кэш общий для всех воркеров (memcached). Локальный кэш процесса не
+# видит сброса версий данных в других воркерах, поэтому всё, что на них
+# опирается (кэш ответов, кэш аутентификации), без общего кэша
+# отключается. CACHE_SHARED=1 — для запуска в одном процессе.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+CACHE_SHARED = (os.environ.get('CACHE_SHARED') == '1'
+                or CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS)
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -102,7 +153,7 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
 
     'DEFAULT_FILTER_BACKENDS': (
@@ -115,10 +166,37 @@ REST_FRAMEWORK = {
 
 }
 
+# Пагинация: время жизни закэшированного COUNT(*) и оценка количества
+# строк по статистике PostgreSQL для нефильтрованных списков
+API_COUNT_CACHE_TIMEOUT = int(os.environ.get('API_COUNT_CACHE_TIMEOUT', 60))
+API_APPROXIMATE_COUNT = os.environ.get('API_APPROXIMATE_COUNT') == '1'
+API_APPROXIMATE_COUNT_THRESHOLD = 100000
+
+# Кэш ответов каталога (жанры, категории, произведения), секунды.
+# Работает только с общим кэшем (CACHE_SHARED).
+API_CACHE_ENABLED = os.environ.get('API_CACHE_ENABLED', '1') == '1'
+API_CACHE_TIMEOUTS = {
+    'categories': int(os.environ.get('API_CACHE_CATEGORIES_TIMEOUT', 600)),
+    'genres': int(os.environ.get('API_CACHE_GENRES_TIMEOUT', 600)),
+    'titles': int(os.environ.get('API_CACHE_TITLES_TIMEOUT', 60)),
+}
+# Списки произведений, отзывов и комментариев сериализуются из .values()
+# без DRF-сериализаторов (api.fast); ответ не меняется.
+API_FAST_SERIALIZERS = os.environ.get('API_FAST_SERIALIZERS', '1') == '1'
+# Наибольшее число произведений в одном запросе POST /titles/bulk/.
+API_BULK_MAX_ITEMS = int(os.environ.get('API_BULK_MAX_ITEMS', 5000))
+
+# Рейтинги лучших произведений в категориях и жанрах: длина списка и
+# наименьшее число отзывов, с которым произведение попадает в рейтинг.
+LEADERBOARD_SIZE = int(os.environ.get('LEADERBOARD_SIZE') or 10)
+LEADERBOARD_MIN_REVIEWS = int(os.environ.get('LEADERBOARD_MIN_REVIEWS') or 5)
+
 # Token
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=5),
 }
+# Время жизни пользователя в кэше аутентификации, секунды
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 60))
 
 # Corsheaders
 CORS_ORIGIN_ALLOW_ALL = True
@@ -129,3 +207,35 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 DEFAULT_FROM_EMAIL = 'YAMdb Support <robomot@yamdb.fake>'
 DEFAULT_EMAIL_SUBJECT = 'YAMbd * Carrier pigeon *'
+
+# Очередь исходящих писем (manage.py run_mail_worker)
+MAIL_WORKER_BATCH_SIZE = int(os.environ.get('MAIL_WORKER_BATCH_SIZE', 100))
+MAIL_WORKER_INTERVAL = float(os.environ.get('MAIL_WORKER_INTERVAL', 1))
+MAIL_WORKER_LEASE = 300
+MAIL_WORKER_MAX_ATTEMPTS = 5
+MAIL_WORKER_RETRY_DELAY = 30
+# Сколько секунд хранятся обработанные письма и как часто удаляются старые
+MAIL_WORKER_RETENTION = int(os.environ.get('MAIL_WORKER_RETENTION',
+                                           7 * 24 * 3600))
+MAIL_WORKER_PURGE_INTERVAL = 3600
+
+# Метрики запросов (/metrics/). METRICS_DIR — общий каталог, через который
+# метрики суммируются по всем воркерам gunicorn; без него /metrics/
+# отдаёт метрики только одного воркера.
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+METRICS_ALLOWED_IPS = os.environ.get(
+    'METRICS_ALLOWED_IPS', '127.0.0.1'
+).split(',')
+
+# Профилирование запросов администратора по заголовку X-Profile
+PROFILE_DIR = os.environ.get('PROFILE_DIR',
+                             os.path.join(BASE_DIR, 'profiles'))
+
+# Журнал медленных SQL-запросов (manage.py slow_queries), миллисекунды
+SLOW_QUERY_THRESHOLD = float(os.environ.get('SLOW_QUERY_THRESHOLD', 200))
+SLOW_QUERY_EXPLAIN_ANALYZE = os.environ.get('SLOW_QUERY_EXPLAIN_ANALYZE') == '1'
+SLOW_QUERY_DIR = os.environ.get(
+    'SLOW_QUERY_DIR',
+    os.path.join(METRICS_DIR, 'slow_queries') if METRICS_DIR else ''
+)
@@ -0,0 +1,21 @@
+"""
+Нагрузочные тесты API.
+
+    python -m benchmarks.seed --titles 100000 --reviews 5000000
+    python -m benchmarks.run --requests 500 --output bench_before.json
+    python -m benchmarks.run --url http://127.0.0.1:8000 --concurrency 16
+
+По умолчанию используется база SQLite из `benchmarks.settings`; для
+PostgreSQL задайте `DJANGO_SETTINGS_MODULE=api_yamdb.settings` и
+переменные окружения базы данных.
+"""
+import os
+
+
+def setup():
+    """
+    Инициализация Django для запуска скриптов через `python -m`.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
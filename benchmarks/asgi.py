@@ -0,0 +1,146 @@
+"""
+Сравнение WSGI- и ASGI-обработки горячих маршрутов чтения при большом
+числе одновременных клиентов.
+
+`--clients` клиентов по кругу запрашивают маршруты, а отправка каждого
+ответа медленному клиенту занимает `--client-delay` мс. В WSGI-модели на
+это время занят один из `--workers` воркеров; в ASGI-модели ожидает
+только сопрограмма, а запросы к базе выполняет пул `ASGI_READ_THREADS`.
+
+    python -m benchmarks.asgi --clients 200 --workers 9 --client-delay 100
+
+Для замера по сети запустите оба сервера и используйте `benchmarks.run`:
+
+    gunicorn api_yamdb.wsgi:application --config gunicorn.conf.py
+    gunicorn api_yamdb.asgi:application --config gunicorn.conf.py \\
+        --worker-class uvicorn.workers.UvicornWorker
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+from . import setup
+from .run import commit, percentile
+
+READ_ROUTES = ('titles-list', 'titles-detail', 'reviews-list',
+               'comments-list')
+
+
+def report(latencies, elapsed):
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 2),
+        'p50': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def run_wsgi(paths, clients, requests, workers, delay):
+    from django.test import Client
+
+    slots = threading.BoundedSemaphore(workers)
+    latencies = []
+    lock = threading.Lock()
+
+    def client_loop(number):
+        client = Client()
+        for index in range(requests):
+            path = paths[(number + index) % len(paths)]
+            begin = time.perf_counter()
+            with slots:
+                client.get(path)
+                time.sleep(delay)
+            with lock:
+                latencies.append(time.perf_counter() - begin)
+
+    threads = [threading.Thread(target=client_loop, args=(number,))
+               for number in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return report(latencies, time.perf_counter() - started)
+
+
+def run_asgi(paths, clients, requests, delay):
+    from api_yamdb.asgi import application
+
+    latencies = []
+
+    async def request(path):
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.body':
+                await asyncio.sleep(delay)
+
+        path, _, query = path.partition('?')
+        await application({
+            'type': 'http', 'asgi': {'version': '3.0'},
+            'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'root_path': '', 'query_string': query.encode(),
+            'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+            'headers': [(b'host', b'testserver')],
+        }, receive, send)
+
+    async def client_loop(number):
+        for index in range(requests):
+            begin = time.perf_counter()
+            await request(paths[(number + index) % len(paths)])
+            latencies.append(time.perf_counter() - begin)
+
+    async def main():
+        await asyncio.gather(*(client_loop(number)
+                               for number in range(clients)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return report(latencies, time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=10,
+                        help='Запросов на клиента.')
+    parser.add_argument('--workers', type=int, default=9,
+                        help='Синхронных воркеров в WSGI-модели.')
+    parser.add_argument('--client-delay', type=float, default=100,
+                        help='Время отправки ответа клиенту, мс.')
+    parser.add_argument('--output', help='Файл для JSON-отчёта.')
+    args = parser.parse_args(argv)
+
+    setup()
+    from django.conf import settings
+
+    from .run import build_routes
+
+    paths = [route.path for route in build_routes()
+             if route.name in READ_ROUTES]
+    delay = args.client_delay / 1000
+    result = {
+        'commit': commit(),
+        'clients': args.clients,
+        'client_delay_ms': args.client_delay,
+        'wsgi': {'workers': args.workers, **run_wsgi(
+            paths, args.clients, args.requests, args.workers, delay
+        )},
+        'asgi': {'read_threads': settings.ASGI_READ_THREADS, **run_asgi(
+            paths, args.clients, args.requests, delay
+        )},
+    }
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
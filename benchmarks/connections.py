@@ -0,0 +1,108 @@
+"""
+Цена открытия соединения с базой данных.
+
+Сравнивает запрос `SELECT 1` через новое соединение (`CONN_MAX_AGE = 0`),
+через постоянное соединение и через постоянное соединение с проверкой
+`is_usable()` перед каждым запросом (`api.signals.check_connections`
+делает её не чаще раза в `DB_CONN_HEALTH_CHECK_INTERVAL` секунд), а затем
+тот же выбор на уровне запроса к API.
+
+    python -m benchmarks.connections --iterations 1000
+    DJANGO_SETTINGS_MODULE=api_yamdb.settings python -m benchmarks.connections
+"""
+import argparse
+import json
+import time
+
+from . import setup
+from .run import percentile
+
+
+def measure(action, iterations):
+    latencies = []
+    for _ in range(iterations):
+        begin = time.perf_counter()
+        action()
+        latencies.append(time.perf_counter() - begin)
+    return {
+        'mean': round(sum(latencies) / len(latencies) * 1000, 4),
+        'p50': round(percentile(latencies, 0.50) * 1000, 4),
+        'p95': round(percentile(latencies, 0.95) * 1000, 4),
+    }
+
+
+def run_queries(connection, iterations):
+
+    def select():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+    def reconnect():
+        connection.close()
+        select()
+
+    def checked():
+        if not connection.is_usable():
+            connection.close()
+        select()
+
+    select()
+    return {
+        'new_connection': measure(reconnect, iterations),
+        'persistent': measure(select, iterations),
+        'persistent_checked': measure(checked, iterations),
+    }
+
+
+def run_requests(connection, iterations, route_name):
+    from django.test import Client
+
+    from .run import build_routes
+
+    route = {route.name: route for route in build_routes()}[route_name]
+    client = Client()
+    results = {}
+    for name, max_age in (('conn_max_age_0', 0), ('conn_max_age_60', 60)):
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        client.get(route.path)
+        results[name] = measure(lambda: client.get(route.path), iterations)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--route', default='reviews-detail',
+                        help='Маршрут из benchmarks.run для замера запросов '
+                             'к API; пустое значение отключает замер.')
+    parser.add_argument('--output', help='Файл для JSON-отчёта.')
+    args = parser.parse_args(argv)
+
+    setup()
+    from django.db import connection
+
+    from .run import commit
+
+    report = {
+        'commit': commit(),
+        'database': connection.vendor,
+        'iterations': args.iterations,
+        'select_1': run_queries(connection, args.iterations),
+    }
+    if args.route:
+        report['request'] = {
+            'route': args.route,
+            **run_requests(connection, args.iterations, args.route),
+        }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
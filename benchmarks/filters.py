@@ -0,0 +1,138 @@
+"""
+Фильтр произведений по жанрам: соединение с таблицей связей против
+подзапросов `EXISTS` (api.filters) при росте числа жанров у произведения.
+
+Для каждого значения `--genres-per-title` связи произведений с жанрами
+строятся заново (каждому произведению — столько случайных жанров), и
+замеряется первая страница списка с `COUNT(*)` для двух жанров в режимах
+«любой» и «все». После замера исходные связи восстанавливаются.
+
+    python -m benchmarks.seed --titles 20000 --reviews 100000
+    python -m benchmarks.filters --genres-per-title 1,2,4,8,16 --repeat 20
+"""
+import argparse
+import json
+import random
+import time
+
+from . import setup
+from .run import percentile
+
+PAGE_SIZE = 50
+BATCH_SIZE = 5000
+
+
+def measure(queryset, repeat):
+    timings = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        count = queryset.count()
+        list(queryset.order_by('id')[:PAGE_SIZE])
+        timings.append(time.perf_counter() - begin)
+    return {
+        'count': count,
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 3),
+    }
+
+
+def strategies(slugs):
+    from api.filters import TitleFilter
+    from content.models import Title
+
+    def join_all():
+        queryset = Title.objects.all()
+        for slug in slugs:
+            queryset = queryset.filter(genre__slug=slug)
+        return queryset
+
+    def exists(match):
+        return TitleFilter({'genre': ','.join(slugs), 'genre_match': match},
+                           queryset=Title.objects.all()).qs
+
+    return {
+        'join_any': lambda: Title.objects.filter(
+            genre__slug__in=slugs
+        ).distinct(),
+        'exists_any': lambda: exists('any'),
+        'join_all': join_all,
+        'exists_all': lambda: exists('all'),
+    }
+
+
+def relink(title_ids, genre_ids, per_title, seed):
+    from content.models import Title
+
+    through = Title.genre.through
+    rng = random.Random(seed)
+    through.objects.all().delete()
+    links = []
+    for title_id in title_ids:
+        for genre_id in rng.sample(genre_ids, per_title):
+            links.append(through(title_id=title_id, genre_id=genre_id))
+        if len(links) >= BATCH_SIZE:
+            through.objects.bulk_create(links)
+            links = []
+    through.objects.bulk_create(links)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--genres-per-title', default='1,2,4,8,16')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Файл для JSON-отчёта.')
+    args = parser.parse_args(argv)
+
+    setup()
+    from django.db import connection
+
+    from content.models import Genre, Title
+    from .run import commit
+
+    sizes = [int(size) for size in args.genres_per_title.split(',')]
+    through = Title.genre.through
+    original = [through(title_id=title_id, genre_id=genre_id)
+                for title_id, genre_id in through.objects.values_list(
+                    'title_id', 'genre_id')]
+    extra = [Genre.objects.create(name=f'Жанр {number}',
+                                  slug=f'bench-genre-{number}')
+             for number in range(Genre.objects.count(), max(sizes) + 2)]
+    genre_ids = list(Genre.objects.order_by('id').values_list('id',
+                                                              flat=True))
+    slugs = list(Genre.objects.order_by('id').values_list(
+        'slug', flat=True
+    )[:2])
+    title_ids = list(Title.objects.values_list('id', flat=True))
+
+    results = {}
+    try:
+        for size in sizes:
+            relink(title_ids, genre_ids, size, args.seed)
+            results[size] = {
+                name: measure(build(), args.repeat)
+                for name, build in strategies(slugs).items()
+            }
+    finally:
+        through.objects.all().delete()
+        through.objects.bulk_create(original)
+        Genre.objects.filter(pk__in=[genre.pk for genre in extra]).delete()
+
+    report = {
+        'commit': commit(),
+        'database': connection.vendor,
+        'titles': len(title_ids),
+        'genres': len(genre_ids),
+        'filter_genres': slugs,
+        'genres_per_title': results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
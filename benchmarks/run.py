@@ -0,0 +1,301 @@
+"""
+Прогон маршрутов `api/urls.py` и отчёт о производительности в JSON.
+
+Без `--url` запросы выполняются в текущем процессе через тестовый
+клиент Django, с `--url` — по HTTP к запущенному серверу (gunicorn) в
+`--concurrency` потоков. Для каждого маршрута отчёт содержит число
+запросов в секунду, перцентили p50/p95/p99 времени ответа (мс) и число
+SQL-запросов на запрос (его можно измерить только в текущем процессе).
+В текущем процессе маршруты измеряются без кэша ответов и с прогретым
+кэшем отдельно.
+Идентификаторы объектов берутся из той же базы, поэтому для удалённого
+прогона сервер должен работать с ней же.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from . import setup
+
+ADMIN_USERNAME = 'bench_admin'
+ADMIN_EMAIL = 'bench_admin@yamdb.fake'
+
+
+class Route:
+
+    def __init__(self, name, path, method='get', data=None, auth=False):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.data = data
+        self.auth = auth
+
+
+def percentile(values, share):
+    """
+    Перцентиль по методу ближайшего ранга.
+    """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1,
+                       round(share * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_admin():
+    from users.models import User, UserRoleChoices
+
+    admin, _ = User.objects.get_or_create(
+        username=ADMIN_USERNAME,
+        defaults={'email': ADMIN_EMAIL, 'role': UserRoleChoices.ADMIN},
+    )
+    return admin
+
+
+def build_routes():
+    """
+    Маршруты API с идентификаторами реальных объектов базы. Отзыв и
+    комментарий выбираются у произведения с наибольшим числом отзывов,
+    чтобы списки были непустыми.
+    """
+    from django.contrib.auth.tokens import default_token_generator
+    from django.db.models import Count
+
+    from content.models import Category, Comment, Genre, Review, Title
+
+    admin = get_admin()
+    title = Title.objects.annotate(
+        reviews_count=Count('reviews')
+    ).order_by('-reviews_count', 'id').first()
+    if title is None:
+        raise SystemExit('База пуста: запустите python -m benchmarks.seed')
+    review = Review.objects.filter(title=title).annotate(
+        comments_count=Count('comments')
+    ).order_by('-comments_count', 'id').first()
+    comment = Comment.objects.filter(review=review).first()
+    category = Category.objects.order_by('id').first()
+    genre = Genre.objects.order_by('id').first()
+    word = title.name.split()[0]
+
+    base = '/api/v1'
+    routes = [
+        Route('categories-list', f'{base}/categories/'),
+        Route('categories-search',
+              f'{base}/categories/?search={category.name}'),
+        Route('genres-list', f'{base}/genres/'),
+        Route('genres-search', f'{base}/genres/?search={genre.name}'),
+        Route('titles-list', f'{base}/titles/'),
+        Route('titles-list-deep', f'{base}/titles/?page=50'),
+        Route('titles-filter',
+              f'{base}/titles/?category={category.slug}'
+              f'&genre={genre.slug}'),
+        Route('titles-search',
+              f'{base}/titles/?name={urllib.request.quote(word)}'),
+        Route('titles-detail', f'{base}/titles/{title.id}/'),
+        Route('reviews-list', f'{base}/titles/{title.id}/reviews/'),
+        Route('reviews-list-cursor',
+              f'{base}/titles/{title.id}/reviews/?pagination=cursor'),
+        Route('reviews-detail',
+              f'{base}/titles/{title.id}/reviews/{review.id}/'),
+        Route('comments-list',
+              f'{base}/titles/{title.id}/reviews/{review.id}/comments/'),
+        Route('users-list', f'{base}/users/', auth=True),
+        Route('users-detail', f'{base}/users/{admin.username}/', auth=True),
+        Route('users-me', f'{base}/users/me/', auth=True),
+        Route('auth-email', f'{base}/auth/email/', method='post',
+              data={'email': admin.email}),
+        Route('auth-token', f'{base}/auth/token/', method='post',
+              data={'email': admin.email,
+                    'confirmation_code':
+                        default_token_generator.make_token(admin)}),
+    ]
+    if comment is not None:
+        routes.append(Route(
+            'comments-detail',
+            f'{base}/titles/{title.id}/reviews/{review.id}/comments/'
+            f'{comment.id}/'
+        ))
+    return routes
+
+
+def summarize(latencies, elapsed, statuses):
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'p50': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99': round(percentile(latencies, 0.99) * 1000, 3),
+        'statuses': {str(code): statuses.count(code)
+                     for code in sorted(set(statuses))},
+    }
+
+
+def run_local(routes, token, requests, warmup):
+    """
+    Каждый маршрут измеряется дважды: с отключённым кэшем ответов
+    (`API_CACHE_ENABLED=False`, основные цифры отчёта — стоимость
+    обработки запроса) и с прогретым кэшем (раздел `warm`). Иначе после
+    прогрева маршруты каталога отдаются из кэша и показывают 0 SQL.
+    """
+    from django.core.cache import cache
+    from django.db import connections
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext, override_settings
+
+    client = Client()
+
+    def call(route):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if (
+            route.auth) else {}
+        method = getattr(client, route.method)
+        if route.data is not None:
+            return method(route.path, route.data,
+                          content_type='application/json', **headers)
+        return method(route.path, **headers)
+
+    def measure(route):
+        for _ in range(warmup):
+            call(route)
+        with CaptureQueriesContext(connections['default']) as queries:
+            call(route)
+        # Журнал запросов очищается в начале каждого запроса при DEBUG,
+        # поэтому число считывается сразу.
+        query_count = len(queries)
+        latencies, statuses = [], []
+        started = time.perf_counter()
+        for _ in range(requests):
+            begin = time.perf_counter()
+            statuses.append(call(route).status_code)
+            latencies.append(time.perf_counter() - begin)
+        elapsed = time.perf_counter() - started
+        result = summarize(latencies, elapsed, statuses)
+        result['queries_per_request'] = query_count
+        return result
+
+    report = {}
+    for route in routes:
+        cache.clear()
+        with override_settings(API_CACHE_ENABLED=False):
+            report[route.name] = measure(route)
+        report[route.name]['warm'] = warm = measure(route)
+        print(f'{route.name:24} {report[route.name]["rps"]:>10} rps  '
+              f'p95 {report[route.name]["p95"]:>9} мс  '
+              f'{report[route.name]["queries_per_request"]} SQL  '
+              f'(кэш: {warm["rps"]} rps, {warm["queries_per_request"]} SQL)')
+    return report
+
+
+def run_remote(routes, token, requests, warmup, url, concurrency):
+
+    def call(route):
+        data = None
+        headers = {'Accept': 'application/json'}
+        if route.data is not None:
+            data = json.dumps(route.data).encode()
+            headers['Content-Type'] = 'application/json'
+        if route.auth:
+            headers['Authorization'] = f'Bearer {token}'
+        request = urllib.request.Request(
+            url.rstrip('/') + route.path, data=data, headers=headers,
+            method=route.method.upper()
+        )
+        begin = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            status = error.code
+        return time.perf_counter() - begin, status
+
+    report = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for route in routes:
+            list(executor.map(call, [route] * warmup))
+            started = time.perf_counter()
+            results = list(executor.map(call, [route] * requests))
+            elapsed = time.perf_counter() - started
+            report[route.name] = summarize(
+                [latency for latency, _ in results], elapsed,
+                [status for _, status in results]
+            )
+            report[route.name]['queries_per_request'] = None
+            print(f'{route.name:24} {report[route.name]["rps"]:>10} rps  '
+                  f'p95 {report[route.name]["p95"]:>9} мс')
+    return report
+
+
+def dataset():
+    from content.models import Comment, Review, Title
+    from users.models import User
+
+    return {
+        'titles': Title.objects.count(),
+        'reviews': Review.objects.count(),
+        'comments': Comment.objects.count(),
+        'users': User.objects.count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Запросов на маршрут.')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--url', help='Адрес запущенного сервера.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--token', help='JWT администратора для --url.')
+    parser.add_argument('--routes', nargs='*',
+                        help='Только перечисленные маршруты.')
+    parser.add_argument('--output', help='Файл для JSON-отчёта.')
+    args = parser.parse_args(argv)
+
+    setup()
+    from django.conf import settings
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    routes = build_routes()
+    if args.routes:
+        routes = [route for route in routes if route.name in args.routes]
+    token = args.token or str(RefreshToken.for_user(get_admin()).access_token)
+
+    if args.url:
+        results = run_remote(routes, token, args.requests, args.warmup,
+                             args.url, args.concurrency)
+    else:
+        results = run_local(routes, token, args.requests, args.warmup)
+
+    report = {
+        'commit': commit(),
+        'mode': 'remote' if args.url else 'local',
+        'url': args.url,
+        'concurrency': args.concurrency if args.url else 1,
+        'database': settings.DATABASES['default']['ENGINE'],
+        'python': platform.python_version(),
+        'dataset': dataset(),
+        'routes': results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Детерминированный набор данных для нагрузочных тестов.
+
+Форма данных (категории, жанры, число жанров у произведения, число
+отзывов на произведение, комментариев к отзыву, распределение оценок и
+тексты) берётся из `data/*.csv` и масштабируется до заданного размера.
+Результат записывается в csv-файлы того же формата и загружается
+командой `load_csv`, поэтому одинаковые параметры и `--seed` всегда дают
+одинаковую базу.
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+from collections import Counter
+
+from . import setup
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'data')
+
+
+def _read(name):
+    with open(os.path.join(DATA_DIR, name), newline='',
+              encoding='utf-8') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+class Shape:
+    """
+    Распределения, снятые с исходного набора `data/`.
+    """
+
+    def __init__(self):
+        self.categories = _read('category.csv')
+        self.genres = _read('genre.csv')
+        titles = _read('titles.csv')
+        reviews = _read('review.csv')
+        comments = _read('comments.csv')
+
+        genres_per_title = Counter(row['title_id']
+                                   for row in _read('genre_title.csv'))
+        self.genres_per_title = [genres_per_title.get(row['id'], 0)
+                                 for row in titles]
+        reviews_per_title = Counter(row['title_id'] for row in reviews)
+        self.reviews_per_title = [reviews_per_title.get(row['id'], 0)
+                                  for row in titles]
+        comments_per_review = Counter(row['review_id'] for row in comments)
+        self.comments_per_review = [comments_per_review.get(row['id'], 0)
+                                    for row in reviews]
+        self.scores = [int(row['score']) for row in reviews]
+        self.years = [int(row['year']) for row in titles]
+        self.names = [row['name'] for row in titles]
+        self.review_texts = [row['text'] for row in reviews]
+        self.comment_texts = [row['text'] for row in comments]
+
+    @staticmethod
+    def mean(values):
+        return sum(values) / len(values)
+
+
+def _scaled(rng, sample, factor):
+    """
+    Значение из исходного распределения, умноженное на `factor`, с
+    вероятностным округлением (сохраняет среднее).
+    """
+    value = rng.choice(sample) * factor
+    whole = int(value)
+    return whole + (rng.random() < value - whole)
+
+
+def generate(path, titles, reviews, comments, seed=0):
+    """
+    Записывает csv-файлы набора данных в каталог `path`.
+    """
+    shape = Shape()
+    rng = random.Random(seed)
+    review_factor = reviews / (titles * shape.mean(shape.reviews_per_title))
+    comment_factor = (comments / reviews
+                      / shape.mean(shape.comments_per_review)
+                      if reviews else 0)
+    max_reviews = int(max(shape.reviews_per_title) * review_factor) + 1
+    users = max(max_reviews * 2, 100)
+
+    def writer(name, header):
+        csv_file = open(os.path.join(path, name), 'w', newline='',
+                        encoding='utf-8')
+        csv_writer = csv.writer(csv_file)
+        csv_writer.writerow(header)
+        return csv_file, csv_writer
+
+    files = []
+    for name, rows in (('category.csv', shape.categories),
+                       ('genre.csv', shape.genres)):
+        csv_file, csv_writer = writer(name, ['id', 'name', 'slug'])
+        files.append(csv_file)
+        csv_writer.writerows([row['id'], row['name'], row['slug']]
+                             for row in rows)
+
+    csv_file, users_writer = writer('users.csv', [
+        'id', 'username', 'email', 'role', 'description', 'first_name',
+        'last_name'
+    ])
+    files.append(csv_file)
+    for user_id in range(1, users + 1):
+        users_writer.writerow([user_id, f'bench{user_id}',
+                               f'bench{user_id}@yamdb.fake', 'user', '',
+                               '', ''])
+
+    outputs = {}
+    for name, header in (
+            ('titles.csv', ['id', 'name', 'year', 'category']),
+            ('genre_title.csv', ['id', 'title_id', 'genre_id']),
+            ('review.csv', ['id', 'title_id', 'text', 'author', 'score',
+                            'pub_date']),
+            ('comments.csv', ['id', 'review_id', 'text', 'author',
+                              'pub_date'])):
+        csv_file, outputs[name] = writer(name, header)
+        files.append(csv_file)
+
+    link_id = review_id = comment_id = 0
+    for title_id in range(1, titles + 1):
+        category = rng.choice(shape.categories)['id']
+        outputs['titles.csv'].writerow([
+            title_id, f'{rng.choice(shape.names)} {title_id}',
+            rng.choice(shape.years), category
+        ])
+        count = min(rng.choice(shape.genres_per_title), len(shape.genres))
+        for genre in rng.sample(shape.genres, count):
+            link_id += 1
+            outputs['genre_title.csv'].writerow([link_id, title_id,
+                                                 genre['id']])
+
+        first_author = rng.randrange(users)
+        for offset in range(min(_scaled(rng, shape.reviews_per_title,
+                                        review_factor), users)):
+            review_id += 1
+            day = rng.randrange(365 * 5)
+            outputs['review.csv'].writerow([
+                review_id, title_id, rng.choice(shape.review_texts),
+                (first_author + offset) % users + 1,
+                rng.choice(shape.scores),
+                f'{2016 + day // 365}-{day % 12 + 1:02d}-'
+                f'{day % 28 + 1:02d}T12:00:00.000Z'
+            ])
+            for _ in range(_scaled(rng, shape.comments_per_review,
+                                   comment_factor)):
+                comment_id += 1
+                outputs['comments.csv'].writerow([
+                    comment_id, review_id, rng.choice(shape.comment_texts),
+                    rng.randrange(users) + 1,
+                    '2021-01-01T12:00:00.000Z'
+                ])
+
+    for csv_file in files:
+        csv_file.close()
+    return {'titles': titles, 'reviews': review_id, 'comments': comment_id,
+            'users': users, 'seed': seed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--reviews', type=int, default=None,
+                        help='По умолчанию — как в data/ на произведение.')
+    parser.add_argument('--comments', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    setup()
+    from django.core.management import call_command
+
+    shape = Shape()
+    reviews = args.reviews or int(args.titles
+                                  * shape.mean(shape.reviews_per_title))
+    comments = args.comments if args.comments is not None else int(
+        reviews * shape.mean(shape.comments_per_review)
+    )
+    call_command('migrate', verbosity=0)
+    with tempfile.TemporaryDirectory() as path:
+        dataset = generate(path, args.titles, reviews, comments, args.seed)
+        print(f'Набор данных: {dataset}')
+        call_command('load_csv', path=path, batch_size=args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Скорость сериализации списков: DRF-сериализаторы против быстрой
+сериализации из `.values()` (api.fast).
+
+Для каждого ресурса `--objects` объектов читаются из базы, сериализуются
+и превращаются в JSON `--repeat` раз; в отчёте — объектов в секунду для
+обоих способов, ускорение и совпадение JSON байт в байт.
+
+    python -m benchmarks.seed --titles 10000 --reviews 100000
+    python -m benchmarks.serializers --objects 1000 --repeat 20
+"""
+import argparse
+import json
+import time
+
+from . import setup
+from .run import percentile
+
+
+def measure(action, objects, repeat):
+    timings = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        content = action()
+        timings.append(time.perf_counter() - begin)
+    median = percentile(timings, 0.50)
+    return content, {
+        'objects_per_sec': round(objects / median, 1),
+        'p50_ms': round(median * 1000, 3),
+    }
+
+
+def resources():
+    from api.fast import (CommentFastSerializer, ReviewFastSerializer,
+                          TitleFastSerializer)
+    from api.serializers import (CommentSerializer, ReviewSerializer,
+                                 TitleListSerializer)
+    from content.models import Comment, Review, Title
+
+    return {
+        'titles': (Title.objects.select_related(
+            'category', 'stats'
+        ).prefetch_related('genre'), TitleListSerializer,
+            TitleFastSerializer),
+        'reviews': (Review.objects.select_related('author'),
+                    ReviewSerializer, ReviewFastSerializer),
+        'comments': (Comment.objects.select_related('author'),
+                     CommentSerializer, CommentFastSerializer),
+    }
+
+
+def run(queryset, serializer_class, fast_class, objects, repeat):
+    from rest_framework.renderers import JSONRenderer
+
+    renderer = JSONRenderer()
+    queryset = queryset.order_by('id')
+
+    def drf():
+        data = serializer_class(queryset[:objects], many=True).data
+        return renderer.render(data)
+
+    def fast():
+        serializer = fast_class()
+        data = serializer.to_representation(
+            serializer.values(queryset)[:objects]
+        )
+        return renderer.render(data)
+
+    count = queryset[:objects].count()
+    drf()
+    fast()
+    drf_content, drf_result = measure(drf, count, repeat)
+    fast_content, fast_result = measure(fast, count, repeat)
+    return {
+        'objects': count,
+        'drf': drf_result,
+        'fast': fast_result,
+        'speedup': round(fast_result['objects_per_sec']
+                         / drf_result['objects_per_sec'], 2),
+        'identical': drf_content == fast_content,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--objects', type=int, default=1000,
+                        help='Объектов в одном списке.')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--resources', default='titles,reviews,comments')
+    parser.add_argument('--output', help='Файл для JSON-отчёта.')
+    args = parser.parse_args(argv)
+
+    setup()
+    from django.db import connection
+
+    from .run import commit
+
+    available = resources()
+    report = {
+        'commit': commit(),
+        'database': connection.vendor,
+        'repeat': args.repeat,
+        'resources': {
+            name: run(*available[name], args.objects, args.repeat)
+            for name in args.resources.split(',')
+        },
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
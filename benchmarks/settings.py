@@ -0,0 +1,15 @@
+from api_yamdb.settings import *  # noqa: F401,F403
+from api_yamdb.settings import BASE_DIR, os
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCH_DB_PATH',
+                               os.path.join(BASE_DIR, 'bench.sqlite3')),
+    }
+}
+
+ALLOWED_HOSTS = ['*']
+SLOW_QUERY_THRESHOLD = 0
+# Бенчмарки выполняются в одном процессе: локальный кэш для них общий.
+CACHE_SHARED = True
@@ -0,0 +1,213 @@
+"""
+Рейтинги лучших произведений в категориях и жанрах.
+
+Каждый рейтинг хранится готовым списком из `LEADERBOARD_SIZE` строк
+`LeaderboardEntry`, поэтому чтение — одна выборка по индексу
+(категория или жанр, место). Учитываются произведения, у которых не
+меньше `LEADERBOARD_MIN_REVIEWS` отзывов; порядок — по среднему баллу
+из накопленных счётчиков, затем по числу отзывов.
+
+При изменении рейтинга произведения обновляются только те рейтинги, на
+которые оно может повлиять: где оно уже есть или куда проходит по баллу.
+Обновление выполняется после фиксации транзакции отзыва, чтобы запись
+отзывов не ждала блокировки рейтинга, и затрагивает только строки
+рейтинга: новое место произведения сравнивается с уже стоящими в нём.
+Все произведения категории или жанра перебираются, только если
+произведение выбыло из заполненного рейтинга и освободившееся место
+нужно занять следующим. Полный пересчёт выполняет команда
+`refresh_leaderboards`.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Q
+from django.db.models.functions import Cast
+
+from .models import Category, Genre, LeaderboardEntry, Title
+
+BOARDS = {'category': Category, 'genre': Genre}
+
+
+def min_reviews():
+    return max(settings.LEADERBOARD_MIN_REVIEWS, 1)
+
+
+def candidates(field, pk):
+    """
+    Лучшие произведения категории или жанра по счётчикам рейтинга.
+    """
+    return Title.objects.filter(
+        **{field: pk}, score_count__gte=min_reviews()
+    ).annotate(
+        average=ExpressionWrapper(
+            Cast('score_sum', FloatField()) / F('score_count'),
+            output_field=FloatField()
+        )
+    ).order_by(
+        '-average', '-score_count', 'id'
+    ).values_list('id', 'average', 'score_count')[:settings.LEADERBOARD_SIZE]
+
+
+def sort_key(entry):
+    """
+    Порядок мест рейтинга, как в `candidates`: (произведение, балл,
+    число отзывов).
+    """
+    title_id, rating, review_count = entry
+    return -rating, -review_count, title_id
+
+
+def _lock(field, pk):
+    """
+    Блокирует строку категории (жанра), чтобы параллельные обновления
+    одного рейтинга не конфликтовали по уникальному месту. False, если
+    категории (жанра) уже нет.
+    """
+    return BOARDS[field].objects.select_for_update().filter(pk=pk).exists()
+
+
+def _save(field, pk, current, fresh):
+    if fresh == current:
+        return False
+    LeaderboardEntry.objects.filter(**{f'{field}_id': pk}).delete()
+    LeaderboardEntry.objects.bulk_create([
+        LeaderboardEntry(**{f'{field}_id': pk}, rank=rank,
+                         title_id=title_id, rating=rating,
+                         review_count=review_count)
+        for rank, (title_id, rating, review_count) in enumerate(fresh, 1)
+    ])
+    return True
+
+
+def _current(field, pk):
+    return list(LeaderboardEntry.objects.filter(
+        **{f'{field}_id': pk}
+    ).order_by('rank').values_list('title_id', 'rating', 'review_count'))
+
+
+def refresh(field, pk):
+    """
+    Пересчитывает рейтинг категории или жанра по всем её произведениям.
+    Возвращает True, если рейтинг изменился.
+    """
+    with transaction.atomic():
+        if not _lock(field, pk):
+            return False
+        return _save(field, pk, _current(field, pk),
+                     list(candidates(field, pk)))
+
+
+def place(field, pk, title_id, entry):
+    """
+    Ставит произведение в рейтинг по его новым счётчикам (`entry` —
+    место в формате `candidates` или None, если произведение не проходит
+    в рейтинг) без перебора произведений категории. Если произведение
+    выбыло из заполненного рейтинга, его место может занять произведение
+    вне рейтинга, и рейтинг пересчитывается полностью.
+    """
+    with transaction.atomic():
+        if not _lock(field, pk):
+            return
+        current = _current(field, pk)
+        listed = any(item[0] == title_id for item in current)
+        if (listed and len(current) >= settings.LEADERBOARD_SIZE
+                and (entry is None
+                     or sort_key(entry) > sort_key(current[-1]))):
+            _save(field, pk, current, list(candidates(field, pk)))
+            return
+        fresh = [item for item in current if item[0] != title_id]
+        if entry is not None:
+            fresh.append(entry)
+        fresh.sort(key=sort_key)
+        _save(field, pk, current, fresh[:settings.LEADERBOARD_SIZE])
+
+
+def refresh_all():
+    """
+    Пересчитывает все рейтинги. Возвращает число изменившихся.
+    """
+    changed = 0
+    for field, model in BOARDS.items():
+        for pk in model.objects.values_list('pk', flat=True).iterator():
+            changed += refresh(field, pk)
+    return changed
+
+
+def _scope(title):
+    """
+    Рейтинги категории и жанров произведения.
+    """
+    scope = set()
+    if title['category_id']:
+        scope.add(('category', title['category_id']))
+    scope.update(('genre', genre_id) for genre_id in
+                 Title.genre.through.objects.filter(
+                     title_id=title['id']
+                 ).values_list('genre_id', flat=True))
+    return scope
+
+
+def _entries(title_id, scope):
+    """
+    Места в рейтингах из `scope` и во всех рейтингах, где стоит
+    произведение, одним запросом: {рейтинг: [(произведение, балл)]}.
+    """
+    entries = {}
+    for category_id, genre_id, entry_title_id, rating in (
+            LeaderboardEntry.objects.filter(
+                Q(title_id=title_id)
+                | Q(category_id__in=[pk for field, pk in scope
+                                     if field == 'category'])
+                | Q(genre_id__in=[pk for field, pk in scope
+                                  if field == 'genre'])
+            ).values_list('category_id', 'genre_id', 'title_id', 'rating')):
+        board = (('category', category_id) if category_id
+                 else ('genre', genre_id))
+        entries.setdefault(board, []).append((entry_title_id, rating))
+    return entries
+
+
+def title_boards(title):
+    """
+    Рейтинги, которые нужно пересчитать после удаления произведения: где
+    оно стоит и рейтинг его категории. Связи с жанрами удаляются раньше
+    отзывов, а пока удаляются отзывы, произведение может снова попасть
+    в рейтинг категории.
+    """
+    boards = set(_entries(title.pk, ()))
+    if title.category_id and title.score_count >= min_reviews():
+        boards.add(('category', title.category_id))
+    return boards
+
+
+def update_title(title_id):
+    """
+    Обновляет рейтинги, на которые влияет изменение произведения: его
+    оценок, категории или жанров. Выполняется после фиксации текущей
+    транзакции.
+    """
+    transaction.on_commit(lambda: _update_title(title_id))
+
+
+def _update_title(title_id):
+    title = Title.objects.filter(pk=title_id).values(
+        'id', 'category_id', 'score_sum', 'score_count'
+    ).first()
+    qualifies = title is not None and title['score_count'] >= min_reviews()
+    # Произведение, не проходящее по числу отзывов, может только выбыть
+    # из рейтингов, где оно уже стоит.
+    scope = _scope(title) if qualifies else set()
+    entries = _entries(title_id, scope)
+    entry = None
+    if qualifies:
+        entry = (title_id, title['score_sum'] / title['score_count'],
+                 title['score_count'])
+
+    for board in scope | set(entries):
+        board_entries = entries.get(board, [])
+        if any(entry_title_id == title_id
+               for entry_title_id, _ in board_entries):
+            place(*board, title_id, entry if board in scope else None)
+        elif board in scope and qualifies and (
+                len(board_entries) < settings.LEADERBOARD_SIZE
+                or entry[1] >= min(rating for _, rating in board_entries)):
+            place(*board, title_id, entry)
@@ -0,0 +1,380 @@
+import csv
+import io
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from content import search
+from content.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+
+class CsvSource(ABC):
+    """
+    Описание csv-файла: модель, в которую он загружается, и
+    преобразование строки файла в объект модели (`build`).
+
+    Пользователи, категории и жанры сопоставляются с уже существующими
+    записями по естественному ключу (`natural_key`); соответствие
+    идентификаторов из файла и из базы хранится в `id_map`. Остальные
+    таблицы сохраняют идентификаторы из файла, а строки с уже
+    загруженными идентификаторами пропускаются, так что команду можно
+    запустить повторно.
+
+    Строки, ссылающиеся на отсутствующие в базе записи (`parents`),
+    пропускаются; при `ignore_conflicts` пропускаются и строки, которые
+    нарушают ограничения уникальности (например, повторный отзыв автора).
+    """
+    filename = None
+    model = None
+    natural_key = None
+    parents = ()
+    ignore_conflicts = False
+
+    def __init__(self):
+        self.id_map = {}
+
+    def resolve(self, csv_id):
+        return self.id_map.get(int(csv_id), int(csv_id))
+
+    @abstractmethod
+    def build(self, row):
+        """
+        Объект модели из строки csv-файла (словаря `csv.DictReader`).
+        """
+
+    def prepare(self, objs):
+        """
+        Отбрасывает объекты, которые уже есть в базе под тем же
+        естественным ключом (запоминая их идентификаторы) или с тем же
+        идентификатором, и объекты, ссылающиеся на несуществующие записи.
+        """
+        for attname, model in self.parents:
+            ids = {getattr(obj, attname) for obj in objs}
+            existing = set(model.objects.filter(
+                pk__in=ids
+            ).values_list('pk', flat=True))
+            objs = [obj for obj in objs if getattr(obj, attname) in existing]
+        if not self.natural_key:
+            if self.ignore_conflicts:
+                return objs
+            existing = set(self.model.objects.filter(
+                pk__in=[obj.pk for obj in objs]
+            ).values_list('pk', flat=True))
+            return [obj for obj in objs if obj.pk not in existing]
+        keys = [getattr(obj, self.natural_key) for obj in objs]
+        existing = dict(self.model.objects.filter(
+            **{f'{self.natural_key}__in': keys}
+        ).values_list(self.natural_key, 'pk'))
+        fresh = []
+        for obj in objs:
+            pk = existing.get(getattr(obj, self.natural_key))
+            if pk is None:
+                fresh.append(obj)
+            elif pk != obj.pk:
+                self.id_map[obj.pk] = pk
+        return fresh
+
+
+class UserSource(CsvSource):
+    filename = 'users.csv'
+    model = User
+    natural_key = 'username'
+
+    def build(self, row):
+        return User(id=int(row['id']), username=row['username'],
+                    email=row['email'], role=row['role'],
+                    bio=row['description'] or None,
+                    first_name=row['first_name'],
+                    last_name=row['last_name'],
+                    password=make_password(None))
+
+
+class CategorySource(CsvSource):
+    filename = 'category.csv'
+    model = Category
+    natural_key = 'slug'
+
+    def build(self, row):
+        return Category(id=int(row['id']), name=row['name'],
+                        slug=row['slug'])
+
+
+class GenreSource(CategorySource):
+    filename = 'genre.csv'
+    model = Genre
+
+    def build(self, row):
+        return Genre(id=int(row['id']), name=row['name'], slug=row['slug'])
+
+
+class TitleSource(CsvSource):
+    filename = 'titles.csv'
+    model = Title
+
+    def __init__(self, categories):
+        super().__init__()
+        self.categories = categories
+
+    def build(self, row):
+        category = row['category']
+        return Title(id=int(row['id']), name=row['name'],
+                     year=int(row['year']),
+                     category_id=(self.categories.resolve(category)
+                                  if category else None))
+
+
+class GenreTitleSource(CsvSource):
+    filename = 'genre_title.csv'
+    model = Title.genre.through
+    parents = (('title_id', Title), ('genre_id', Genre))
+    ignore_conflicts = True
+
+    def __init__(self, genres):
+        super().__init__()
+        self.genres = genres
+
+    def build(self, row):
+        return self.model(title_id=int(row['title_id']),
+                          genre_id=self.genres.resolve(row['genre_id']))
+
+
+class ReviewSource(CsvSource):
+    filename = 'review.csv'
+    model = Review
+    parents = (('title_id', Title), ('author_id', User))
+    ignore_conflicts = True
+
+    def __init__(self, users):
+        super().__init__()
+        self.users = users
+
+    def build(self, row):
+        return Review(id=int(row['id']), title_id=int(row['title_id']),
+                      text=row['text'], score=int(row['score']),
+                      author_id=self.users.resolve(row['author']),
+                      pub_date=parse_datetime(row['pub_date']))
+
+
+class CommentSource(ReviewSource):
+    filename = 'comments.csv'
+    model = Comment
+    parents = (('review_id', Review), ('author_id', User))
+    ignore_conflicts = False
+
+    def build(self, row):
+        return Comment(id=int(row['id']), review_id=int(row['review_id']),
+                       text=row['text'],
+                       author_id=self.users.resolve(row['author']),
+                       pub_date=parse_datetime(row['pub_date']))
+
+
+def get_sources():
+    users = UserSource()
+    categories = CategorySource()
+    genres = GenreSource()
+    return [users, categories, genres, TitleSource(categories),
+            GenreTitleSource(genres), ReviewSource(users),
+            CommentSource(users)]
+
+
+@contextmanager
+def keep_dates(model):
+    """
+    Отключает `auto_now_add`, чтобы загрузка сохранила даты из файла.
+    """
+    fields = [field for field in model._meta.local_concrete_fields
+              if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def copy_value(value):
+    """
+    Поле строки для `COPY ... WITH (FORMAT csv)`. NULL — пустое поле без
+    кавычек; любое другое значение, в том числе пустая строка, заключается
+    в кавычки.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_rows(fields, objs):
+    """
+    Данные объектов для `COPY ... FROM STDIN` в формате csv.
+    """
+    buffer = io.StringIO()
+    for obj in objs:
+        buffer.write(','.join(
+            copy_value(field.pre_save(obj, True)) for field in fields
+        ))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def copy_objects(model, objs, ignore_conflicts=False):
+    """
+    Загрузка пачки объектов командой `COPY ... FROM STDIN` (PostgreSQL).
+    При `ignore_conflicts` данные копируются во временную таблицу и
+    переносятся в основную с `ON CONFLICT DO NOTHING`.
+    """
+    fields = [field for field in model._meta.local_concrete_fields
+              if getattr(objs[0], field.attname) is not None
+              or not field.primary_key]
+    buffer = copy_rows(fields, objs)
+    columns = ', '.join(connection.ops.quote_name(field.column)
+                        for field in fields)
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if not ignore_conflicts:
+            cursor.copy_expert(
+                f'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+            return
+        cursor.execute(f'CREATE TEMP TABLE load_csv_batch (LIKE {table}) '
+                       f'ON COMMIT DROP')
+        cursor.copy_expert(
+            f'COPY load_csv_batch ({columns}) FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+        cursor.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} '
+                       f'FROM load_csv_batch ON CONFLICT DO NOTHING')
+
+
+class Command(BaseCommand):
+    """
+    Потоковая загрузка csv-файлов каталога (`data/*.csv`) пачками.
+    """
+    help = 'Загрузка пользователей, произведений и отзывов из csv-файлов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=os.path.join(settings.BASE_DIR, 'data'),
+            help='Каталог с csv-файлами.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY даже на PostgreSQL.'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить прерванную загрузку с сохранённой позиции.'
+        )
+        parser.add_argument(
+            '--state-file', default=None,
+            help='Файл с позицией загрузки (по умолчанию в --path).'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isdir(path):
+            raise CommandError(f'Каталог {path} не найден.')
+        self.batch_size = options['batch_size']
+        self.use_copy = (connection.vendor == 'postgresql'
+                         and not options['no_copy'])
+        self.state_file = (options['state_file']
+                           or os.path.join(path, '.load_csv_state.json'))
+        self.state = self.read_state() if options['resume'] else {}
+
+        for source in get_sources():
+            filename = os.path.join(path, source.filename)
+            if os.path.exists(filename):
+                self.load(source, filename)
+
+        self.reset_sequences()
+        search.rebuild_index()
+        call_command('recalculate_ratings', stdout=self.stdout)
+        call_command('refresh_leaderboards', stdout=self.stdout)
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
+
+    def read_state(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        with open(self.state_file) as state_file:
+            return json.load(state_file)
+
+    def save_state(self):
+        with open(self.state_file, 'w') as state_file:
+            json.dump(self.state, state_file)
+
+    def load(self, source, filename):
+        done = self.state.get(source.filename, 0)
+        loaded = 0
+        started = time.monotonic()
+        with open(filename, newline='', encoding='utf-8') as csv_file:
+            rows = csv.DictReader(csv_file)
+            self.skip(source, islice(rows, done))
+            for batch in self.batches(rows):
+                objs = [source.build(row) for row in batch]
+                with transaction.atomic():
+                    self.insert(source, source.prepare(objs))
+                done += len(batch)
+                loaded += len(batch)
+                self.state[source.filename] = done
+                self.save_state()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{source.filename}: {loaded} строк за {elapsed:.1f} с '
+            f'({loaded / elapsed if elapsed else 0:.0f} строк/с)'
+        )
+
+    def batches(self, rows):
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def skip(self, source, rows):
+        """
+        Пропускает строки, загруженные при прошлом запуске. Для таблиц с
+        естественным ключом восстанавливает соответствие идентификаторов.
+        """
+        for batch in self.batches(rows):
+            if source.natural_key:
+                source.prepare([source.build(row) for row in batch])
+
+    def insert(self, source, objs):
+        if not objs:
+            return
+        with keep_dates(source.model):
+            if self.use_copy:
+                copy_objects(source.model, objs, source.ignore_conflicts)
+                return
+            # Размер INSERT подбирает бэкенд: у SQLite есть предел числа
+            # строк в одном запросе.
+            source.model.objects.bulk_create(
+                objs, ignore_conflicts=source.ignore_conflicts
+            )
+
+    def reset_sequences(self):
+        models = [source.model for source in get_sources()]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -0,0 +1,150 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+
+from content.models import Review, Title, TitleStats
+
+STATS_FIELDS = [f'score_{score}' for score in TitleStats.SCORES] + [
+    'review_count', 'last_review_at'
+]
+
+
+def collect_stats(reviews):
+    """
+    Распределение оценок, количество отзывов и дата последнего отзыва
+    произведений по отзывам `reviews`, одним запросом.
+    """
+    stats = {}
+    rows = reviews.values('title_id', 'score').annotate(
+        count=Count('id'), last=Max('pub_date')
+    ).order_by()
+    for row in rows:
+        item = stats.setdefault(row['title_id'],
+                                TitleStats(title_id=row['title_id']))
+        if row['score'] in TitleStats.SCORES:
+            setattr(item, f'score_{row["score"]}', row['count'])
+        item.review_count += row['count']
+        if item.last_review_at is None or row['last'] > item.last_review_at:
+            item.last_review_at = row['last']
+    return stats
+
+
+def title_ranges(batch_size):
+    """
+    Диапазоны id произведений по `batch_size` произведений: команда
+    держит в памяти только один диапазон, сколько бы их ни было.
+    """
+    titles = Title.objects.order_by('id').values_list('id', flat=True)
+    last = None
+    while True:
+        batch = titles if last is None else titles.filter(id__gt=last)
+        ids = list(batch[:batch_size])
+        if not ids:
+            return
+        yield ids[0], ids[-1]
+        last = ids[-1]
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает накопленные счётчики рейтинга и статистику отзывов
+    произведений по таблице отзывов и сообщает о найденных расхождениях.
+    Произведения обрабатываются диапазонами id по `--batch-size`.
+    """
+    help = 'Пересчёт рейтинга и статистики отзывов произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, не исправляя их.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        checked = drifted = stats_missing = stats_drifted = 0
+        for first, last in title_ranges(options['batch_size']):
+            with transaction.atomic():
+                titles, titles_drifted = self.check_ratings(
+                    first, last, options
+                )
+                missing, drifted_stats = self.check_stats(
+                    first, last, options
+                )
+            checked += titles
+            drifted += titles_drifted
+            stats_missing += missing
+            stats_drifted += drifted_stats
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено произведений: {checked}, '
+            f'расхождений: {drifted}.'
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Статистика отзывов: отсутствует {stats_missing}, '
+            f'расхождений: {stats_drifted}.'
+        ))
+
+    def check_ratings(self, first, last, options):
+        """
+        Сверяет счётчики рейтинга произведений с id от `first` до `last`.
+        Возвращает число проверенных произведений и расхождений.
+        """
+        totals = {
+            row['title']: (row['score_sum'], row['score_count'])
+            for row in Review.objects.filter(
+                title_id__gte=first, title_id__lte=last
+            ).values('title').annotate(
+                score_sum=Sum('score'), score_count=Count('id')
+            ).order_by()
+        }
+        titles = list(Title.objects.filter(
+            id__range=(first, last)
+        ).only('id', 'score_sum', 'score_count'))
+
+        drifted = []
+        for title in titles:
+            expected = totals.get(title.id, (0, 0))
+            if (title.score_sum, title.score_count) != expected:
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f'Произведение {title.id}: '
+                        f'{title.score_sum}/{title.score_count} '
+                        f'-> {expected[0]}/{expected[1]}'
+                    )
+                title.score_sum, title.score_count = expected
+                drifted.append(title)
+
+        if drifted and not options['dry_run']:
+            Title.objects.bulk_update(drifted, ['score_sum', 'score_count'])
+        return len(titles), len(drifted)
+
+    def check_stats(self, first, last, options):
+        """
+        Сверяет статистику отзывов произведений с id от `first` до
+        `last`. Возвращает число отсутствующих записей и расхождений.
+        """
+        expected = collect_stats(
+            Review.objects.filter(title_id__gte=first, title_id__lte=last)
+        )
+        missing = list(Title.objects.filter(
+            id__range=(first, last), stats__isnull=True
+        ).values_list('id', flat=True))
+        drifted = []
+        for stats in TitleStats.objects.filter(
+                title_id__gte=first, title_id__lte=last):
+            actual = expected.get(stats.title_id,
+                                  TitleStats(title_id=stats.title_id))
+            if any(getattr(stats, field) != getattr(actual, field)
+                   for field in STATS_FIELDS):
+                drifted.append(actual)
+
+        if options['verbosity'] > 1:
+            for stats in drifted:
+                self.stdout.write(f'Статистика произведения {stats.title_id} '
+                                  f'расходится с отзывами')
+        if not options['dry_run']:
+            TitleStats.objects.bulk_create(
+                [expected.get(pk, TitleStats(title_id=pk)) for pk in missing]
+            )
+            TitleStats.objects.bulk_update(drifted, STATS_FIELDS)
+        return len(missing), len(drifted)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from content import leaderboards
+
+
+class Command(BaseCommand):
+    """
+    Полностью пересчитывает рейтинги лучших произведений всех категорий
+    и жанров. Рассчитана на периодический запуск (cron) как страховка к
+    пересчёту при изменении отзывов и после изменения настроек
+    LEADERBOARD_SIZE, LEADERBOARD_MIN_REVIEWS.
+    """
+    help = 'Пересчёт рейтингов лучших произведений категорий и жанров.'
+
+    def handle(self, *args, **options):
+        changed = leaderboards.refresh_all()
+        self.stdout.write(self.style.SUCCESS(
+            f'Изменилось рейтингов: {changed}.'
+        ))
@@ -0,0 +1,38 @@
+# Generated by Django 3.0.5 on 2026-10-18 05:49
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_rating_counters(apps, schema_editor):
+    Review = apps.get_model('content', 'Review')
+    Title = apps.get_model('content', 'Title')
+    totals = Review.objects.values('title').annotate(
+        score_sum=Sum('score'), score_count=Count('id')
+    ).order_by()
+    for row in totals:
+        Title.objects.filter(pk=row['title']).update(
+            score_sum=row['score_sum'], score_count=row['score_count']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0002_auto_20201029_1303'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='score_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_rating_counters,
+                             migrations.RunPython.noop),
+    ]
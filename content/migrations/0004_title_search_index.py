@@ -0,0 +1,43 @@
+from django.db import migrations
+
+POSTGRES_FORWARD = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS content_title_name_trgm '
+    'ON content_title USING gin ((UPPER(name::text)) gin_trgm_ops)',
+)
+POSTGRES_BACKWARD = (
+    'DROP INDEX CONCURRENTLY IF EXISTS content_title_name_trgm',
+)
+SQLITE_FORWARD = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS content_title_fts USING fts5(name)',
+    'INSERT INTO content_title_fts (rowid, name) '
+    'SELECT id, name FROM content_title',
+)
+SQLITE_BACKWARD = (
+    'DROP TABLE IF EXISTS content_title_fts',
+)
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for sql in statements.get(vendor, ()):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('content', '0003_title_rating_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD,
+                  'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_BACKWARD,
+                  'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
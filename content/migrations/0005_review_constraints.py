@@ -0,0 +1,53 @@
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+import content.operations
+
+
+def remove_duplicate_reviews(apps, schema_editor):
+    """
+    Перед созданием уникального ограничения оставляет только первый
+    отзыв автора на произведение и пересчитывает рейтинг затронутых
+    произведений.
+    """
+    Review = apps.get_model('content', 'Review')
+    Title = apps.get_model('content', 'Title')
+    duplicates = Review.objects.values('title', 'author').annotate(
+        first=Min('id'), total=Count('id')
+    ).filter(total__gt=1).order_by()
+    titles = set()
+    for row in duplicates:
+        Review.objects.filter(
+            title=row['title'], author=row['author']
+        ).exclude(pk=row['first']).delete()
+        titles.add(row['title'])
+    for title_id in titles:
+        totals = Review.objects.filter(title=title_id).aggregate(
+            score_sum=Sum('score'), score_count=Count('id')
+        )
+        Title.objects.filter(pk=title_id).update(**totals)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('content', '0004_title_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_reviews,
+                             migrations.RunPython.noop),
+        content.operations.AddIndexOnline(
+            model_name='comment',
+            index=models.Index(fields=['review', 'pub_date'], name='comment_review_pub_date_idx'),
+        ),
+        content.operations.AddIndexOnline(
+            model_name='review',
+            index=models.Index(fields=['title', 'pub_date'], name='review_title_pub_date_idx'),
+        ),
+        content.operations.AddUniqueConstraintOnline(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('title', 'author'), name='unique_review_per_author'),
+        ),
+    ]
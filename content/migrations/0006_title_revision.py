@@ -0,0 +1,23 @@
+# Generated by Django 3.0.5 on 2026-10-18 05:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0005_review_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Ревизия'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Дата изменения'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+
+import content.operations
+
+
+def _updated_at(db_index):
+    return models.DateTimeField(auto_now=True, db_index=db_index,
+                                verbose_name='Дата изменения')
+
+
+class Migration(migrations.Migration):
+    # Индексы по updated_at строятся CONCURRENTLY (content.operations).
+    atomic = False
+
+    dependencies = [
+        ('content', '0006_title_revision'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.AddField(
+                    model_name='comment',
+                    name='updated_at',
+                    field=_updated_at(db_index=False),
+                ),
+                migrations.AddField(
+                    model_name='review',
+                    name='updated_at',
+                    field=_updated_at(db_index=False),
+                ),
+                content.operations.AddIndexOnline(
+                    model_name='comment',
+                    index=models.Index(fields=['updated_at'],
+                                       name='comment_updated_at_idx'),
+                ),
+                content.operations.AddIndexOnline(
+                    model_name='review',
+                    index=models.Index(fields=['updated_at'],
+                                       name='review_updated_at_idx'),
+                ),
+            ],
+            state_operations=[
+                migrations.AddField(
+                    model_name='comment',
+                    name='updated_at',
+                    field=_updated_at(db_index=True),
+                ),
+                migrations.AddField(
+                    model_name='review',
+                    name='updated_at',
+                    field=_updated_at(db_index=True),
+                ),
+            ],
+        ),
+    ]
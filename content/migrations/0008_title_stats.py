@@ -0,0 +1,57 @@
+# Generated by Django 3.0.5 on 2026-10-18 06:18
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+
+
+def fill_title_stats(apps, schema_editor):
+    Review = apps.get_model('content', 'Review')
+    Title = apps.get_model('content', 'Title')
+    TitleStats = apps.get_model('content', 'TitleStats')
+    stats = {pk: TitleStats(title_id=pk)
+             for pk in Title.objects.values_list('pk', flat=True)}
+    rows = Review.objects.values('title_id', 'score').annotate(
+        count=Count('id'), last=Max('pub_date')
+    ).order_by()
+    for row in rows:
+        item = stats[row['title_id']]
+        if 1 <= row['score'] <= 10:
+            setattr(item, f'score_{row["score"]}', row['count'])
+        item.review_count += row['count']
+        if item.last_review_at is None or row['last'] > item.last_review_at:
+            item.last_review_at = row['last']
+    TitleStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0007_review_comment_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleStats',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='content.Title', verbose_name='Произведение')),
+                ('score_1', models.PositiveIntegerField(default=0)),
+                ('score_2', models.PositiveIntegerField(default=0)),
+                ('score_3', models.PositiveIntegerField(default=0)),
+                ('score_4', models.PositiveIntegerField(default=0)),
+                ('score_5', models.PositiveIntegerField(default=0)),
+                ('score_6', models.PositiveIntegerField(default=0)),
+                ('score_7', models.PositiveIntegerField(default=0)),
+                ('score_8', models.PositiveIntegerField(default=0)),
+                ('score_9', models.PositiveIntegerField(default=0)),
+                ('score_10', models.PositiveIntegerField(default=0)),
+                ('review_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('last_review_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего отзыва')),
+            ],
+            options={
+                'verbose_name': 'Статистика отзывов',
+                'verbose_name_plural': 'Статистика отзывов',
+            },
+        ),
+        migrations.RunPython(fill_title_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.0.5 on 2026-10-18 06:34
+
+from django.db import migrations, models
+
+import content.operations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('content', '0009_leaderboards'),
+    ]
+
+    operations = [
+        content.operations.AddIndexOnline(
+            model_name='title',
+            index=models.Index(fields=['year'], name='title_year_idx'),
+        ),
+        content.operations.AddIndexOnline(
+            model_name='title',
+            index=models.Index(fields=['category', 'year'], name='title_category_year_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# Токенизатор trigram появился в SQLite 3.34.
+TRIGRAM_SQLITE_VERSION = (3, 34, 0)
+
+SQLITE_FORWARD = (
+    'DROP TABLE IF EXISTS content_title_fts',
+    "CREATE VIRTUAL TABLE content_title_fts USING fts5(name, "
+    "tokenize='trigram')",
+    'INSERT INTO content_title_fts (rowid, name) '
+    'SELECT id, name FROM content_title',
+)
+SQLITE_BACKWARD = (
+    'DROP TABLE IF EXISTS content_title_fts',
+    'CREATE VIRTUAL TABLE content_title_fts USING fts5(name)',
+    'INSERT INTO content_title_fts (rowid, name) '
+    'SELECT id, name FROM content_title',
+)
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        connection = schema_editor.connection
+        if (connection.vendor != 'sqlite'
+                or connection.Database.sqlite_version_info
+                < TRIGRAM_SQLITE_VERSION):
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0010_title_year_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(SQLITE_FORWARD), _run(SQLITE_BACKWARD)),
+    ]
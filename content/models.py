@@ -52,13 +52,131 @@ class Title(models.Model):
                                  on_delete=models.SET_NULL,
                                  related_name='title')
     genre = models.ManyToManyField(Genre, blank=True, related_name='title')
+    score_sum = models.PositiveIntegerField(verbose_name='Сумма оценок',
+                                            default=0, editable=False)
+    score_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок', default=0, editable=False
+    )
+    revision = models.PositiveIntegerField(verbose_name='Ревизия',
+                                           default=0, editable=False)
+    updated_at = models.DateTimeField(verbose_name='Дата изменения',
+                                      auto_now=True, db_index=True)
+
+    # Поля, которые изменяются только атомарными UPDATE (content.signals)
+    # и не должны перезаписываться при сохранении экземпляра.
+    COUNTER_FIELDS = ('score_sum', 'score_count', 'revision')
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def rating(self):
+        """
+        Средняя оценка произведения по накопленным счётчикам.
+        """
+        if not self.score_count:
+            return None
+        return self.score_sum / self.score_count
+
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=['year'], name='title_year_idx'),
+            models.Index(fields=['category', 'year'],
+                         name='title_category_year_idx'),
+        ]
+
+
+class TitleStats(models.Model):
+    """
+    Распределение оценок произведения, количество отзывов и дата
+    последнего отзыва. Обновляется атомарными UPDATE при изменении
+    отзывов (content.signals), чтобы при чтении не агрегировать отзывы.
+    """
+    SCORES = range(1, 11)
+
+    title = models.OneToOneField(Title, verbose_name='Произведение',
+                                 primary_key=True, related_name='stats',
+                                 on_delete=models.CASCADE)
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+    score_6 = models.PositiveIntegerField(default=0)
+    score_7 = models.PositiveIntegerField(default=0)
+    score_8 = models.PositiveIntegerField(default=0)
+    score_9 = models.PositiveIntegerField(default=0)
+    score_10 = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов', default=0
+    )
+    last_review_at = models.DateTimeField(
+        verbose_name='Дата последнего отзыва', null=True, blank=True
+    )
+
+    def __str__(self):
+        return f'{self.title_id}: {self.review_count}'
+
+    @property
+    def scores(self):
+        return {score: getattr(self, f'score_{score}')
+                for score in self.SCORES}
+
+    class Meta:
+        verbose_name = 'Статистика отзывов'
+        verbose_name_plural = 'Статистика отзывов'
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Место произведения в рейтинге лучших в категории или жанре (задано
+    ровно одно из полей `category`, `genre`). Рейтинги пересчитываются
+    при изменении отзывов (content.leaderboards).
+    """
+    category = models.ForeignKey(Category, null=True, blank=True,
+                                 related_name='leaderboard',
+                                 on_delete=models.CASCADE)
+    genre = models.ForeignKey(Genre, null=True, blank=True,
+                              related_name='leaderboard',
+                              on_delete=models.CASCADE)
+    rank = models.PositiveSmallIntegerField(verbose_name='Место')
+    title = models.ForeignKey(Title, verbose_name='Произведение',
+                              related_name='leaderboard_entries',
+                              on_delete=models.CASCADE)
+    rating = models.FloatField(verbose_name='Рейтинг')
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов'
+    )
+
+    def __str__(self):
+        return f'{self.category or self.genre} #{self.rank}: {self.title_id}'
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Рейтинги лучших'
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'rank'],
+                                    name='unique_category_rank'),
+            models.UniqueConstraint(fields=['genre', 'rank'],
+                                    name='unique_genre_rank'),
+            models.CheckConstraint(
+                check=(models.Q(category__isnull=False, genre__isnull=True)
+                       | models.Q(category__isnull=True,
+                                  genre__isnull=False)),
+                name='leaderboard_category_xor_genre'
+            ),
+        ]
 
 
 class Review(models.Model):
@@ -76,6 +194,8 @@ class Review(models.Model):
                                              ])
     pub_date = models.DateTimeField(verbose_name='Дата публикации',
                                     auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(verbose_name='Дата изменения',
+                                      auto_now=True, db_index=True)
     title = models.ForeignKey(Title, verbose_name='Произведение',
                               related_name='reviews',
                               on_delete=models.CASCADE)
@@ -83,9 +203,28 @@ class Review(models.Model):
     def __str__(self):
         return f'{self.author} - {self.title}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Запоминает оценку и произведение на момент загрузки, чтобы при
+        сохранении или удалении скорректировать счётчики рейтинга.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        instance._loaded_title_id = instance.__dict__.get('title_id')
+        return instance
+
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'author'],
+                                    name='unique_review_per_author'),
+        ]
+        indexes = [
+            models.Index(fields=['title', 'pub_date'],
+                         name='review_title_pub_date_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -98,6 +237,8 @@ class Comment(models.Model):
                                on_delete=models.CASCADE)
     pub_date = models.DateTimeField(verbose_name='Дата публикации',
                                     auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(verbose_name='Дата изменения',
+                                      auto_now=True, db_index=True)
     review = models.ForeignKey(Review, verbose_name='Отзыв',
                                related_name='comments',
                                on_delete=models.CASCADE)
@@ -108,3 +249,7 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['review', 'pub_date'],
+                         name='comment_review_pub_date_idx'),
+        ]
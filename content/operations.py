@@ -0,0 +1,68 @@
+"""
+Операции миграций, которые на PostgreSQL создают индексы и ограничения
+без блокировки записи в таблицу (`CONCURRENTLY`). На других СУБД они
+работают как обычные `AddIndex`/`AddConstraint`.
+
+Миграции с этими операциями должны быть объявлены с `atomic = False`.
+"""
+from django.db import migrations
+
+
+def _is_postgres(schema_editor):
+    return schema_editor.connection.vendor == 'postgresql'
+
+
+class AddIndexOnline(migrations.AddIndex):
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if not _is_postgres(schema_editor):
+            return super().database_forwards(app_label, schema_editor,
+                                             from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            sql = str(self.index.create_sql(model, schema_editor))
+            schema_editor.execute(
+                sql.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY', 1)
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if not _is_postgres(schema_editor):
+            return super().database_backwards(app_label, schema_editor,
+                                              from_state, to_state)
+        schema_editor.execute(
+            f'DROP INDEX CONCURRENTLY IF EXISTS '
+            f'{schema_editor.quote_name(self.index.name)}'
+        )
+
+
+class AddUniqueConstraintOnline(migrations.AddConstraint):
+    """
+    Уникальное ограничение по полям: на PostgreSQL сначала строится
+    уникальный индекс `CONCURRENTLY`, затем ограничение подключается к
+    нему (`ADD CONSTRAINT ... UNIQUE USING INDEX`) без долгой блокировки.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if not _is_postgres(schema_editor):
+            return super().database_forwards(app_label, schema_editor,
+                                             from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias,
+                                        model):
+            return
+        table = schema_editor.quote_name(model._meta.db_table)
+        name = schema_editor.quote_name(self.constraint.name)
+        columns = ', '.join(
+            schema_editor.quote_name(model._meta.get_field(field).column)
+            for field in self.constraint.fields
+        )
+        schema_editor.execute(
+            f'CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} ({columns})'
+        )
+        schema_editor.execute(
+            f'ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX '
+            f'{name}'
+        )
@@ -0,0 +1,113 @@
+"""
+Поиск произведений по названию с использованием индексов.
+
+Произведение находится, если его название содержит строку поиска без
+учёта регистра (как `name__icontains`), на любой базе одинаково. На
+PostgreSQL запрос `ILIKE '%...%'` обслуживает GIN-индекс по триграммам
+(`pg_trgm`), а результаты ранжируются по похожести. На SQLite поиск идёт
+по теневой таблице FTS5 с токенизатором `trigram` (SQLite 3.34+), она
+обновляется при сохранении произведения; строки короче трёх символов
+ищутся без индекса. Более короткие названия, в которых строка занимает
+большую часть, идут первыми — так же упорядочивает похожесть триграмм.
+"""
+import re
+
+from django.db import connection
+from django.db.models.functions import Length
+
+FTS_TABLE = 'content_title_fts'
+# Меньше трёх символов не даёт ни одной триграммы.
+TRIGRAM_LENGTH = 3
+TRIGRAM_SQLITE_VERSION = (3, 34, 0)
+
+
+def has_trigram_index():
+    """
+    Таблица FTS5 на SQLite построена токенизатором `trigram`.
+    """
+    return (connection.vendor == 'sqlite'
+            and connection.Database.sqlite_version_info
+            >= TRIGRAM_SQLITE_VERSION)
+
+
+def _fts_query(value):
+    # Фраза из триграмм совпадает с подстрокой названия.
+    return '"{}"'.format(value.replace('"', '""'))
+
+
+def search_titles(queryset, value):
+    """
+    Отбирает произведения, название которых содержит `value`, и
+    упорядочивает их по релевантности.
+    """
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        return queryset.filter(name__icontains=value).annotate(
+            search_rank=TrigramSimilarity('name', value)
+        ).order_by('-search_rank', 'id')
+
+    if vendor == 'sqlite':
+        if len(value) >= TRIGRAM_LENGTH and has_trigram_index():
+            queryset = queryset.extra(
+                tables=[FTS_TABLE],
+                where=[f'{FTS_TABLE}.rowid = content_title.id',
+                       f'{FTS_TABLE} MATCH %s'],
+                params=[_fts_query(value)],
+            )
+        else:
+            # LIKE в SQLite не учитывает регистр только для ASCII, а
+            # REGEXP выполняется модулем re — как ILIKE на PostgreSQL.
+            queryset = queryset.filter(name__iregex=re.escape(value))
+        return queryset.order_by(Length('name'), 'id')
+
+    return queryset.filter(name__icontains=value)
+
+
+def index_title(title):
+    """
+    Обновляет запись произведения в таблице FTS5 (только SQLite).
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                       [title.pk])
+        cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, name) '
+                       f'VALUES (%s, %s)', [title.pk, title.name])
+
+
+def index_titles(titles):
+    """
+    Добавляет в таблицу FTS5 произведения, созданные `bulk_create`, для
+    которых сигналы не вызываются (только SQLite).
+    """
+    if connection.vendor != 'sqlite' or not titles:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name) VALUES (%s, %s)',
+            [(title.pk, title.name) for title in titles]
+        )
+
+
+def unindex_title(title):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                       [title.pk])
+
+
+def rebuild_index():
+    """
+    Полностью перестраивает таблицу FTS5 по таблице произведений.
+    Нужна после массовой загрузки, которая не вызывает сигналы моделей.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(f'INSERT INTO {FTS_TABLE} (rowid, name) '
+                       f'SELECT id, name FROM content_title')
@@ -0,0 +1,196 @@
+from django.db.models import DateTimeField, F, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from users.models import User
+from . import leaderboards, search
+from .models import Category, Comment, Genre, Review, Title, TitleStats
+
+
+def change_title_rating(title_id, score_delta, count_delta):
+    """
+    Атомарно изменяет накопленные сумму и количество оценок произведения
+    и увеличивает его ревизию.
+    """
+    Title.objects.filter(pk=title_id).update(
+        score_sum=F('score_sum') + score_delta,
+        score_count=F('score_count') + count_delta,
+        revision=F('revision') + 1,
+        updated_at=timezone.now(),
+    )
+
+
+def change_title_stats(title_id, added=None, removed=None, pub_date=None):
+    """
+    Атомарно переносит отзыв в распределении оценок произведения:
+    `added` — учитываемая оценка, `removed` — исключаемая. Дата последнего
+    отзыва при удалении берётся по индексу (title, pub_date).
+    """
+    if added == removed:
+        return
+    updates = {}
+    if added is not None:
+        field = f'score_{added}'
+        updates[field] = F(field) + 1
+    if removed is not None:
+        field = f'score_{removed}'
+        updates[field] = F(field) - 1
+    if removed is None:
+        date = Value(pub_date, output_field=DateTimeField())
+        updates['review_count'] = F('review_count') + 1
+        updates['last_review_at'] = Greatest(Coalesce('last_review_at', date),
+                                             date)
+    elif added is None:
+        updates['review_count'] = F('review_count') - 1
+        updates['last_review_at'] = Subquery(
+            Review.objects.filter(title_id=title_id).order_by(
+                '-pub_date'
+            ).values('pub_date')[:1]
+        )
+    TitleStats.objects.filter(pk=title_id).update(**updates)
+
+
+def touch_titles(titles):
+    """
+    Увеличивает ревизию произведений: по ней строятся ETag ответов с
+    произведением, его отзывами и комментариями.
+    """
+    titles.update(revision=F('revision') + 1, updated_at=timezone.now())
+
+
+def _remember_state(review):
+    review._loaded_score = review.score
+    review._loaded_title_id = review.title_id
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    """
+    Учитывает новую или изменённую оценку в рейтинге произведения.
+    """
+    if created:
+        change_title_rating(instance.title_id, instance.score, 1)
+        change_title_stats(instance.title_id, added=instance.score,
+                           pub_date=instance.pub_date)
+        leaderboards.update_title(instance.title_id)
+    else:
+        old_title_id = getattr(instance, '_loaded_title_id',
+                               instance.title_id)
+        old_score = getattr(instance, '_loaded_score', instance.score)
+        if old_title_id != instance.title_id:
+            change_title_rating(old_title_id, -old_score, -1)
+            change_title_rating(instance.title_id, instance.score, 1)
+            change_title_stats(old_title_id, removed=old_score)
+            change_title_stats(instance.title_id, added=instance.score,
+                               pub_date=instance.pub_date)
+            leaderboards.update_title(old_title_id)
+            leaderboards.update_title(instance.title_id)
+        else:
+            change_title_rating(instance.title_id,
+                                instance.score - old_score, 0)
+            change_title_stats(instance.title_id, added=instance.score,
+                               removed=old_score)
+            if instance.score != old_score:
+                leaderboards.update_title(instance.title_id)
+    _remember_state(instance)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """
+    Исключает оценку удалённого отзыва из рейтинга произведения.
+    """
+    title_id = getattr(instance, '_loaded_title_id', instance.title_id)
+    score = getattr(instance, '_loaded_score', instance.score)
+    change_title_rating(title_id, -score, -1)
+    change_title_stats(title_id, removed=score)
+    leaderboards.update_title(title_id)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, created, **kwargs):
+    search.index_title(instance)
+    if created:
+        TitleStats.objects.create(title=instance)
+
+
+@receiver(pre_delete, sender=Title)
+def title_deleting(sender, instance, **kwargs):
+    instance._leaderboards = leaderboards.title_boards(instance)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    search.unindex_title(instance)
+    # Места удалённого произведения в рейтингах удалены каскадно (а при
+    # удалении его отзывов могли появиться снова): рейтинги строятся
+    # заново без него.
+    for board in getattr(instance, '_leaderboards', ()):
+        leaderboards.refresh(*board)
+
+
+@receiver(post_save, sender=Title)
+def title_changed(sender, instance, created, **kwargs):
+    if not created:
+        touch_titles(Title.objects.filter(pk=instance.pk))
+        leaderboards.update_title(instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        touch_titles(Title.objects.filter(pk__in=pk_set or ()))
+        leaderboards.refresh('genre', instance.pk)
+    else:
+        touch_titles(Title.objects.filter(pk=instance.pk))
+        leaderboards.update_title(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    touch_titles(Title.objects.filter(reviews=instance.review_id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def catalog_entry_changed(sender, instance, created=False, **kwargs):
+    """
+    Название и slug категории и жанра выводятся в ответах с
+    произведениями. При удалении связи обнуляются и удаляются без
+    сигналов произведений, поэтому ревизии увеличиваются заранее.
+    """
+    if created:
+        return
+    field = 'category' if sender is Category else 'genre'
+    touch_titles(Title.objects.filter(**{field: instance.pk}))
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    instance._username_changed = (
+        instance.pk is not None
+        and (update_fields is None or 'username' in update_fields)
+        and not User.objects.filter(pk=instance.pk,
+                                    username=instance.username).exists()
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """
+    Имя пользователя выводится как автор отзывов и комментариев.
+    """
+    if getattr(instance, '_username_changed', False):
+        touch_titles(Title.objects.filter(
+            Q(reviews__author=instance.pk)
+            | Q(reviews__comments__author=instance.pk)
+        ))
@@ -0,0 +1,88 @@
+"""
+Настройки gunicorn; файл подхватывается автоматически при запуске из
+корня проекта. Значения по умолчанию рассчитаны по числу процессоров и
+переопределяются переменными окружения `GUNICORN_*`.
+
+Каждый поток воркера держит своё постоянное соединение с базой
+(`DB_CONN_MAX_AGE`), поэтому `workers * threads` на всех контейнерах
+должно укладываться в `max_connections` PostgreSQL.
+"""
+import multiprocessing
+import os
+
+
+def env_int(name, default):
+    return int(os.environ.get(name) or default)
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = env_int('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+threads = env_int('GUNICORN_THREADS', 2)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS',
+                              'gthread' if threads > 1 else 'sync')
+
+# Приложение загружается один раз в мастере, воркеры получают его копию
+# при fork: быстрее старт и меньше памяти.
+preload_app = True
+
+# Воркер перезапускается после max_requests ± jitter запросов, чтобы
+# утечки памяти не накапливались, а воркеры не перезапускались разом.
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+
+
+def when_ready(server):
+    """
+    Таблицы slug → id категорий и жанров загружаются в мастере и
+    достаются воркерам готовыми (preload_app). Заодно в журнал пишется
+    предупреждения, если кэш не общий для воркеров.
+    """
+    from api import lookups
+    from api.checks import check_replica_pinning, check_shared_cache
+
+    for check in (check_shared_cache, check_replica_pinning):
+        for message in check(None):
+            server.log.warning('%s', message)
+    lookups.warm()
+
+
+def pre_fork(server, worker):
+    """
+    Соединения, открытые мастером при загрузке приложения, не должны
+    достаться воркерам.
+    """
+    from django.db import connections
+
+    connections.close_all()
+
+
+def worker_exit(server, worker):
+    """
+    Сохраняет метрики воркера, завершающегося по max_requests.
+    """
+    from api import metrics, slow_queries
+
+    metrics.flush(force=True)
+    slow_queries.flush(force=True)
+
+
+def child_exit(server, worker):
+    """
+    Переносит метрики и журнал медленных запросов завершившегося воркера
+    в архив каталога, чтобы файлы воркеров не копились.
+    """
+    from django.conf import settings
+
+    from api import metrics, slow_queries
+
+    if settings.METRICS_DIR:
+        metrics.retire(settings.METRICS_DIR, metrics.merge, {worker.pid})
+    if settings.SLOW_QUERY_DIR:
+        metrics.retire(settings.SLOW_QUERY_DIR, slow_queries.merge,
+                       {worker.pid})
@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.fixture
+def category():
+    from content.models import Category
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genres():
+    from content.models import Genre
+    return [
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+
+
+@pytest.fixture
+def title(category, genres):
+    from content.models import Title
+    title = Title.objects.create(name='Побег из Шоушенка', year=1994,
+                                 category=category)
+    title.genre.set(genres)
+    return title
+
+
+@pytest.fixture
+def review(title, user):
+    from content.models import Review
+    return Review.objects.create(title=title, author=user, text='Отзыв',
+                                 score=8)
+
+
+@pytest.fixture
+def comment(review, another_user):
+    from content.models import Comment
+    return Comment.objects.create(review=review, author=another_user,
+                                  text='Комментарий')
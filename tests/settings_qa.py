@@ -4,5 +4,16 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db_replica.sqlite3'),
+    },
 }
+# `replica` — отдельная база SQLite, которой тесты имитируют отстающую
+# реплику. Миграции на реплики не применяются (ReplicaRouter), поэтому
+# алиас включается в DATABASE_REPLICAS только внутри тестов, после
+# создания схемы.
+DATABASE_REPLICAS = []
+# Тесты выполняются в одном процессе: локальный кэш для них общий.
+CACHE_SHARED = True
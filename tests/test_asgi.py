@@ -0,0 +1,92 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from api import asgi
+
+
+def asgi_request(path, method='GET', headers=()):
+    from api_yamdb.asgi import application
+
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'root_path': '',
+        'query_string': query.encode(), 'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80),
+        'headers': [(b'host', b'testserver'), *headers],
+    }
+    asyncio.run(application(scope, receive, send))
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return start['status'], dict(start['headers']), body
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReadPathHandler:
+
+    def test_same_json_as_wsgi(self, guest_client, comment):
+        review = comment.review
+        paths = [
+            '/api/v1/titles/',
+            f'/api/v1/titles/?category={review.title.category.slug}',
+            f'/api/v1/titles/{review.title_id}/',
+            f'/api/v1/titles/{review.title_id}/reviews/',
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+            f'comments/',
+        ]
+        for path in paths:
+            status, _, body = asgi_request(path)
+            assert status == 200
+            assert json.loads(body) == guest_client.get(path).json(), \
+                f'Проверьте, что {path} под ASGI отдаёт тот же JSON'
+
+    def test_read_path_runs_in_pool(self, title, monkeypatch):
+        threads = []
+        respond = asgi.ReadPathHandler.respond
+
+        def record(handler, scope, body_file):
+            threads.append(threading.current_thread().name)
+            return respond(handler, scope, body_file)
+
+        monkeypatch.setattr(asgi.ReadPathHandler, 'respond', record)
+        asgi_request(f'/api/v1/titles/{title.id}/')
+        asgi_request('/api/v1/categories/')
+        assert len(threads) == 1
+        assert threads[0].startswith('asgi-read')
+
+    def test_connections_closed_in_pool(self, title, monkeypatch):
+        threads = []
+        close = asgi.close_old_connections
+
+        def record():
+            threads.append(threading.current_thread().name)
+            close()
+
+        monkeypatch.setattr(asgi, 'close_old_connections', record)
+        asgi_request(f'/api/v1/titles/{title.id}/')
+        assert threads and threads[0].startswith('asgi-read'), \
+            'Проверьте, что соединения потока пула закрывает сам поток'
+
+    def test_conditional_get(self, title):
+        _, headers, _ = asgi_request(f'/api/v1/titles/{title.id}/')
+        status, _, body = asgi_request(
+            f'/api/v1/titles/{title.id}/',
+            headers=[(b'if-none-match', headers[b'ETag'])]
+        )
+        assert status == 304
+        assert body == b''
+
+    def test_missing_title(self, title):
+        status, _, _ = asgi_request(f'/api/v1/titles/{title.id + 1}/reviews/')
+        assert status == 404
@@ -0,0 +1,60 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestCachedAuthentication:
+
+    def _user_queries(self, client, method, url, data=None):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(url, data=data,
+                                               format='json')
+        queries = [query['sql'] for query in context.captured_queries
+                   if 'FROM "users_user"' in query['sql']]
+        return response, queries
+
+    def test_user_served_from_cache(self, user_client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        user_client.get(url)
+        response, queries = self._user_queries(
+            user_client, 'post', url, {'text': 'Отзыв', 'score': 5}
+        )
+        assert response.status_code == 201
+        assert queries == [], \
+            'Проверьте, что пользователь берётся из кэша аутентификации'
+
+    def test_role_change_invalidates_cache(self, user_client, user):
+        data = {'name': 'Книга', 'slug': 'book'}
+        assert user_client.post('/api/v1/categories/',
+                                data).status_code == 403
+        user.role = 'admin'
+        user.save()
+        assert user_client.post('/api/v1/categories/',
+                                data).status_code == 201, \
+            'Проверьте, что изменение роли сбрасывает кэш аутентификации'
+
+    def test_inactive_user_rejected(self, user_client, user):
+        user_client.get('/api/v1/users/me/')
+        user.is_active = False
+        user.save()
+        assert user_client.get('/api/v1/users/me/').status_code == 401
+
+    def test_profile_loaded_in_full(self, user_client, user):
+        user_client.get('/api/v1/users/me/')
+        response = user_client.patch('/api/v1/users/me/',
+                                     {'bio': 'Обо мне'})
+        assert response.json()['email'] == user.email
+        user.refresh_from_db()
+        assert user.bio == 'Обо мне'
+        assert user.check_password('1234567'), \
+            'Проверьте, что изменение профиля не затирает остальные поля'
+
+    def test_no_cache_without_shared_cache(self, user_client, user,
+                                           settings):
+        settings.CACHE_SHARED = False
+        user_client.get('/api/v1/users/me/')
+        # Изменение в другом воркере: сигнал здесь не срабатывает.
+        type(user).objects.filter(pk=user.pk).update(is_active=False)
+        assert user_client.get('/api/v1/users/me/').status_code == 401, \
+            'Проверьте, что без общего кэша пользователь читается из базы'
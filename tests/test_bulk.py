@@ -0,0 +1,84 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+URL = '/api/v1/titles/bulk/'
+
+
+def item(number, category='movie', genre=('drama', 'comedy')):
+    return {'name': f'Фильм {number}', 'year': 2000 + number % 20,
+            'description': 'Описание', 'category': category,
+            'genre': list(genre)}
+
+
+@pytest.mark.django_db
+class TestBulkCreate:
+
+    def test_admin_only(self, user_client, category, genres):
+        assert user_client.post(URL, [item(1)],
+                                format='json').status_code == 403
+
+    def test_created_in_constant_queries(self, admin_client, category,
+                                         genres):
+        from content.models import Title
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                URL, [item(number) for number in range(300)], format='json'
+            )
+        assert response.status_code == 201
+        assert response.json()['created'] == 300
+        # Как в test_query_count (10), но SQLite ограничивает число
+        # параметров запроса, и вставки делятся: произведения — 3 INSERT,
+        # жанры — 2, статистика отзывов — 4.
+        assert len(context.captured_queries) == 16, \
+            'Проверьте, что число запросов не зависит от размера пачки'
+
+        first = response.json()['results'][0]
+        title = Title.objects.get(pk=first['id'])
+        assert title.name == 'Фильм 0'
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama'
+        ]
+        detail = admin_client.get(f'/api/v1/titles/{title.id}/').json()
+        assert detail['category'] == {'name': 'Фильм', 'slug': 'movie'}
+        assert Title.objects.count() == 300
+
+    def test_errors_per_item(self, admin_client, category, genres):
+        from content.models import Title
+
+        response = admin_client.post(URL, [
+            item(1),
+            item(2, category='unknown'),
+            item(3, genre=['drama', 'western']),
+            {'name': 'Без года', 'category': 'movie', 'genre': []},
+            item(5),
+        ], format='json')
+        assert response.status_code == 207
+        results = response.json()['results']
+        assert response.json()['created'] == 2
+        assert 'id' in results[0] and 'id' in results[4]
+        assert 'category' in results[1]['errors']
+        assert len(results[2]['errors']['genre']) == 1
+        assert 'year' in results[3]['errors']
+        assert list(Title.objects.order_by('id').values_list(
+            'name', flat=True
+        )) == ['Фильм 1', 'Фильм 5']
+
+    def test_nothing_created(self, admin_client, category, genres):
+        response = admin_client.post(URL, [item(1, category='unknown')],
+                                     format='json')
+        assert response.status_code == 400
+        assert admin_client.post(URL, {}, format='json').status_code == 400
+
+    def test_visible_in_list_and_search(self, admin_client, guest_client,
+                                        category, genres):
+        guest_client.get('/api/v1/titles/')
+        admin_client.post(URL, [item(7)], format='json')
+        response = guest_client.get('/api/v1/titles/')
+        assert [title['name'] for title in response.json()['results']] == [
+            'Фильм 7'
+        ], 'Проверьте, что массовое создание сбрасывает кэш ответов'
+        response = guest_client.get('/api/v1/titles/', {'name': 'Фильм'})
+        assert len(response.json()['results']) == 1, \
+            'Проверьте, что созданные произведения попадают в индекс поиска'
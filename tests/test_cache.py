@@ -0,0 +1,56 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import get_cache_stats
+from api.checks import check_shared_cache
+from content.models import Genre, Review
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_repeated_get_served_from_cache(self, guest_client, title):
+        first = guest_client.get('/api/v1/titles/')
+        with CaptureQueriesContext(connection) as context:
+            second = guest_client.get('/api/v1/titles/')
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT'
+        assert len(context.captured_queries) == 0, \
+            'Проверьте, что повторный запрос не обращается к базе данных'
+        assert second.json() == first.json()
+        assert get_cache_stats(['titles']) == {
+            'titles': {'hits': 1, 'misses': 1}
+        }
+
+    def test_query_string_is_part_of_key(self, guest_client, title):
+        guest_client.get('/api/v1/titles/')
+        response = guest_client.get('/api/v1/titles/?year=1994')
+        assert response['X-Cache'] == 'MISS'
+
+    def test_review_invalidates_titles(self, guest_client, title, user):
+        guest_client.get(f'/api/v1/titles/{title.id}/')
+        Review.objects.create(title=title, author=user, text='Отзыв',
+                              score=9)
+        response = guest_client.get(f'/api/v1/titles/{title.id}/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 9, \
+            'Проверьте, что изменение отзывов сбрасывает кэш произведений'
+
+    def test_write_through_api_invalidates(self, admin_client, genres):
+        admin_client.get('/api/v1/genres/')
+        admin_client.delete('/api/v1/genres/drama/')
+        response = admin_client.get('/api/v1/genres/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == Genre.objects.count() == 1
+
+    def test_disabled_without_shared_cache(self, guest_client, title,
+                                           settings):
+        settings.CACHE_SHARED = False
+        guest_client.get('/api/v1/titles/')
+        response = guest_client.get('/api/v1/titles/')
+        assert 'X-Cache' not in response, \
+            'Проверьте, что без общего кэша ответы не кэшируются'
+        assert [message.id for message in check_shared_cache(None)] == [
+            'api.W001'
+        ]
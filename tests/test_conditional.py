@@ -0,0 +1,134 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.conditional import ConditionalGetMixin
+from content.models import Comment, Review, Title
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def _revalidate(self, client, url):
+        first = client.get(url)
+        assert first.status_code == 200
+        assert first.has_header('ETag')
+        with CaptureQueriesContext(connection) as context:
+            second = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        return first, second, context.captured_queries
+
+    def test_reviews_not_modified(self, guest_client, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        first, second, queries = self._revalidate(guest_client, url)
+        assert second.status_code == 304, \
+            'Проверьте, что при совпадении ETag возвращается 304'
+        assert len(queries) == 1, \
+            'Проверьте, что ответ 304 не выбирает и не сериализует отзывы'
+        assert first.has_header('Last-Modified')
+
+    def test_review_change_modifies_etag(self, guest_client, review,
+                                         another_user):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        etag = guest_client.get(url)['ETag']
+        Review.objects.create(title=review.title, author=another_user,
+                              text='Отзыв', score=3)
+        response = guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 2
+
+    def test_comment_change_modifies_etag(self, guest_client, comment,
+                                          user):
+        review = comment.review
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+               f'/comments/{comment.id}/')
+        etag = guest_client.get(url)['ETag']
+        comment = Comment.objects.get(pk=comment.pk)
+        comment.text = 'Изменённый комментарий'
+        comment.save()
+        response = guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['text'] == 'Изменённый комментарий'
+
+    def test_titles_list_not_modified(self, guest_client, title):
+        first, second, queries = self._revalidate(guest_client,
+                                                  '/api/v1/titles/')
+        assert second.status_code == 304
+        assert len(queries) == 0
+
+    def test_title_detail(self, guest_client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        first, second, queries = self._revalidate(guest_client, url)
+        assert second.status_code == 304
+        title.name = 'Новое название'
+        title.save()
+        response = guest_client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        assert response.status_code == 200, \
+            'Проверьте, что изменение произведения меняет ETag'
+
+    def test_if_modified_since(self, guest_client, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+        last_modified = guest_client.get(url)['Last-Modified']
+        response = guest_client.get(url,
+                                    HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+    def test_missing_title(self, guest_client):
+        assert guest_client.get('/api/v1/titles/999/reviews/'
+                                ).status_code == 404
+
+    def test_category_rename_modifies_title_etag(self, guest_client, title,
+                                                 category):
+        url = f'/api/v1/titles/{title.id}/'
+        etag = guest_client.get(url)['ETag']
+        category.name = 'Кинофильм'
+        category.save()
+        response = guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, \
+            'Проверьте, что переименование категории меняет ETag ' \
+            'произведения'
+        assert response.json()['category']['name'] == 'Кинофильм'
+
+    def test_username_change_modifies_review_etag(self, guest_client,
+                                                  review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+        etag = guest_client.get(url)['ETag']
+        author = review.author
+        author.username = 'renamed'
+        author.save()
+        response = guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, \
+            'Проверьте, что смена имени автора меняет ETag отзыва'
+        assert response.json()['author'] == 'renamed'
+
+    def test_titles_list_without_shared_cache(self, guest_client, title,
+                                              settings):
+        settings.CACHE_SHARED = False
+        etag = guest_client.get('/api/v1/titles/')['ETag']
+        assert guest_client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag
+                                ).status_code == 304
+        # Изменение в другом воркере: версии в его кэше здесь не видны.
+        Title.objects.filter(pk=title.pk).update(name='Новое название',
+                                                 updated_at=timezone.now())
+        response = guest_client.get('/api/v1/titles/',
+                                    HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, \
+            'Проверьте, что без общего кэша ETag списка строится по базе'
+
+    def test_etag_depends_on_format(self, guest_client, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        json_response = guest_client.get(url, HTTP_ACCEPT='application/json')
+        html_response = guest_client.get(url, HTTP_ACCEPT='text/html')
+        assert json_response['ETag'] != html_response['ETag'], \
+            'Проверьте, что ETag зависит от формата ответа'
+        assert 'Accept' in json_response['Vary']
+        assert guest_client.get(
+            url, HTTP_ACCEPT='text/html',
+            HTTP_IF_NONE_MATCH=json_response['ETag']
+        ).status_code == 200
+
+
+def test_get_condition_required():
+    with pytest.raises(ImproperlyConfigured):
+        type('View', (ConditionalGetMixin, ), {})
@@ -0,0 +1,26 @@
+import pytest
+from django.db import connection
+
+from api import signals
+
+
+@pytest.mark.django_db(transaction=True)
+def test_health_check_interval(settings, monkeypatch):
+    settings.DB_CONN_HEALTH_CHECKS = True
+    settings.DB_CONN_HEALTH_CHECK_INTERVAL = 10
+    monkeypatch.setitem(connection.settings_dict, 'CONN_MAX_AGE', 60)
+    connection.ensure_connection()
+    checks = []
+    monkeypatch.setattr(connection, 'is_usable',
+                        lambda: checks.append(1) or True)
+    now = [1000.0]
+    monkeypatch.setattr(signals.time, 'monotonic', lambda: now[0])
+
+    signals.check_connections()
+    signals.check_connections()
+    assert len(checks) == 1, \
+        'Проверьте, что соединение проверяется не чаще раза в интервал'
+    now[0] += 10
+    signals.check_connections()
+    assert len(checks) == 2
+
@@ -0,0 +1,91 @@
+import gzip
+import json
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+
+def read_lines(response):
+    content = b''.join(response.streaming_content)
+    if response.get('Content-Encoding') == 'gzip':
+        content = gzip.decompress(content)
+    return [json.loads(line) for line in content.decode().splitlines()]
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_admin_only(self, guest_client, user_client):
+        assert guest_client.get('/api/v1/export/titles/').status_code == 401
+        assert user_client.get('/api/v1/export/titles/').status_code == 403
+
+    def test_titles_match_api(self, admin_client, review):
+        response = admin_client.get('/api/v1/export/titles/')
+        assert response.status_code == 200
+        assert response.streaming, \
+            'Проверьте, что выгрузка отдаётся потоковым ответом'
+        assert response['Content-Type'] == 'application/x-ndjson'
+        [row] = read_lines(response)
+        detail = admin_client.get(f'/api/v1/titles/{review.title_id}/')
+        assert row.pop('updated_at')
+        assert row == detail.json(), \
+            'Проверьте, что строки выгрузки совпадают с ответом API'
+
+    def test_reviews_and_comments(self, admin_client, comment):
+        review = comment.review
+        [review_row] = read_lines(admin_client.get('/api/v1/export/reviews/'))
+        assert review_row['id'] == review.id
+        assert review_row['title_id'] == review.title_id
+        assert review_row['author'] == review.author.username
+        assert review_row['score'] == review.score
+
+        [comment_row] = read_lines(
+            admin_client.get('/api/v1/export/comments/')
+        )
+        assert comment_row['review_id'] == review.id
+        assert comment_row['title_id'] == review.title_id
+        assert comment_row['text'] == comment.text
+
+    def test_updated_since(self, admin_client, review, another_user):
+        from content.models import Review
+
+        old = timezone.now() - timedelta(days=30)
+        Review.objects.filter(pk=review.pk).update(updated_at=old)
+        fresh = Review.objects.create(title=review.title, text='Новый',
+                                      author=another_user, score=5)
+        since = (old + timedelta(days=1)).isoformat()
+        response = admin_client.get('/api/v1/export/reviews/',
+                                    {'updated_since': since})
+        assert [row['id'] for row in read_lines(response)] == [fresh.id]
+        response = admin_client.get('/api/v1/export/reviews/',
+                                    {'updated_since': old.date()})
+        assert len(read_lines(response)) == 2
+
+    def test_invalid_updated_since(self, admin_client):
+        response = admin_client.get('/api/v1/export/titles/',
+                                    {'updated_since': 'вчера'})
+        assert response.status_code == 400
+
+    def test_gzip(self, admin_client, title):
+        response = admin_client.get('/api/v1/export/titles/?gzip=1')
+        assert response['Content-Encoding'] == 'gzip'
+        assert [row['id'] for row in read_lines(response)] == [title.id]
+
+    @pytest.mark.parametrize('header, compressed', [
+        ('gzip, deflate', True),
+        ('deflate, gzip;q=0.5', True),
+        ('gzip;q=0', False),
+        ('x-gzip', True),
+        ('*', True),
+        ('gzip;q=0, *', False),
+        ('deflate, notgzip', False),
+        ('', False),
+    ])
+    def test_accept_encoding(self, admin_client, title, header, compressed):
+        response = admin_client.get('/api/v1/export/titles/',
+                                    HTTP_ACCEPT_ENCODING=header)
+        assert (response.get('Content-Encoding') == 'gzip') is compressed, \
+            'Проверьте, что Accept-Encoding разбирается с учётом q'
+        assert 'Accept-Encoding' in response['Vary']
+        assert [row['id'] for row in read_lines(response)] == [title.id]
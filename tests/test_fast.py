@@ -0,0 +1,61 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from content.models import Comment, Review, Title
+
+
+@pytest.fixture
+def catalog(title, review, comment, another_user, genres):
+    Title.objects.create(name='Без категории', year=2001)
+    second = Title.objects.create(name='Вторая', year=2002,
+                                  category=title.category,
+                                  description='Описание')
+    second.genre.set(genres[1:])
+    second_review = Review.objects.create(title=second, author=another_user,
+                                          text='Текст', score=3)
+    Comment.objects.create(review=review, author=review.author,
+                           text='Ответ')
+    Comment.objects.create(review=second_review, author=another_user,
+                           text='Ещё')
+    return title
+
+
+def both(client, settings, url):
+    settings.API_CACHE_ENABLED = False
+    settings.API_FAST_SERIALIZERS = False
+    expected = client.get(url)
+    settings.API_FAST_SERIALIZERS = True
+    with CaptureQueriesContext(connection) as context:
+        actual = client.get(url)
+    assert actual.status_code == expected.status_code == 200
+    return expected.content, actual.content, context.captured_queries
+
+
+@pytest.mark.django_db
+class TestFastSerializers:
+
+    @pytest.mark.parametrize('path', [
+        '/api/v1/titles/',
+        '/api/v1/titles/?pagination=cursor',
+        '/api/v1/titles/?genre=comedy',
+        '/api/v1/titles/?fields=id,genre,stats',
+        '/api/v1/titles/?omit=genre',
+        '/api/v1/titles/{title}/reviews/',
+        '/api/v1/titles/{title}/reviews/?pagination=cursor&fields=id,author',
+        '/api/v1/titles/{title}/reviews/{review}/comments/',
+        '/api/v1/titles/{title}/reviews/{review}/comments/?omit=text',
+    ])
+    def test_same_output(self, guest_client, settings, catalog, path):
+        review = Review.objects.filter(title=catalog).first()
+        url = path.format(title=catalog.id, review=review.id)
+        expected, actual, _ = both(guest_client, settings, url)
+        assert actual == expected, \
+            'Проверьте, что быстрая сериализация не меняет ответ'
+
+    def test_titles_without_orm_objects(self, guest_client, settings,
+                                        catalog):
+        _, _, queries = both(guest_client, settings, '/api/v1/titles/')
+        assert sum('FROM "content_genre"' in query['sql']
+                   for query in queries) == 1, \
+            'Проверьте, что жанры страницы загружаются одним запросом'
@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from content.models import Genre, Title
+
+
+@pytest.fixture
+def titles(category, genres):
+    drama, comedy = genres
+    horror = Genre.objects.create(name='Ужасы', slug='horror')
+    both = Title.objects.create(name='Драмеди', year=1990,
+                                category=category)
+    both.genre.set([drama, comedy])
+    only_drama = Title.objects.create(name='Драма', year=2000,
+                                      category=category)
+    only_drama.genre.set([drama])
+    scary = Title.objects.create(name='Ужас', year=2010)
+    scary.genre.set([horror])
+    return both, only_drama, scary
+
+
+def names(client, params):
+    response = client.get('/api/v1/titles/', params)
+    assert response.status_code == 200
+    return sorted(row['name'] for row in response.json()['results'])
+
+
+@pytest.mark.django_db
+class TestTitleFilter:
+
+    def test_genre_any(self, guest_client, titles):
+        response = guest_client.get('/api/v1/titles/',
+                                    {'genre': 'drama,comedy'})
+        assert response.json()['count'] == 2, \
+            'Проверьте, что произведение с двумя жанрами не повторяется'
+        assert names(guest_client, {'genre': 'comedy,horror'}) == [
+            'Драмеди', 'Ужас'
+        ]
+        assert names(guest_client, {'genre': 'comedy,unknown'}) == [
+            'Драмеди'
+        ]
+        assert names(guest_client, {'genre': 'unknown'}) == []
+
+    def test_genre_all(self, guest_client, titles):
+        assert names(guest_client, {'genre': 'drama,comedy',
+                                    'genre_match': 'all'}) == ['Драмеди']
+        assert names(guest_client, {'genre': 'drama',
+                                    'genre_match': 'all'}) == [
+            'Драма', 'Драмеди'
+        ]
+        assert names(guest_client, {'genre': 'drama,unknown',
+                                    'genre_match': 'all'}) == []
+        assert guest_client.get('/api/v1/titles/', {
+            'genre': 'drama', 'genre_match': 'some'
+        }).status_code == 400
+
+    def test_category_and_years(self, guest_client, titles):
+        assert names(guest_client, {'category': 'movie,unknown'}) == [
+            'Драма', 'Драмеди'
+        ]
+        assert names(guest_client, {'year_min': 1995}) == ['Драма', 'Ужас']
+        assert names(guest_client, {'year_min': 1995,
+                                    'year_max': 2005}) == ['Драма']
+
+    def test_exists_instead_of_join(self, guest_client, titles):
+        with CaptureQueriesContext(connection) as context:
+            guest_client.get('/api/v1/titles/', {'genre': 'drama,comedy',
+                                                 'genre_match': 'all'})
+        filtered = [query['sql'] for query in context.captured_queries
+                    if 'FROM "content_title"' in query['sql']
+                    and 'content_title_genre' in query['sql']]
+        assert filtered and all('EXISTS' in sql
+                                and 'JOIN "content_title_genre"' not in sql
+                                for sql in filtered), \
+            'Проверьте, что жанры проверяются подзапросом EXISTS'
@@ -0,0 +1,123 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from content.models import LeaderboardEntry, Review, Title
+
+
+@pytest.fixture(autouse=True)
+def leaderboard_settings(settings):
+    settings.LEADERBOARD_SIZE = 2
+    settings.LEADERBOARD_MIN_REVIEWS = 2
+
+
+@pytest.fixture
+def authors(django_user_model):
+    return [django_user_model.objects.create_user(
+        username=f'author{number}', email=f'author{number}@yamdb.fake'
+    ) for number in range(3)]
+
+
+def make_title(name, category, genres, scores, authors):
+    title = Title.objects.create(name=name, year=2000, category=category)
+    title.genre.set(genres)
+    for author, score in zip(authors, scores):
+        Review.objects.create(title=title, author=author, text='Отзыв',
+                              score=score)
+    return title
+
+
+def top(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return [(entry['name'], entry['rating']) for entry in response.json()]
+
+
+# Рейтинги обновляются после фиксации транзакции.
+@pytest.mark.django_db(transaction=True)
+class TestLeaderboards:
+
+    def test_top_follows_reviews(self, guest_client, category, genres,
+                                 authors):
+        make_title('Средний', category, genres, [6, 6], authors)
+        best = make_title('Лучший', category, genres, [9, 10], authors)
+        make_title('Один отзыв', category, genres, [10], authors)
+        make_title('Слабый', category, genres, [2, 3], authors)
+        url = '/api/v1/categories/movie/top/'
+        assert top(guest_client, url) == [('Лучший', 9.5), ('Средний', 6)], \
+            'Проверьте, что рейтинг учитывает минимум отзывов и длину списка'
+        assert top(guest_client, '/api/v1/genres/drama/top/') == top(
+            guest_client, url
+        )
+
+        review = Review.objects.get(title=best, author=authors[1])
+        review.score = 1
+        review.save()
+        assert top(guest_client, url) == [('Средний', 6), ('Лучший', 5)], \
+            'Проверьте, что изменение оценки пересчитывает рейтинг'
+
+        review.delete()
+        assert top(guest_client, url) == [('Средний', 6), ('Слабый', 2.5)], \
+            'Проверьте, что произведение выбывает, если отзывов мало'
+
+    def test_update_without_category_scan(self, guest_client, category,
+                                          genres, authors):
+        best = make_title('Лучший', category, genres, [9, 10], authors)
+        make_title('Средний', category, genres, [6, 6], authors)
+        make_title('Слабый', category, genres, [2, 3], authors)
+        review = Review.objects.get(title=best, author=authors[0])
+        review.score = 7
+        with CaptureQueriesContext(connection) as context:
+            review.save()
+        assert not [query for query in context.captured_queries
+                    if 'CAST' in query['sql']], \
+            'Проверьте, что рейтинг обновляется без перебора произведений'
+        assert top(guest_client, '/api/v1/categories/movie/top/') == [
+            ('Лучший', 8.5), ('Средний', 6)
+        ]
+
+    def test_title_changes(self, guest_client, category, genres, authors):
+        make_title('Первый', category, genres, [9, 9], authors)
+        second = make_title('Второй', category, genres, [8, 8], authors)
+        make_title('Третий', category, genres, [7, 7], authors)
+
+        second.genre.remove(genres[0])
+        assert top(guest_client, '/api/v1/genres/drama/top/') == [
+            ('Первый', 9), ('Третий', 7)
+        ], 'Проверьте, что рейтинг жанра следует за жанрами произведения'
+
+        Title.objects.get(name='Первый').delete()
+        assert top(guest_client, '/api/v1/categories/movie/top/') == [
+            ('Второй', 8), ('Третий', 7)
+        ], 'Проверьте, что место удалённого произведения занимает следующее'
+
+    def test_single_query_read(self, guest_client, category, genres,
+                               authors):
+        make_title('Первый', category, genres, [9, 9], authors)
+        # Первый запрос загружает таблицу slug → id категорий.
+        guest_client.get('/api/v1/categories/movie/top/')
+        with CaptureQueriesContext(connection) as context:
+            response = guest_client.get('/api/v1/categories/movie/top/')
+        assert response.json() == [{'rank': 1, 'id': response.json()[0]['id'],
+                                    'name': 'Первый', 'year': 2000,
+                                    'rating': 9.0, 'review_count': 2}]
+        assert len(context.captured_queries) == 1
+
+    def test_unknown_and_empty(self, guest_client, category):
+        assert guest_client.get(
+            '/api/v1/categories/unknown/top/'
+        ).status_code == 404
+        assert top(guest_client, '/api/v1/categories/movie/top/') == []
+
+    def test_refresh_command(self, guest_client, category, genres, authors,
+                             settings):
+        make_title('Первый', category, genres, [9, 9], authors)
+        make_title('Второй', category, genres, [8, 8, 8], authors)
+        settings.LEADERBOARD_MIN_REVIEWS = 3
+        call_command('refresh_leaderboards')
+        assert top(guest_client, '/api/v1/categories/movie/top/') == [
+            ('Второй', 8)
+        ]
+        assert LeaderboardEntry.objects.filter(genre__isnull=False).count() \
+            == 2, 'Проверьте, что команда пересчитывает рейтинги жанров'
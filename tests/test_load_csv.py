@@ -0,0 +1,68 @@
+import json
+import os
+import shutil
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from content.management.commands.load_csv import copy_rows
+from content.models import Comment, Review, Title
+from users.models import User
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'data')
+
+
+@pytest.mark.django_db
+class TestLoadCsv:
+
+    def test_load_csv(self, tmp_path):
+        call_command('load_csv', path=DATA_DIR, batch_size=10,
+                     state_file=str(tmp_path / 'state.json'))
+
+        assert Title.objects.count() == 32
+        assert Title.genre.through.objects.count() == 42
+        assert Review.objects.count() == 73, \
+            'Проверьте, что повторные отзывы автора на произведение ' \
+            'пропускаются'
+        assert Comment.objects.count() == 5
+        assert '\n' in Review.objects.get(pk=1).text
+        title = Title.objects.get(pk=1)
+        assert (title.score_sum, title.score_count) == (20, 2), \
+            'Проверьте, что после загрузки пересчитываются рейтинги'
+
+    def test_load_csv_resume(self, tmp_path):
+        data_dir = tmp_path / 'data'
+        shutil.copytree(DATA_DIR, data_dir)
+        User.objects.create_user(id=1, username='bingobongo')
+        (data_dir / '.load_csv_state.json').write_text(
+            json.dumps({'users.csv': 1})
+        )
+
+        call_command('load_csv', path=str(data_dir), resume=True)
+
+        assert User.objects.count() == 5
+        assert not Review.objects.filter(author_id=100).exists(), \
+            'Проверьте, что при продолжении загрузки восстанавливается ' \
+            'соответствие идентификаторов пользователей'
+        assert Review.objects.filter(author_id=1).exists()
+        assert not os.path.exists(data_dir / '.load_csv_state.json')
+
+    def test_load_csv_twice(self, tmp_path):
+        options = {'path': DATA_DIR,
+                   'state_file': str(tmp_path / 'state.json')}
+        call_command('load_csv', **options)
+        call_command('load_csv', **options)
+        assert Title.objects.count() == 32, \
+            'Проверьте, что повторная загрузка пропускает загруженные строки'
+        assert Comment.objects.count() == 5
+
+    def test_copy_rows(self):
+        user = User(id=7, username='a"b', email='', bio=None,
+                    first_name='', last_name='Ли', is_staff=True)
+        fields = [User._meta.get_field(name) for name in (
+            'id', 'username', 'email', 'bio', 'last_login', 'is_staff'
+        )]
+        assert copy_rows(fields, [user]).read() == \
+            '"7","a""b","",,,"true"\n', \
+            'Проверьте, что NULL передаётся в COPY пустым полем без кавычек'
@@ -0,0 +1,86 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import lookups
+from content.models import Category, Genre
+
+
+SLUG_LOOKUP = re.compile(r'"content_(genre|category)"\."slug" (=|IN)')
+
+
+def slug_queries(context):
+    return [query['sql'] for query in context.captured_queries
+            if SLUG_LOOKUP.search(query['sql'])]
+
+
+@pytest.mark.django_db
+class TestLookups:
+
+    def test_create_without_slug_queries(self, admin_client, category,
+                                         genres):
+        lookups.warm()
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', {
+                'name': 'Новое', 'year': 2000, 'category': 'movie',
+                'genre': ['drama', 'comedy']
+            })
+        assert response.status_code == 201
+        assert response.json()['category'] == 'movie'
+        assert sorted(response.json()['genre']) == ['comedy', 'drama']
+        assert not slug_queries(context), \
+            'Проверьте, что slug разрешаются без запросов к базе'
+
+    def test_unknown_slug(self, admin_client, category, genres):
+        response = admin_client.post('/api/v1/titles/', {
+            'name': 'Новое', 'year': 2000, 'category': 'movie',
+            'genre': ['drama', 'western']
+        })
+        assert response.status_code == 400
+        assert response.json() == {
+            'genre': ['Объект с slug=western не существует.']
+        }
+
+    def test_invalidated_on_change(self, category):
+        assert lookups.resolve(Category, 'book') is None
+        book = Category.objects.create(name='Книга', slug='book')
+        assert lookups.slug_ids(Category)['book'] == book.id, \
+            'Проверьте, что таблица перечитывается при изменении категорий'
+        book.slug = 'books'
+        book.save()
+        assert lookups.resolve(Category, 'book') is None
+        assert lookups.resolve(Category, 'books') == book.id
+
+    def test_missing_slug_checked_in_database(self, genres):
+        lookups.warm()
+        Genre.objects.bulk_create([Genre(name='Вестерн', slug='western')])
+        assert lookups.resolve(Genre, 'western'), \
+            'Проверьте, что отсутствующий в таблице slug ищется в базе'
+
+    def test_filters(self, guest_client, title):
+        lookups.warm()
+        with CaptureQueriesContext(connection) as context:
+            response = guest_client.get('/api/v1/titles/',
+                                        {'genre': 'drama',
+                                         'category': 'movie'})
+        assert [row['id'] for row in response.json()['results']] == [
+            title.id
+        ]
+        assert not slug_queries(context), \
+            'Проверьте, что фильтры не соединяют категории и жанры по slug'
+
+        assert guest_client.get(
+            '/api/v1/titles/', {'category': 'unknown'}
+        ).json()['results'] == []
+
+    def test_no_table_without_shared_cache(self, category, settings):
+        lookups.warm()
+        settings.CACHE_SHARED = False
+        # Переименование в другом воркере: сброс версии в его локальном
+        # кэше этому процессу не виден.
+        Category.objects.filter(slug='movie').update(slug='film')
+        assert lookups.resolve(Category, 'movie') is None, \
+            'Проверьте, что без общего кэша slug ищется в базе'
+        assert lookups.resolve(Category, 'film') == category.id
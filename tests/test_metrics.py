@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from api import metrics
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_metrics_per_route(self, guest_client, review, settings,
+                               tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        metrics._registry.clear()
+        guest_client.get(f'/api/v1/titles/{review.title_id}/reviews/')
+        guest_client.get(f'/api/v1/titles/{review.title_id}/reviews/')
+
+        response = guest_client.get('/metrics/')
+        assert response.status_code == 200
+        text = response.content.decode()
+        assert 'api_requests_total{route="review-list"} 2' in text, \
+            'Проверьте, что запросы учитываются по имени маршрута'
+        assert ('api_request_duration_seconds_bucket'
+                '{route="review-list",le="+Inf"} 2') in text
+        assert 'api_db_queries_total{route="review-list"} 6' in text
+        assert list(tmp_path.glob('*.json')), \
+            'Проверьте, что метрики процесса сохраняются в METRICS_DIR'
+
+    def test_metrics_merged_across_processes(self, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        metrics._registry.clear()
+        other = metrics._empty()
+        other.update(count=3, queries=9)
+        (tmp_path / 'other-worker.json').write_text(
+            json.dumps({'title-list': other})
+        )
+        metrics.observe('title-list', 0.01, 2, 0.001)
+        merged = metrics.collect()
+        assert merged['title-list']['count'] == 4
+        assert merged['title-list']['queries'] == 11
+
+    def test_forked_worker_has_own_file(self, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        metrics._registry.clear()
+        metrics.observe('title-list', 0.01, 2, 0.001)
+        metrics.flush(force=True)
+        pid = os.fork()
+        if pid == 0:
+            metrics.observe('genre-list', 0.01, 1, 0.001)
+            metrics.flush(force=True)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        files = {path.name: json.loads(path.read_text())
+                 for path in tmp_path.glob('*.json')}
+        assert len(files) == 2, \
+            'Проверьте, что воркер после fork пишет метрики в свой файл'
+        assert {'genre-list'} in [set(registry)
+                                  for registry in files.values()]
+
+    def test_exited_worker_moved_to_archive(self, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        metrics._registry.clear()
+        metrics.observe('title-list', 0.01, 2, 0.001)
+        pid = os.fork()
+        if pid == 0:
+            metrics.observe('title-list', 0.01, 1, 0.001)
+            metrics.flush(force=True)
+            os._exit(0)
+        os.waitpid(pid, 0)
+
+        for _ in range(2):
+            merged = metrics.collect()
+            assert merged['title-list']['count'] == 2, \
+                'Проверьте, что метрики завершившегося воркера сохраняются'
+        names = {path.name for path in tmp_path.glob('*.json')}
+        assert metrics.ARCHIVE_FILE in names
+        assert not any(f'-{pid}-' in name for name in names), \
+            'Проверьте, что файл завершившегося воркера удаляется'
+
+    def test_metrics_restricted(self, guest_client, settings):
+        settings.METRICS_ALLOWED_IPS = ['10.0.0.1']
+        assert guest_client.get('/metrics/').status_code == 403
@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from users.models import OutboxMessage, OutboxStatusChoices
+
+
+class BrokenBackend:
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def open(self):
+        raise ConnectionError('SMTP недоступен')
+
+    def close(self):
+        pass
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_email_endpoint_only_enqueues(self, guest_client, settings):
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.' \
+                                 'EmailBackend'
+        response = guest_client.post('/api/v1/auth/email/',
+                                     {'email': 'new@yamdb.fake'})
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, \
+            'Проверьте, что письмо не отправляется в ходе запроса'
+        message = OutboxMessage.objects.get()
+        assert message.to == 'new@yamdb.fake'
+        assert message.status == OutboxStatusChoices.PENDING
+
+    def test_worker_sends_batch(self, guest_client, settings):
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.' \
+                                 'EmailBackend'
+        for index in range(3):
+            guest_client.post('/api/v1/auth/email/',
+                              {'email': f'user{index}@yamdb.fake'})
+
+        call_command('run_mail_worker', once=True, batch_size=2)
+
+        assert len(mail.outbox) == 3
+        assert not OutboxMessage.objects.exclude(
+            status=OutboxStatusChoices.SENT
+        ).exists(), 'Проверьте, что обработчик разбирает всю очередь'
+        assert not OutboxMessage.objects.exclude(body='').exists(), \
+            'Проверьте, что код подтверждения не хранится после отправки'
+
+    def test_worker_retries_with_backoff(self, guest_client, settings):
+        settings.EMAIL_BACKEND = 'tests.test_outbox.BrokenBackend'
+        settings.MAIL_WORKER_MAX_ATTEMPTS = 2
+        guest_client.post('/api/v1/auth/email/', {'email': 'a@yamdb.fake'})
+        message = OutboxMessage.objects.get()
+
+        call_command('run_mail_worker', once=True)
+        message.refresh_from_db()
+        assert message.attempts == 1
+        assert message.status == OutboxStatusChoices.PENDING
+        assert 'SMTP' in message.last_error
+
+        OutboxMessage.objects.update(next_attempt_at=message.created)
+        call_command('run_mail_worker', once=True)
+        message.refresh_from_db()
+        assert message.status == OutboxStatusChoices.FAILED, \
+            'Проверьте, что после исчерпания попыток письмо помечается ' \
+            'неотправленным'
+        assert message.body == ''
+
+    def test_worker_purges_old_messages(self, guest_client, settings):
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.' \
+                                 'EmailBackend'
+        for index in range(2):
+            guest_client.post('/api/v1/auth/email/',
+                              {'email': f'user{index}@yamdb.fake'})
+        call_command('run_mail_worker', once=True)
+        old = OutboxMessage.objects.first()
+        OutboxMessage.objects.filter(pk=old.pk).update(
+            created=timezone.now() - timedelta(
+                seconds=settings.MAIL_WORKER_RETENTION + 1
+            )
+        )
+        guest_client.post('/api/v1/auth/email/', {'email': 'new@yamdb.fake'})
+
+        call_command('run_mail_worker', once=True)
+        assert not OutboxMessage.objects.filter(pk=old.pk).exists(), \
+            'Проверьте, что старые отправленные письма удаляются'
+        assert OutboxMessage.objects.count() == 2
@@ -0,0 +1,98 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.pagination import CursorPagination
+
+from api.pagination import CachedCountPageNumberPagination
+from content.models import Review, Title
+
+
+@pytest.mark.django_db
+class TestPagination:
+
+    def _reviews(self, title, django_user_model, count):
+        for index in range(count):
+            author = django_user_model.objects.create_user(
+                username=f'reviewer{index}',
+                email=f'reviewer{index}@yamdb.fake'
+            )
+            Review.objects.create(title=title, author=author, text='Отзыв',
+                                  score=5)
+
+    def test_reviews_page_number_by_default(self, guest_client, title):
+        response = guest_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert 'count' in response.json(), \
+            'Проверьте, что по умолчанию используется постраничная пагинация'
+
+    def test_page_number_ordered(self, guest_client, django_user_model,
+                                 title):
+        self._reviews(title, django_user_model, 3)
+        Review.objects.filter(author__username='reviewer0').update(
+            pub_date=Review.objects.get(
+                author__username='reviewer2'
+            ).pub_date
+        )
+        response = guest_client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert [item['id'] for item in response.json()['results']] == list(
+            Review.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        ), 'Проверьте, что постраничный режим сортирует отзывы'
+
+        Title.objects.create(name='Другое', year=2001,
+                             category=title.category)
+        ids = [item['id'] for item in guest_client.get(
+            '/api/v1/titles/'
+        ).json()['results']]
+        assert ids == sorted(ids)
+        assert [item['id'] for item in guest_client.get(
+            '/api/v1/titles/?fields=id'
+        ).json()['results']] == ids
+
+    def test_reviews_cursor(self, guest_client, django_user_model, title):
+        self._reviews(title, django_user_model, 3)
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        with CaptureQueriesContext(connection) as context:
+            response = guest_client.get(url)
+        data = response.json()
+        assert 'count' not in data
+        assert not any('COUNT(' in query['sql']
+                       for query in context.captured_queries), \
+            'Проверьте, что курсорная пагинация не выполняет COUNT(*)'
+        assert [item['id'] for item in data['results']] == sorted(
+            Review.objects.values_list('id', flat=True), reverse=True
+        )
+
+    def test_reviews_cursor_follows_next(self, guest_client,
+                                         django_user_model, title,
+                                         monkeypatch):
+        monkeypatch.setattr(CursorPagination, 'page_size', 1)
+        self._reviews(title, django_user_model, 3)
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        seen = []
+        while url:
+            data = guest_client.get(url).json()
+            seen += [item['id'] for item in data['results']]
+            url = data['next']
+        assert len(seen) == 3, \
+            'Проверьте, что ссылка next курсорной пагинации обходит все отзывы'
+
+    def test_titles_count_cached(self, guest_client, title):
+        guest_client.get('/api/v1/titles/')
+        Title.objects.create(name='Другое', year=2000)
+        with CaptureQueriesContext(connection) as context:
+            response = guest_client.get('/api/v1/titles/')
+        assert response.json()['count'] == 1, \
+            'Проверьте, что количество произведений берётся из кэша'
+        assert len(context.captured_queries) == 2
+
+    def test_titles_page_past_cached_count(self, guest_client, title,
+                                           monkeypatch):
+        monkeypatch.setattr(CachedCountPageNumberPagination, 'page_size', 1)
+        guest_client.get('/api/v1/titles/')
+        Title.objects.create(name='Другое', year=2000)
+        response = guest_client.get('/api/v1/titles/?page=2')
+        assert response.status_code == 200, \
+            'Проверьте, что страница, появившаяся после записи, не даёт 404'
+        assert response.json()['count'] == 2
+        assert guest_client.get('/api/v1/titles/?page=3').status_code == 404
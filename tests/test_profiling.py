@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+
+@pytest.mark.django_db
+class TestProfiling:
+
+    def test_admin_request_profiled(self, admin_client, title, settings,
+                                    tmp_path):
+        settings.PROFILE_DIR = str(tmp_path)
+        response = admin_client.get('/api/v1/titles/', HTTP_X_PROFILE='1')
+        assert response.status_code == 200
+        profile_id = response['X-Profile-Id']
+        assert (tmp_path / f'{profile_id}.pstats').exists(), \
+            'Проверьте, что сохраняется файл pstats'
+        summary = json.loads((tmp_path / f'{profile_id}.json').read_text())
+        assert summary['path'] == '/api/v1/titles/'
+        assert summary['sql_count'] == len(summary['sql']) > 0
+        assert summary['functions']
+
+    def test_query_flag(self, admin_client, settings, tmp_path):
+        settings.PROFILE_DIR = str(tmp_path)
+        response = admin_client.get('/api/v1/genres/?_profile=1')
+        assert response.has_header('X-Profile-Id')
+
+    def test_non_admin_not_profiled(self, user_client, guest_client,
+                                    settings, tmp_path):
+        settings.PROFILE_DIR = str(tmp_path)
+        for client in (user_client, guest_client):
+            response = client.get('/api/v1/titles/', HTTP_X_PROFILE='1')
+            assert not response.has_header('X-Profile-Id'), \
+                'Проверьте, что профилирование доступно только администратору'
+        assert not list(tmp_path.iterdir())
@@ -0,0 +1,247 @@
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from content.models import Comment, Review, Title
+
+SIZES = [1, 10]
+
+# Запись произведения на SQLite дополнительно обновляет таблицу FTS5
+# (content.search), поэтому бюджеты записи учитывают эти запросы.
+# Создание отзыва выполняется в транзакции (внутри теста это SAVEPOINT и
+# RELEASE SAVEPOINT) вместе с обновлением рейтинга.
+# Чтение произведения, отзывов и комментариев начинается с выборки ревизии
+# произведения для ETag (api.conditional), а запись увеличивает ревизию.
+# Строка статистики отзывов (TitleStats) создаётся и удаляется вместе с
+# произведением и обновляется отдельным UPDATE при создании отзыва.
+# Изменение оценок, категории или жанров произведения проверяет его места
+# в рейтингах лучших (content.leaderboards) после фиксации транзакции:
+# без отзывов это выборка произведения и его мест в рейтингах. Отложенные
+# действия выполняются и учитываются в бюджете запроса.
+# Изменение и удаление категории или жанра увеличивает ревизию их
+# произведений (их названия выводятся в ответах с произведениями).
+# Slug категорий и жанров разрешаются по таблицам в памяти (api.lookups);
+# в начале каждого теста кэш версий пуст, и таблицы загружаются заново.
+# Потоковые ответы (выгрузка) читаются целиком внутри замера. Выгрузка
+# произведений дополнительно выбирает их жанры одним запросом на пачку.
+# Массовое создание выполняет постоянное число запросов; на SQLite пачка
+# из сотен произведений делится на несколько INSERT (tests/test_bulk.py).
+
+
+def _fill_titles(count, category, genres):
+    for index in range(count):
+        title = Title.objects.create(name=f'Произведение {index}',
+                                     year=2000, category=category)
+        title.genre.set(genres)
+
+
+def _fill_reviews(count, title, django_user_model):
+    for index in range(count):
+        author = django_user_model.objects.create_user(
+            username=f'reviewer{index}', email=f'reviewer{index}@yamdb.fake'
+        )
+        Review.objects.create(title=title, author=author, text='Отзыв',
+                              score=5)
+
+
+def _fill_comments(count, review, django_user_model):
+    for index in range(count):
+        author = django_user_model.objects.create_user(
+            username=f'commenter{index}',
+            email=f'commenter{index}@yamdb.fake'
+        )
+        Comment.objects.create(review=review, author=author,
+                               text='Комментарий')
+
+
+def _run_on_commit():
+    """
+    Выполняет отложенные до фиксации транзакции действия: тест работает
+    внутри транзакции, которая не фиксируется.
+    """
+    while connection.run_on_commit:
+        callbacks, connection.run_on_commit = connection.run_on_commit, []
+        for _, callback in callbacks:
+            callback()
+
+
+def _num_queries(client, method, url, data=None):
+    _run_on_commit()
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data=data, format='json')
+        if response.streaming:
+            b''.join(response.streaming_content)
+        _run_on_commit()
+    assert response.status_code < 400, response.content
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestQueryCount:
+
+    @pytest.mark.parametrize('size', SIZES)
+    def test_titles_list(self, guest_client, category, genres, size):
+        _fill_titles(size, category, genres)
+        assert _num_queries(guest_client, 'get', '/api/v1/titles/') == 3, \
+            'Проверьте, что список произведений не порождает N+1 запросов'
+
+    def test_titles_detail(self, guest_client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        assert _num_queries(guest_client, 'get', url) == 3
+
+    def test_titles_create(self, admin_client, category, genres):
+        data = {'name': 'Новое', 'year': 2000, 'category': 'movie',
+                'genre': ['drama', 'comedy']}
+        assert _num_queries(admin_client, 'post', '/api/v1/titles/',
+                            data) == 14
+
+    def test_titles_update(self, admin_client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        assert _num_queries(admin_client, 'patch', url,
+                            {'name': 'Новое'}) == 10
+
+    def test_titles_destroy(self, admin_client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        assert _num_queries(admin_client, 'delete', url) == 10
+
+    @pytest.mark.parametrize('size', SIZES)
+    def test_reviews_list(self, guest_client, django_user_model, title,
+                          size):
+        _fill_reviews(size, title, django_user_model)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        assert _num_queries(guest_client, 'get', url) == 3, \
+            'Проверьте, что список отзывов не порождает N+1 запросов'
+
+    def test_reviews_detail(self, guest_client, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+        assert _num_queries(guest_client, 'get', url) == 2
+
+    def test_reviews_create(self, user_client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        assert _num_queries(user_client, 'post', url,
+                            {'text': 'Отзыв', 'score': 7}) == 9
+
+    @pytest.mark.parametrize('size', SIZES)
+    def test_comments_list(self, guest_client, django_user_model, review,
+                           size):
+        _fill_comments(size, review, django_user_model)
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+               f'/comments/')
+        assert _num_queries(guest_client, 'get', url) == 4, \
+            'Проверьте, что список комментариев не порождает N+1 запросов'
+
+    def test_comments_detail(self, guest_client, comment):
+        review = comment.review
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+               f'/comments/{comment.id}/')
+        assert _num_queries(guest_client, 'get', url) == 3
+
+    def test_comments_create(self, user_client, review):
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+               f'/comments/')
+        assert _num_queries(user_client, 'post', url,
+                            {'text': 'Комментарий'}) == 4
+
+    @pytest.mark.parametrize('resource', ['categories', 'genres'])
+    def test_catalog_list(self, guest_client, category, genres, resource):
+        url = f'/api/v1/{resource}/'
+        assert _num_queries(guest_client, 'get', url) == 2
+
+    def test_categories_create(self, admin_client):
+        assert _num_queries(admin_client, 'post', '/api/v1/categories/',
+                            {'name': 'Книга', 'slug': 'book'}) == 4
+
+    def test_genres_destroy(self, admin_client, genres):
+        assert _num_queries(admin_client, 'delete',
+                            '/api/v1/genres/drama/') == 6
+
+    @pytest.mark.parametrize('size', SIZES)
+    def test_users_list(self, admin_client, django_user_model, size):
+        for index in range(size):
+            django_user_model.objects.create_user(
+                username=f'user{index}', email=f'user{index}@yamdb.fake'
+            )
+        assert _num_queries(admin_client, 'get', '/api/v1/users/') == 3
+
+    def test_users_detail(self, admin_client, user):
+        url = f'/api/v1/users/{user.username}/'
+        assert _num_queries(admin_client, 'get', url) == 2
+
+    def test_users_me(self, user_client):
+        assert _num_queries(user_client, 'get', '/api/v1/users/me/') == 1
+
+    def test_auth_email(self, guest_client, user):
+        assert _num_queries(guest_client, 'post', '/api/v1/auth/email/',
+                            {'email': user.email}) == 2
+
+    @pytest.mark.parametrize('size', SIZES)
+    def test_titles_bulk(self, admin_client, category, genres, size):
+        data = [{'name': f'Новое {index}', 'year': 2000,
+                 'category': 'movie', 'genre': ['drama', 'comedy']}
+                for index in range(size)]
+        assert _num_queries(admin_client, 'post', '/api/v1/titles/bulk/',
+                            data) == 10, \
+            'Проверьте, что массовое создание не зависит от размера пачки'
+
+    def test_titles_stats(self, guest_client, review):
+        url = f'/api/v1/titles/{review.title_id}/stats/'
+        assert _num_queries(guest_client, 'get', url) == 2
+
+    @pytest.mark.parametrize('resource', ['categories', 'genres'])
+    def test_catalog_top(self, guest_client, title, resource):
+        slug = 'movie' if resource == 'categories' else 'drama'
+        url = f'/api/v1/{resource}/{slug}/top/'
+        assert _num_queries(guest_client, 'get', url) == 2
+
+    @pytest.mark.parametrize('size', SIZES)
+    @pytest.mark.parametrize('resource', ['titles', 'reviews', 'comments'])
+    def test_export(self, admin_client, django_user_model, comment,
+                    resource, size):
+        _fill_reviews(size, comment.review.title, django_user_model)
+        _fill_comments(size, comment.review, django_user_model)
+        assert _num_queries(admin_client, 'get',
+                            f'/api/v1/export/{resource}/') == {
+            'titles': 3, 'reviews': 2, 'comments': 2
+        }[resource], \
+            'Проверьте, что выгрузка не порождает N+1 запросов'
+
+    def test_reviews_update(self, user_client, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+        assert _num_queries(user_client, 'patch', url, {'score': 3}) == 8
+
+    def test_reviews_destroy(self, user_client, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+        assert _num_queries(user_client, 'delete', url) == 9
+
+    def test_comments_update(self, admin_client, comment):
+        review = comment.review
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+               f'/comments/{comment.id}/')
+        assert _num_queries(admin_client, 'patch', url,
+                            {'text': 'Другой'}) == 5
+
+    def test_comments_destroy(self, admin_client, comment):
+        review = comment.review
+        url = (f'/api/v1/titles/{review.title_id}/reviews/{review.id}'
+               f'/comments/{comment.id}/')
+        assert _num_queries(admin_client, 'delete', url) == 5
+
+    def test_users_update(self, admin_client, user):
+        url = f'/api/v1/users/{user.username}/'
+        assert _num_queries(admin_client, 'patch', url,
+                            {'bio': 'Био'}) == 4
+
+    def test_users_destroy(self, admin_client, user):
+        url = f'/api/v1/users/{user.username}/'
+        assert _num_queries(admin_client, 'delete', url) == 8
+
+    def test_users_me_update(self, user_client):
+        assert _num_queries(user_client, 'patch', '/api/v1/users/me/',
+                            {'bio': 'Био'}) == 3
+
+    def test_auth_token(self, guest_client, user):
+        data = {'email': user.email,
+                'confirmation_code': default_token_generator.make_token(user)}
+        assert _num_queries(guest_client, 'post', '/api/v1/auth/token/',
+                            data) == 1
@@ -0,0 +1,91 @@
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError
+
+from content import leaderboards
+from content.models import Review, Title
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_rating_follows_reviews(self, title, user, another_user):
+        first = Review.objects.create(title=title, author=user, text='a',
+                                      score=4)
+        Review.objects.create(title=title, author=another_user, text='b',
+                              score=10)
+        title.refresh_from_db()
+        assert (title.score_sum, title.score_count) == (14, 2), \
+            'Проверьте, что создание отзыва обновляет счётчики рейтинга'
+        assert title.rating == 7
+
+        first = Review.objects.get(pk=first.pk)
+        first.score = 6
+        first.save()
+        title.refresh_from_db()
+        assert title.rating == 8, \
+            'Проверьте, что изменение оценки корректирует рейтинг'
+
+        first.delete()
+        title.refresh_from_db()
+        assert (title.score_sum, title.score_count) == (10, 1), \
+            'Проверьте, что удаление отзыва корректирует рейтинг'
+
+    def test_title_save_keeps_counters(self, title, user):
+        stale = Title.objects.get(pk=title.pk)
+        Review.objects.create(title=title, author=user, text='a', score=4)
+        stale.name = 'Новое название'
+        stale.save()
+        title.refresh_from_db()
+        assert (title.score_sum, title.score_count) == (4, 1), \
+            'Проверьте, что сохранение произведения не затирает счётчики'
+
+    def test_rating_in_api(self, guest_client, review):
+        response = guest_client.get(f'/api/v1/titles/{review.title_id}/')
+        assert response.status_code == 200
+        assert response.json()['rating'] == 8.0
+        assert 'score_sum' not in response.json()
+
+    def test_recalculate_ratings(self, review):
+        Title.objects.filter(pk=review.title_id).update(score_sum=100,
+                                                        score_count=3)
+        call_command('recalculate_ratings')
+        title = Title.objects.get(pk=review.title_id)
+        assert (title.score_sum, title.score_count) == (8, 1), \
+            'Проверьте, что команда пересчитывает счётчики рейтинга'
+
+    def test_recalculate_ratings_in_batches(self, review):
+        Title.objects.create(name='Другое', year=2001)
+        Title.objects.update(score_sum=100, score_count=3)
+        call_command('recalculate_ratings', batch_size=1)
+        assert list(Title.objects.order_by('id').values_list(
+            'score_sum', 'score_count'
+        )) == [(8, 1), (0, 0)], \
+            'Проверьте, что пересчёт проходит все диапазоны произведений'
+
+
+@pytest.mark.django_db
+class TestReviewUniqueness:
+
+    def test_second_review_rejected(self, user_client, review):
+        response = user_client.post(
+            f'/api/v1/titles/{review.title_id}/reviews/',
+            {'text': 'Ещё отзыв', 'score': 1}
+        )
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Вы уже оставили отзыв на это произведение.']
+        }, 'Проверьте, что повторный отзыв отклоняется с прежним сообщением'
+        title = Title.objects.get(pk=review.title_id)
+        assert (title.score_sum, title.score_count) == (8, 1)
+
+    def test_other_integrity_errors_not_hidden(self, user_client, title,
+                                               monkeypatch):
+        def fail(title_id):
+            raise IntegrityError('unique_category_rank')
+
+        monkeypatch.setattr(leaderboards, 'update_title', fail)
+        with pytest.raises(IntegrityError):
+            user_client.post(f'/api/v1/titles/{title.id}/reviews/',
+                             {'text': 'Отзыв', 'score': 1})
+        assert not Review.objects.exists()
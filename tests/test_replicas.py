@@ -0,0 +1,112 @@
+import pytest
+from django.db import OperationalError, connections
+
+from api import lookups, replicas
+
+
+@pytest.fixture
+def replica_title(title, user, settings):
+    """
+    Реплика содержит произведение, но ещё не получила отзывы.
+    """
+    from content.models import Category, Genre, Title
+    from users.models import User
+
+    settings.DATABASE_REPLICAS = ['replica']
+    Category.objects.using('replica').bulk_create([title.category])
+    Genre.objects.using('replica').bulk_create(list(title.genre.all()))
+    Title.objects.using('replica').bulk_create([title])
+    User.objects.using('replica').bulk_create([user])
+    yield title
+    replicas._unavailable.clear()
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+class TestReplicaRouting:
+
+    def _count(self, client, title):
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200
+        return response.json()['count']
+
+    def test_safe_requests_read_from_replica(self, guest_client,
+                                             replica_title, review):
+        assert self._count(guest_client, replica_title) == 0, \
+            'Проверьте, что GET-запросы читают данные из реплики'
+
+    def test_writer_reads_own_writes(self, user_client, guest_client,
+                                     replica_title):
+        response = user_client.post(
+            f'/api/v1/titles/{replica_title.id}/reviews/',
+            {'text': 'Отзыв', 'score': 7}
+        )
+        assert response.status_code == 201
+        assert self._count(user_client, replica_title) == 1, \
+            'Проверьте, что после записи клиент читает из основной базы'
+        assert self._count(guest_client, replica_title) == 0
+
+    def test_sticky_window_disabled(self, user_client, replica_title,
+                                    settings):
+        settings.REPLICA_STICKY_SECONDS = 0
+        user_client.post(f'/api/v1/titles/{replica_title.id}/reviews/',
+                         {'text': 'Отзыв', 'score': 7})
+        assert self._count(user_client, replica_title) == 0
+
+    def test_unavailable_replica_falls_back(self, guest_client,
+                                            replica_title, review,
+                                            monkeypatch):
+        def refuse():
+            raise OperationalError('replica is down')
+
+        monkeypatch.setattr(connections['replica'], 'ensure_connection',
+                            refuse)
+        assert self._count(guest_client, replica_title) == 1, \
+            'Проверьте, что при недоступной реплике чтение идёт из основной'
+        assert 'replica' in replicas._unavailable
+
+    def test_outside_requests_use_primary(self, replica_title, review):
+        from content.models import Review
+
+        assert Review.objects.filter(title=replica_title).count() == 1
+        assert replicas.get_read_alias() is None
+
+    def test_no_replicas_without_shared_cache(self, guest_client,
+                                              replica_title, review,
+                                              settings):
+        settings.CACHE_SHARED = False
+        assert self._count(guest_client, replica_title) == 1, \
+            'Проверьте, что без общего кэша чтение идёт из основной базы'
+
+    def test_cache_fill_reads_primary(self, guest_client, replica_title):
+        from content.models import Category, Title
+
+        Title.objects.create(name='Только в основной', year=2000,
+                             category=replica_title.category)
+        response = guest_client.get('/api/v1/titles/')
+        assert response.json()['count'] == 2, \
+            'Проверьте, что кэш ответов заполняется из основной базы'
+
+        Category.objects.create(name='Новая', slug='new')
+        lookups._tables.clear()
+        replicas.set_read_alias('replica')
+        try:
+            assert 'new' in lookups.slug_ids(Category), \
+                'Проверьте, что таблицы slug → id читаются из основной базы'
+        finally:
+            replicas.set_read_alias(None)
+
+
+def test_anonymous_client_key_uses_real_ip(rf):
+    first = rf.get('/', REMOTE_ADDR='10.0.0.2', HTTP_X_REAL_IP='1.1.1.1')
+    second = rf.get('/', REMOTE_ADDR='10.0.0.2', HTTP_X_REAL_IP='2.2.2.2')
+    assert replicas.client_key(first) != replicas.client_key(second), \
+        'Проверьте, что анонимные клиенты за nginx различаются по X-Real-IP'
+
+
+def test_no_migrations_on_replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica']
+    router = replicas.ReplicaRouter()
+    assert router.allow_migrate('replica', 'content') is False, \
+        'Проверьте, что migrate не меняет схему реплик'
+    assert router.allow_migrate('default', 'content') is None
+
@@ -0,0 +1,49 @@
+import pytest
+
+from content.models import Title
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+
+    def _names(self, client, query):
+        response = client.get('/api/v1/titles/', {'name': query})
+        assert response.status_code == 200
+        return [item['name'] for item in response.json()['results']]
+
+    def test_prefix_search_is_case_insensitive(self, guest_client, title):
+        Title.objects.create(name='Крёстный отец', year=1972)
+        assert self._names(guest_client, 'побе') == ['Побег из Шоушенка'], \
+            'Проверьте, что поиск по названию работает по началу слова ' \
+            'без учёта регистра'
+
+    def test_results_ranked(self, guest_client):
+        Title.objects.create(name='Отец и сын, отец и дочь', year=2000)
+        Title.objects.create(name='Крёстный отец', year=1972)
+        Title.objects.create(name='Отец отца отца', year=2000)
+        names = self._names(guest_client, 'отец')
+        assert len(names) == 3
+        assert names[0] == 'Крёстный отец', \
+            'Проверьте, что результаты упорядочены по релевантности'
+
+    def test_index_follows_title_changes(self, guest_client, title):
+        title.name = 'Зелёная миля'
+        title.save()
+        assert self._names(guest_client, 'побег') == []
+        assert self._names(guest_client, 'миля') == ['Зелёная миля']
+        title.delete()
+        assert self._names(guest_client, 'миля') == []
+
+    @pytest.mark.parametrize('query', ['тец', 'ОТЕЦ И', 'ец о', 'от', 'ё',
+                                       'сын отец', 'Шоушенка'])
+    def test_substring_semantics(self, guest_client, title, query):
+        for name in ('Крёстный отец', 'Отец и сын, отец и дочь',
+                     'Отец отца отца'):
+            Title.objects.create(name=name, year=2000)
+        expected = sorted(
+            name for name in Title.objects.values_list('name', flat=True)
+            if query.lower() in name.lower()
+        )
+        assert sorted(self._names(guest_client, query)) == expected, \
+            'Проверьте, что поиск находит названия, содержащие строку ' \
+            'без учёта регистра, как icontains на PostgreSQL'
@@ -0,0 +1,78 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+
+from api import metrics, slow_queries
+from content.models import Title
+
+
+@pytest.mark.django_db
+class TestSlowQueries:
+
+    @pytest.fixture(autouse=True)
+    def registry(self, settings):
+        settings.SLOW_QUERY_THRESHOLD = 0.0001
+        settings.SLOW_QUERY_DIR = ''
+        slow_queries._registry.clear()
+        yield
+        slow_queries._registry.clear()
+
+    def test_fingerprint(self):
+        assert slow_queries.fingerprint(
+            "SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'  "
+            "LIMIT 21"
+        ) == 'SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?'
+
+    def test_slow_queries_deduplicated(self, guest_client, title, caplog):
+        for year in (1994, 2000, 2010):
+            guest_client.get(f'/api/v1/titles/?year={year}')
+
+        ranking = slow_queries.ranking()
+        titles = [entry for entry in ranking
+                  if 'FROM "content_title"' in entry['fingerprint']
+                  and 'COUNT' in entry['fingerprint']]
+        assert len(titles) == 1, \
+            'Проверьте, что запросы группируются по отпечатку'
+        assert titles[0]['count'] == 3
+        assert titles[0]['routes'] == ['title-list']
+        assert titles[0]['plan'], \
+            'Проверьте, что для медленного запроса сохраняется план'
+        assert ranking == sorted(ranking, key=lambda item: item['total'],
+                                 reverse=True)
+
+    def test_command(self, guest_client, title, capsys):
+        guest_client.get('/api/v1/titles/')
+        call_command('slow_queries', limit=3, plans=True)
+        assert 'title-list' in capsys.readouterr().out
+
+    def test_explain_isolated(self):
+        counter = metrics.QueryCounter()
+        with transaction.atomic(), connection.execute_wrapper(counter):
+            plan = slow_queries.explain(
+                connection, 'SELECT * FROM missing_table', None)
+            assert plan.startswith('EXPLAIN недоступен'), \
+                'Проверьте, что ошибка EXPLAIN не выходит наружу'
+            slow_queries.explain(
+                connection, 'SELECT * FROM content_title', None)
+            assert Title.objects.count() == 0, \
+                'Проверьте, что транзакция запроса не прерывается'
+        assert counter.count == 1, \
+            'Проверьте, что EXPLAIN не попадает в метрики'
+
+    def test_plan_matches_params(self, monkeypatch):
+        sql = 'SELECT * FROM content_title WHERE id = %s'
+        plans = iter(['план медленного', 'план быстрого'])
+
+        def explain(connection, sql, params):
+            if params == [1]:
+                # Пока выполняется EXPLAIN, другой поток записывает более
+                # медленный запрос того же вида.
+                slow_queries.record(connection, sql, [2], 0.5, 'other')
+            return next(plans)
+
+        monkeypatch.setattr(slow_queries, 'explain', explain)
+        slow_queries.record(connection, sql, [1], 0.1, 'route')
+        [entry] = slow_queries._registry.values()
+        assert (entry['params'], entry['plan']) == ('[2]', 'план медленного'), \
+            'Проверьте, что план сохраняется вместе с его параметрами'
+
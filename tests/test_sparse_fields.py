@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def get_with_queries(client, url, params=None):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    return response, [query['sql'] for query in context.captured_queries]
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    def test_title_fields(self, guest_client, review):
+        response, queries = get_with_queries(
+            guest_client, '/api/v1/titles/', {'fields': 'id,name,rating'}
+        )
+        assert response.status_code == 200
+        assert response.json()['results'] == [{
+            'id': review.title_id, 'name': 'Побег из Шоушенка', 'rating': 8.0
+        }]
+        select = [sql for sql in queries if 'FROM "content_title"' in sql]
+        assert select and all('"description"' not in sql
+                               and 'content_category' not in sql
+                               for sql in select), \
+            'Проверьте, что ненужные столбцы и связи не запрашиваются'
+        assert not any('content_genre' in sql for sql in queries), \
+            'Проверьте, что жанры не загружаются, если их нет в ответе'
+
+    def test_title_omit(self, guest_client, title):
+        response = guest_client.get(f'/api/v1/titles/{title.id}/',
+                                    {'omit': 'description,stats'})
+        assert response.status_code == 200
+        assert set(response.json()) == {'id', 'name', 'year', 'genre',
+                                        'category', 'rating'}
+        assert response.json()['category'] == {'name': 'Фильм',
+                                               'slug': 'movie'}
+
+    def test_review_text_not_selected(self, guest_client, review):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        response, queries = get_with_queries(
+            guest_client, url, {'fields': 'id,score', 'cursor': ''}
+        )
+        assert response.json()['results'] == [{'id': review.id, 'score': 8}]
+        select = [sql for sql in queries if 'FROM "content_review"' in sql]
+        assert select and all('"text"' not in sql
+                               and 'users_user' not in sql
+                               for sql in select)
+
+    def test_unknown_field(self, guest_client, title):
+        response = guest_client.get('/api/v1/titles/',
+                                    {'fields': 'id,secret'})
+        assert response.status_code == 400
+        assert 'fields' in response.json()
+
+    def test_writes_not_affected(self, admin_client, category, genres):
+        response = admin_client.post('/api/v1/titles/?fields=id', {
+            'name': 'Новое', 'year': 2000, 'category': 'movie',
+            'genre': ['drama']
+        })
+        assert response.status_code == 201
+        assert 'name' in response.json()
@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from content.models import Review, Title, TitleStats
+
+
+def get_stats(title):
+    return TitleStats.objects.get(pk=title.pk)
+
+
+@pytest.fixture
+def another_title(category):
+    return Title.objects.create(name='Другой фильм', year=1999,
+                                category=category)
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def test_stats_follow_reviews(self, title, user, another_user):
+        first = Review.objects.create(title=title, author=user, text='a',
+                                      score=4)
+        second = Review.objects.create(title=title, author=another_user,
+                                       text='b', score=10)
+        stats = get_stats(title)
+        assert (stats.score_4, stats.score_10, stats.review_count) == (
+            1, 1, 2
+        ), 'Проверьте, что создание отзыва обновляет распределение оценок'
+        assert stats.last_review_at == second.pub_date
+
+        first = Review.objects.get(pk=first.pk)
+        first.score = 6
+        first.save()
+        stats = get_stats(title)
+        assert (stats.score_4, stats.score_6, stats.review_count) == (
+            0, 1, 2
+        ), 'Проверьте, что изменение оценки переносит отзыв в распределении'
+
+        second.delete()
+        stats = get_stats(title)
+        assert (stats.score_10, stats.review_count) == (0, 1)
+        assert stats.last_review_at == first.pub_date, \
+            'Проверьте, что удаление отзыва пересчитывает дату последнего'
+
+    def test_review_moved_to_another_title(self, title, another_title,
+                                           review):
+        review = Review.objects.get(pk=review.pk)
+        review.title = another_title
+        review.save()
+        assert get_stats(title).review_count == 0
+        assert get_stats(title).last_review_at is None
+        stats = get_stats(another_title)
+        assert (stats.score_8, stats.review_count) == (1, 1)
+
+    def test_stats_in_api(self, guest_client, review):
+        response = guest_client.get(f'/api/v1/titles/{review.title_id}/')
+        stats = response.json()['stats']
+        assert stats['review_count'] == 1
+        assert stats['scores'] == {str(score): int(score == 8)
+                                   for score in range(1, 11)}
+        assert stats['last_review_at']
+
+        results = guest_client.get('/api/v1/titles/').json()['results']
+        assert results[0]['stats'] == stats
+
+    def test_stats_action(self, guest_client, review):
+        url = f'/api/v1/titles/{review.title_id}/stats/'
+        with CaptureQueriesContext(connection) as context:
+            response = guest_client.get(url)
+        assert response.status_code == 200
+        assert response.json()['scores']['8'] == 1
+        assert not any('content_review' in query['sql']
+                       for query in context.captured_queries), \
+            'Проверьте, что статистика не агрегирует отзывы при чтении'
+
+        etag = response['ETag']
+        assert guest_client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == 304
+        assert guest_client.get('/api/v1/titles/0/stats/').status_code == 404
+
+    def test_recalculate_repairs_stats(self, title, another_title, review):
+        TitleStats.objects.filter(pk=title.pk).update(score_8=5,
+                                                      review_count=5)
+        TitleStats.objects.filter(pk=another_title.pk).delete()
+        last = timezone.now() - timedelta(days=1)
+        Review.objects.filter(pk=review.pk).update(pub_date=last)
+        call_command('recalculate_ratings')
+        stats = get_stats(title)
+        assert (stats.score_8, stats.review_count) == (1, 1)
+        assert stats.last_review_at == last
+        assert get_stats(another_title).review_count == 0, \
+            'Проверьте, что команда создаёт недостающую статистику'
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import User
+from .models import OutboxMessage, User
 
 
 @admin.register(User)
@@ -10,3 +10,16 @@ class UserAdminBoard(UserAdmin):
     Панель управления пользователями.
     """
     list_display = ('username', 'email', 'first_name', 'last_name', 'role')
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """
+    Очередь исходящих писем.
+    """
+    list_display = ('to', 'subject', 'status', 'attempts', 'created',
+                    'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to',)
+    # В тексте писем — коды подтверждения.
+    exclude = ('body',)
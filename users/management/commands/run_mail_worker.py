@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.outbox import deliver_batch, purge_delivered
+
+
+class Command(BaseCommand):
+    """
+    Обработчик очереди исходящих писем.
+    """
+    help = 'Отправка писем из очереди пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.MAIL_WORKER_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--interval', type=float, default=settings.MAIL_WORKER_INTERVAL,
+            help='Пауза в секундах, если очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь один раз и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        last_purge = None
+        while True:
+            processed = deliver_batch(options['batch_size'])
+            if processed:
+                self.stdout.write(f'Обработано писем: {processed}')
+                continue
+            now = time.monotonic()
+            if (last_purge is None or now - last_purge
+                    >= settings.MAIL_WORKER_PURGE_INTERVAL):
+                last_purge = now
+                purged = purge_delivered()
+                if purged:
+                    self.stdout.write(f'Удалено старых писем: {purged}')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
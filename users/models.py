@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class UserRoleChoices(models.TextChoices):
@@ -39,3 +40,54 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ['id']
+
+
+class OutboxStatusChoices(models.TextChoices):
+    """
+    Состояния исходящего письма.
+    """
+    PENDING = ('pending', 'в очереди',)
+    SENT = ('sent', 'отправлено',)
+    FAILED = ('failed', 'не отправлено',)
+
+
+class OutboxMessage(models.Model):
+    """
+    Исходящее письмо. Письма ставятся в очередь в ходе запроса и
+    отправляются отдельным процессом (`manage.py run_mail_worker`).
+    Текст письма (код подтверждения) стирается после отправки, а
+    обработанные письма удаляются через `MAIL_WORKER_RETENTION` секунд.
+    """
+    subject = models.CharField(verbose_name='тема', max_length=255)
+    body = models.TextField(verbose_name='текст')
+    from_email = models.CharField(verbose_name='отправитель',
+                                  max_length=255)
+    to = models.EmailField(verbose_name='получатель')
+    status = models.CharField(verbose_name='состояние',
+                              choices=OutboxStatusChoices.choices,
+                              default=OutboxStatusChoices.PENDING,
+                              max_length=10)
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='попыток отправки', default=0
+    )
+    last_error = models.TextField(verbose_name='последняя ошибка',
+                                  blank=True)
+    created = models.DateTimeField(verbose_name='создано',
+                                   auto_now_add=True)
+    next_attempt_at = models.DateTimeField(
+        verbose_name='следующая попытка', default=timezone.now
+    )
+    sent_at = models.DateTimeField(verbose_name='отправлено', null=True,
+                                   blank=True)
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'],
+                         name='users_outbox_due_idx'),
+        ]
@@ -0,0 +1,114 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxMessage, OutboxStatusChoices
+
+
+def enqueue_mail(mail_to: str, subject: str, message: str,
+                 from_email: str = None) -> OutboxMessage:
+    """
+    Ставит письмо в очередь на отправку.
+    """
+    return OutboxMessage.objects.create(
+        to=mail_to, subject=subject, body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL
+    )
+
+
+def claim_batch(batch_size: int) -> list:
+    """
+    Забирает из очереди пачку писем, срок отправки которых наступил.
+    На время отправки письма откладываются на `MAIL_WORKER_LEASE`
+    секунд, чтобы их не забрал параллельно работающий обработчик.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxStatusChoices.PENDING,
+                    next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        OutboxMessage.objects.filter(
+            pk__in=[message.pk for message in messages]
+        ).update(next_attempt_at=now + timedelta(
+            seconds=settings.MAIL_WORKER_LEASE
+        ))
+    return messages
+
+
+def _failed(message, error):
+    message.attempts += 1
+    message.last_error = str(error)
+    if message.attempts >= settings.MAIL_WORKER_MAX_ATTEMPTS:
+        message.status = OutboxStatusChoices.FAILED
+        message.body = ''
+    else:
+        delay = settings.MAIL_WORKER_RETRY_DELAY * 2 ** (message.attempts - 1)
+        message.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    message.save(update_fields=['attempts', 'last_error', 'status',
+                                'next_attempt_at', 'body'])
+
+
+def _sent(messages):
+    # Текст письма (код подтверждения) после отправки не хранится.
+    OutboxMessage.objects.filter(
+        pk__in=[message.pk for message in messages]
+    ).update(status=OutboxStatusChoices.SENT, sent_at=timezone.now(),
+             body='')
+
+
+def purge_delivered() -> int:
+    """
+    Удаляет отправленные и окончательно не отправленные письма старше
+    `MAIL_WORKER_RETENTION` секунд. Возвращает количество удалённых.
+    """
+    cutoff = timezone.now() - timedelta(
+        seconds=settings.MAIL_WORKER_RETENTION
+    )
+    deleted, _ = OutboxMessage.objects.filter(
+        status__in=[OutboxStatusChoices.SENT, OutboxStatusChoices.FAILED],
+        created__lt=cutoff
+    ).delete()
+    return deleted
+
+
+def deliver_batch(batch_size: int = None) -> int:
+    """
+    Отправляет пачку писем через одно соединение с почтовым сервером.
+    Неудачные попытки повторяются с экспоненциально растущей паузой.
+    Возвращает количество писем, взятых из очереди.
+    """
+    messages = claim_batch(batch_size or settings.MAIL_WORKER_BATCH_SIZE)
+    if not messages:
+        return 0
+
+    sent = []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as error:
+        for message in messages:
+            _failed(message, error)
+        return len(messages)
+
+    try:
+        for message in messages:
+            email = EmailMessage(subject=message.subject,
+                                 body=message.body,
+                                 from_email=message.from_email,
+                                 to=[message.to], connection=connection)
+            try:
+                email.send()
+            except Exception as error:
+                _failed(message, error)
+            else:
+                sent.append(message)
+    finally:
+        connection.close()
+        _sent(sent)
+    return len(messages)